@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serve through this entry point (e.g. `uvicorn backend.config.asgi:application`)
+to keep the SSE feed at /api/events/services/ open; under WSGI it falls back
+to short streams that the browser reconnects.
 """
 
 import os
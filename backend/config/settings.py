@@ -142,6 +142,21 @@ else:
     }
 
 
+# Cache
+# Response caches live here. The generation counters that key them are kept
+# in the database (core.generations), so the per-process local-memory
+# default stays correct with several workers; point CACHE_BACKEND/
+# CACHE_LOCATION at a shared cache (Redis, Memcached) to share the cached
+# responses themselves.
+
+CACHES = {
+    "default": {
+        "BACKEND": env_trimmed("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": env_trimmed("CACHE_LOCATION"),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
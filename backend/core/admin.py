@@ -27,6 +27,9 @@ class ServiceStatusHistoryInline(admin.TabularInline):
     readonly_fields = ("old_status", "new_status", "changed_by", "changed_at")
     can_delete = False
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("changed_by")
+
 
 class PhotoInline(admin.TabularInline):
     model = models.Photo
@@ -51,6 +54,7 @@ class CemeteryAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
 
 @admin.register(models.Plot)
 class PlotAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
+    list_select_related = ("cemetery",)
     list_display = ("cemetery", "section", "row", "plot_number")
     search_fields = ("cemetery__name", "section", "row", "plot_number")
     list_filter = ("cemetery",)
@@ -58,6 +62,7 @@ class PlotAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
 
 @admin.register(models.Memorial)
 class MemorialAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
+    list_select_related = ("customer", "plot__cemetery")
     list_display = ("id", "customer", "plot", "material", "install_date")
     search_fields = ("customer__full_name", "plot__cemetery__name", "inscription_text")
     list_filter = ("material",)
@@ -73,6 +78,7 @@ class EmployeeAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
 
 @admin.register(models.Service)
 class ServiceAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
+    list_select_related = ("memorial__customer",)
     list_display = (
         "id",
         "memorial",
@@ -88,6 +94,7 @@ class ServiceAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
 
 @admin.register(models.ServiceStatusHistory)
 class ServiceStatusHistoryAdmin(admin.ModelAdmin):
+    list_select_related = ("changed_by",)
     list_display = ("service", "old_status", "new_status", "changed_by", "changed_at")
     list_filter = ("new_status",)
     search_fields = ("service__id", "changed_by__full_name")
@@ -96,6 +103,7 @@ class ServiceStatusHistoryAdmin(admin.ModelAdmin):
 
 @admin.register(models.ServiceAssignment)
 class ServiceAssignmentAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
+    list_select_related = ("employee",)
     list_display = ("service", "employee", "role")
     list_filter = ("role",)
     search_fields = ("service__id", "employee__full_name")
@@ -103,6 +111,7 @@ class ServiceAssignmentAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
 
 @admin.register(models.Photo)
 class PhotoAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
+    list_select_related = ("memorial__customer",)
     list_display = ("id", "memorial", "service", "photo_type", "caption")
     list_filter = ("photo_type",)
     search_fields = ("caption", "memorial__id", "service__id")
@@ -110,6 +119,7 @@ class PhotoAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
 
 @admin.register(models.Invoice)
 class InvoiceAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
+    list_select_related = ("customer", "service")
     list_display = ("id", "customer", "service", "status", "issued_date", "due_date", "total_amount")
     list_filter = ("status",)
     search_fields = ("customer__full_name", "service__id")
@@ -118,12 +128,14 @@ class InvoiceAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
 
 @admin.register(models.InvoiceItem)
 class InvoiceItemAdmin(admin.ModelAdmin):
+    list_select_related = ("invoice",)
     list_display = ("invoice", "description", "quantity", "unit_price")
     search_fields = ("invoice__id", "description")
 
 
 @admin.register(models.Payment)
 class PaymentAdmin(TimestampedReadonlyMixin, admin.ModelAdmin):
+    list_select_related = ("invoice",)
     list_display = ("id", "invoice", "provider", "status", "method", "amount", "currency", "succeeded_at")
     list_filter = ("provider", "status", "method")
     search_fields = ("invoice__id", "invoice__customer__full_name", "provider_reference")
@@ -0,0 +1,228 @@
+"""
+Customer lifetime value and retention cohorts, computed in bulk with NumPy.
+
+`customer_value()` reads customers, invoices, succeeded payments and completed
+services with one query each, maps every row onto a dense customer index and
+aggregates with array operations (`bincount`, `lexsort`, `unique`) instead of
+per-customer ORM loops. The result is cached under the generations of the
+tables it reads (`core.generations`), so it is recomputed only after one of
+them changes.
+
+The all-customer average lifetime value is not repeated here: it is
+`total_invoiced / customers`, which the lifetime-value report already serves
+from the monthly rollups (`core.rollups.lifetime_value`). This module adds the
+distribution (median, per-customer rows) the rollups cannot give.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db import connections, models
+from django.db.models.functions import Cast
+
+from core.generations import generations_key
+from core.models import Customer, Invoice, Payment, Service
+
+
+SOURCE_MODELS = (Customer, Invoice, Payment, Service)
+CACHE_PREFIX = "core:analytics:customer-value:"
+CACHE_TIMEOUT = 24 * 60 * 60
+RETENTION_MONTHS = 12
+NO_DATE = np.datetime64("NaT", "D")
+
+
+class CustomerValue:
+    """Per-customer arrays aligned on `customer_ids` (sorted), plus the derived summary."""
+
+    def __init__(self, customer_ids, lifetime_value, paid, service_count, first_service, last_service,
+                 interval_sum, interval_count, cohorts):
+        self.customer_ids = customer_ids
+        self.lifetime_value = lifetime_value
+        self.paid = paid
+        self.service_count = service_count
+        self.first_service = first_service
+        self.last_service = last_service
+        self.interval_sum = interval_sum
+        self.interval_count = interval_count
+        self.cohorts = cohorts
+
+    def summary(self):
+        customers = len(self.customer_ids)
+        intervals = int(self.interval_count.sum())
+        served = self.service_count > 0
+        return {
+            "customers": customers,
+            "customers_with_revenue": int(np.count_nonzero(self.lifetime_value)),
+            "total_invoiced": round(float(self.lifetime_value.sum()), 2),
+            "total_paid": round(float(self.paid.sum()), 2),
+            "median_lifetime_value": round(float(np.median(self.lifetime_value)), 2) if customers else 0.0,
+            "repeat_customers": int(np.count_nonzero(self.service_count > 1)),
+            "average_services": round(float(self.service_count[served].mean()), 2) if served.any() else 0.0,
+            "average_repeat_interval_days": (
+                round(float(self.interval_sum.sum()) / intervals, 1) if intervals else None
+            ),
+            "cohorts": self.cohorts,
+        }
+
+    def rows(self, customer_ids):
+        """Per-customer figures for `customer_ids`; unknown ids are skipped."""
+        wanted = np.unique(np.asarray(list(customer_ids), dtype=np.int64))
+        positions, matched = _index(self.customer_ids, wanted)
+        out = []
+        for i in positions[matched]:
+            intervals = int(self.interval_count[i])
+            out.append({
+                "customer_id": int(self.customer_ids[i]),
+                "lifetime_value": round(float(self.lifetime_value[i]), 2),
+                "paid": round(float(self.paid[i]), 2),
+                "services": int(self.service_count[i]),
+                "first_service": _date(self.first_service[i]),
+                "last_service": _date(self.last_service[i]),
+                "average_repeat_interval_days": (
+                    round(float(self.interval_sum[i]) / intervals, 1) if intervals else None
+                ),
+            })
+        return out
+
+
+def _date(day):
+    return None if np.isnat(day) else str(day)
+
+
+def _index(customer_ids, refs):
+    """Dense positions of `refs` in the sorted `customer_ids`, and a mask of refs that matched."""
+    positions = np.searchsorted(customer_ids, refs)
+    positions[positions >= len(customer_ids)] = 0
+    matched = customer_ids[positions] == refs if len(customer_ids) else np.zeros(len(refs), dtype=bool)
+    return positions, matched
+
+
+def _columns(qs, *columns):
+    """
+    Read `(name, dtype)` columns of `qs` into one NumPy array each.
+
+    The compiled SQL is run on a plain cursor: skipping `values_list` row
+    construction roughly halves the fetch time on large tables. Date columns
+    should be cast to text in the query and given a `datetime64[D]` dtype, so
+    NumPy parses the ISO strings instead of the driver building date objects.
+    """
+    names = [name for name, _dtype in columns]
+    sql, params = qs.values_list(*names).query.sql_with_params()
+    with connections[qs.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    out = []
+    for i, (_name, dtype) in enumerate(columns):
+        if np.dtype(dtype).kind == "M":
+            out.append(np.array([row[i] for row in rows], dtype=dtype))
+        else:
+            out.append(np.fromiter((row[i] for row in rows), dtype=dtype, count=len(rows)))
+    return out
+
+
+def retention_cohorts(positions, days, months=RETENTION_MONTHS):
+    """
+    Monthly retention by cohort: customers are grouped by the month of their
+    first completed service, and `retention[k]` is the share of the cohort
+    with a completed service `k` months later (`retention[0]` is always 100).
+    """
+    if not len(positions):
+        return []
+    month_index = days.astype("datetime64[M]").astype(np.int64)
+
+    first_month = np.full(positions.max() + 1, np.iinfo(np.int64).max)
+    np.minimum.at(first_month, positions, month_index)
+    cohort = first_month[positions]
+    offset = month_index - cohort
+    keep = offset < months
+
+    # One hit per (customer, offset), then count customers per (cohort, offset).
+    pairs = np.unique(positions[keep] * months + offset[keep])
+    pair_customer, pair_offset = np.divmod(pairs, months)
+    cohorts, cohort_pos = np.unique(first_month[pair_customer], return_inverse=True)
+    counts = np.zeros((len(cohorts), months), dtype=np.int64)
+    np.add.at(counts, (cohort_pos, pair_offset), 1)
+
+    out = []
+    for i, month in enumerate(cohorts):
+        size = int(counts[i, 0])
+        label = str(np.datetime64(int(month), "M"))
+        out.append({
+            "cohort": label,
+            "size": int(size),
+            "retention": [round(float(value) / size * 100, 1) for value in counts[i]],
+        })
+    return out
+
+
+def compute_customer_value():
+    (customer_ids,) = _columns(Customer.objects.order_by("id"), ("id", np.int64))
+    size = len(customer_ids)
+
+    inv_customer, inv_amount = _columns(
+        Invoice.objects.order_by().annotate(amount=Cast("total_amount", models.FloatField())),
+        ("customer_id", np.int64),
+        ("amount", np.float64),
+    )
+    positions, matched = _index(customer_ids, inv_customer)
+    lifetime_value = np.bincount(positions[matched], weights=inv_amount[matched], minlength=size)
+
+    pay_customer, pay_amount = _columns(
+        Payment.objects.filter(status=Payment.Status.SUCCEEDED)
+        .order_by()
+        .annotate(paid_amount=Cast("amount", models.FloatField())),
+        ("invoice__customer_id", np.int64),
+        ("paid_amount", np.float64),
+    )
+    positions, matched = _index(customer_ids, pay_customer)
+    paid = np.bincount(positions[matched], weights=pay_amount[matched], minlength=size)
+
+    svc_customer, svc_day = _columns(
+        Service.objects.filter(status=Service.Status.COMPLETED, completed_date__isnull=False)
+        .order_by()
+        .annotate(day=Cast("completed_date", models.CharField())),
+        ("memorial__customer_id", np.int64),
+        ("day", "datetime64[D]"),
+    )
+    positions, matched = _index(customer_ids, svc_customer)
+    positions, days = positions[matched], svc_day[matched]
+
+    service_count = np.bincount(positions, minlength=size)
+    first_service = np.full(size, NO_DATE)
+    last_service = np.full(size, NO_DATE)
+    interval_sum = np.zeros(size)
+    interval_count = np.zeros(size, dtype=np.int64)
+    if len(positions):
+        order = np.lexsort((days, positions))
+        by_customer, by_date = positions[order], days[order]
+        starts = np.flatnonzero(np.r_[True, by_customer[1:] != by_customer[:-1]])
+        ends = np.r_[starts[1:], len(by_customer)] - 1
+        first_service[by_customer[starts]] = by_date[starts]
+        last_service[by_customer[ends]] = by_date[ends]
+
+        # Gaps between consecutive completed services of the same customer.
+        same = by_customer[1:] == by_customer[:-1]
+        gaps = np.diff(by_date)[same].astype(np.int64)
+        owners = by_customer[1:][same]
+        interval_sum = np.bincount(owners, weights=gaps, minlength=size)
+        interval_count = np.bincount(owners, minlength=size)
+
+    return CustomerValue(
+        customer_ids=customer_ids,
+        lifetime_value=lifetime_value,
+        paid=paid,
+        service_count=service_count,
+        first_service=first_service,
+        last_service=last_service,
+        interval_sum=interval_sum,
+        interval_count=interval_count,
+        cohorts=retention_cohorts(positions, days),
+    )
+
+
+def customer_value():
+    """The cached `CustomerValue`, recomputed after any write to the source tables."""
+    key = CACHE_PREFIX + generations_key(*SOURCE_MODELS)
+    result = cache.get(key)
+    if result is None:
+        result = compute_customer_value()
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,120 @@
+"""
+In-process dispatch of GET sub-requests for `POST /api/batch/`.
+
+Each sub-request is resolved against the URLconf and handed straight to its
+view with the outer request's user, session and headers, so authentication
+and middleware run once for the whole batch.
+
+The views run one after another on the thread that owns the request's
+database connection, so the whole batch shares one connection. This is
+deliberate: Django opens a connection per thread, so running the safe read
+routes concurrently would cost a connection (and its setup) per item and let
+one client fan out to `max_requests` connections at once, while the routes
+worth batching are cached reads that return in a few milliseconds. The win is
+the round trips saved, not parallelism. Anything still running when the time
+limit expires comes back as a 504.
+"""
+import asyncio
+import json
+import logging
+import time
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpRequest, QueryDict, StreamingHttpResponse
+from django.urls import Resolver404, resolve
+from rest_framework.response import Response
+
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/api/"
+# Request headers that describe the batch POST itself rather than the sub-requests.
+DROPPED_META = {"CONTENT_LENGTH", "CONTENT_TYPE", "HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE"}
+
+
+def error(status, detail):
+    return {"status": status, "body": {"detail": detail}}
+
+
+def subrequest(request, path, if_none_match=None):
+    url = urlsplit(path)
+    sub = HttpRequest()
+    sub.method = "GET"
+    sub.path = sub.path_info = url.path
+    sub.GET = QueryDict(url.query)
+    sub.COOKIES = request.COOKIES
+    sub.META = {key: value for key, value in request.META.items() if key not in DROPPED_META}
+    sub.META.update(REQUEST_METHOD="GET", PATH_INFO=url.path, QUERY_STRING=url.query)
+    if if_none_match:
+        sub.META["HTTP_IF_NONE_MATCH"] = if_none_match
+    for attr in ("user", "session"):
+        if hasattr(request, attr):
+            setattr(sub, attr, getattr(request, attr))
+    return sub
+
+
+def result(response):
+    """The per-item result for a view's response."""
+    if isinstance(response, StreamingHttpResponse):
+        response.close()
+        return error(400, "Streamed responses cannot be batched.")
+    if isinstance(response, Response):
+        body = response.data
+    elif response.get("Content-Type", "").startswith("application/json") and response.content:
+        body = json.loads(response.content)
+    else:
+        body = None
+    out = {"status": response.status_code, "body": body}
+    if response.has_header("ETag"):
+        out["etag"] = response["ETag"]
+    return out
+
+
+def call(view, sub, match):
+    try:
+        return result(view(sub, *match.args, **match.kwargs))
+    except Http404:
+        return error(404, "Not found.")
+    except Exception:
+        logger.exception("Batched request to %s failed", sub.path)
+        return error(500, "Internal server error.")
+
+
+async def dispatch(request, items, time_limit, excluded=()):
+    """
+    Run `items` (dicts with `path` and an optional `if_none_match`) as GET
+    sub-requests of `request`; returns one `{"status", "body"[, "etag"]}` per
+    item, in order. Views in `excluded` (by class) are refused with a 400.
+    """
+    deadline = time.monotonic() + time_limit
+    results = [None] * len(items)
+    calls = []
+
+    for index, item in enumerate(items):
+        path = item["path"]
+        if not path.startswith(API_PREFIX):
+            results[index] = error(400, f"Only {API_PREFIX} routes can be batched.")
+            continue
+        try:
+            match = resolve(urlsplit(path).path)
+        except Resolver404:
+            results[index] = error(404, "Not found.")
+            continue
+        if getattr(match.func, "view_class", None) in excluded:
+            results[index] = error(400, "This route cannot be batched.")
+            continue
+        calls.append((index, match.func, subrequest(request, path, item.get("if_none_match")), match))
+
+    async def run():
+        for index, view, sub, match in calls:
+            if time.monotonic() >= deadline:
+                return
+            results[index] = await sync_to_async(call)(view, sub, match)
+
+    try:
+        await asyncio.wait_for(run(), timeout=max(0, deadline - time.monotonic()))
+    except asyncio.TimeoutError:
+        pass
+
+    return [out if out is not None else error(504, "Batch time limit exceeded.") for out in results]
@@ -0,0 +1,272 @@
+import hashlib
+import math
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from core.generations import versions
+
+
+CACHE_PREFIX = "core:api:response:"
+STALE_PREFIX = "core:api:response-stale:"
+LOCK_PREFIX = "core:api:response-lock:"
+STATS_PREFIX = "core:api:response-stats:"
+OUTCOMES = ("hits", "misses", "coalesced", "stale")
+
+# Names of every view using the mixin, so the stats endpoint can list them.
+cached_views = set()
+
+# Recomputations running in this process, by cache key.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _count(name, outcome):
+    key = f"{STATS_PREFIX}{name}:{outcome}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def cache_stats():
+    """
+    Counters per cached view, for sizing the cache: `hits`, `misses` (the
+    request recomputed the response), `coalesced` (it waited for another
+    request's recomputation) and `stale` (it got the previous response while
+    another request recomputed).
+    """
+    keys = {(name, outcome): f"{STATS_PREFIX}{name}:{outcome}" for name in cached_views for outcome in OUTCOMES}
+    found = cache.get_many(list(keys.values()))
+    stats = {}
+    for name in sorted(cached_views):
+        counts = {outcome: found.get(keys[name, outcome], 0) for outcome in OUTCOMES}
+        lookups = sum(counts.values())
+        served = lookups - counts["misses"]
+        stats[name] = {**counts, "hit_rate": round(served / lookups * 100, 1) if lookups else None}
+    return stats
+
+
+def single_flight(key, compute, wait):
+    """
+    Run `compute()` once per `key` in this process: concurrent callers with
+    the same key block for up to `wait` seconds and share its result.
+    Returns `(result, shared)`; raises `TimeoutError` when the wait runs out.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        try:
+            return future.result(timeout=wait), True
+        except FutureTimeout:
+            raise TimeoutError(key)
+    try:
+        result = compute()
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(result)
+        return result, False
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+class ConditionalGetMixin:
+    """
+    `ETag`/`Last-Modified` validators for GET responses, derived from the
+    generations of `cache_models` (`core.generations`) without querying them.
+
+    Views list in `cache_models` every `core` model whose writes can change
+    their output, including tables that only feed denormalized columns (a
+    service save refreshes memorial and cemetery counters with `update()`,
+    which sends no signal of its own), and wrap their response with
+    `self.conditional_response(request, build)`. When the client's
+    `If-None-Match`/`If-Modified-Since` still matches, a 304 is returned
+    and `build` is never called, so neither the main query nor the
+    serializer runs.
+
+    `cache_variant()` adds anything else the output depends on.
+    """
+
+    cache_models = ()
+
+    def cache_variant(self, request):
+        return ""
+
+    def cache_digest(self, request, generations=""):
+        """Digest of the view, its query parameters and `generations` (a `core.generations` key, if any)."""
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        version = f"{type(self).__name__}:{generations}:{self.cache_variant(request)}"
+        return hashlib.sha1(f"{version}?{params}".encode()).hexdigest()
+
+    def validators(self, request):
+        """`(digest, etag, modified)` for the current generations of `cache_models`."""
+        generations, modified = versions(*self.cache_models)
+        digest = self.cache_digest(request, generations)
+        # Rounded up, so a write later in the same second is newer than any date already sent.
+        return digest, quote_etag(digest), math.ceil(modified)
+
+    def not_modified(self, request, etag, modified):
+        return get_conditional_response(request, etag=etag, last_modified=modified)
+
+    def add_validators(self, response, etag, modified):
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            # Until that second is over another write can still land in it, and
+            # If-Modified-Since has no finer resolution; the ETag covers it meanwhile.
+            if modified <= time.time():
+                response["Last-Modified"] = http_date(modified)
+            # Let browsers keep the body but revalidate on every poll instead of
+            # guessing a freshness lifetime from Last-Modified.
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def conditional_response(self, request, build):
+        if not self.cache_models:
+            return build()
+        _digest, etag, modified = self.validators(request)
+        response = self.not_modified(request, etag, modified) or build()
+        return self.add_validators(response, etag, modified)
+
+
+class CachedResponseMixin(ConditionalGetMixin):
+    """
+    Cache a view's GET responses under the generations of the models it reads.
+
+    Works like `ConditionalGetMixin`, with `self.cached_response(request,
+    build)` in place of `conditional_response`: the cache key is the same
+    digest of view, query parameters and generations, so a write to any of
+    `cache_models` moves the view onto a new key instead of serving the old
+    body.
+
+    Only plain 200 responses are stored; streamed responses always bypass it.
+    Each lookup adds an `X-Cache: HIT|MISS|STALE` header and bumps the view's
+    counter in `cache_stats()`.
+
+    With `coalesce = True` a miss is recomputed by one request at a time: an
+    in-process future covers threads of the same worker and a cache lock
+    covers other workers. The rest get the previous response for the same
+    parameters while it is recomputed (stale-while-revalidate), or, when there
+    is none, wait up to `coalesce_wait` seconds for the new one before giving
+    up and computing it themselves. Stale responses carry no validators, so
+    clients never keep them under the new ETag.
+    """
+
+    cache_timeout = 15 * 60
+    coalesce = False
+    coalesce_wait = 5
+    coalesce_lock_timeout = 60
+    stale_timeout = 24 * 60 * 60
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_models:
+            cached_views.add(cls.__name__)
+
+    def cached_response(self, request, build):
+        if not self.cache_models:
+            return build()
+
+        name = type(self).__name__
+        digest, etag, modified = self.validators(request)
+        response = self.not_modified(request, etag, modified)
+        if response is not None:
+            return self.add_validators(response, etag, modified)
+
+        key = f"{CACHE_PREFIX}{name}:{digest}"
+        cached = cache.get(key)
+        if cached is not None:
+            _count(name, "hits")
+            return self.add_validators(self.cached_copy(cached, "HIT"), etag, modified)
+
+        if not self.coalesce:
+            _count(name, "misses")
+            response, _entry = self.compute(key, None, build)
+            response["X-Cache"] = "MISS"
+            return self.add_validators(response, etag, modified)
+
+        stale_key = f"{STALE_PREFIX}{name}:{self.cache_digest(request)}"
+        stale = cache.get(stale_key)
+        try:
+            # With a previous response to fall back on there is no point waiting.
+            (response, entry), shared = single_flight(
+                key,
+                lambda: self.compute_once(key, stale_key, stale is not None, build),
+                0 if stale is not None else self.coalesce_wait,
+            )
+        except TimeoutError:
+            response, entry, shared = None, None, True
+
+        if not shared and response is not None:
+            _count(name, "misses")
+            response["X-Cache"] = "MISS"
+            return self.add_validators(response, etag, modified)
+        if entry is not None:
+            _count(name, "coalesced")
+            return self.add_validators(self.cached_copy(entry, "HIT"), etag, modified)
+        if response is None and stale is not None:
+            _count(name, "stale")
+            response = self.cached_copy(stale, "STALE")
+            patch_cache_control(response, no_cache=True)
+            return response
+
+        # Nothing to share (the leader's response was not cacheable, or no
+        # previous value while another worker recomputes): compute it here.
+        _count(name, "misses")
+        response, _entry = self.compute(key, stale_key, build)
+        response["X-Cache"] = "MISS"
+        return self.add_validators(response, etag, modified)
+
+    def cached_copy(self, entry, outcome):
+        data, headers = entry
+        response = Response(data, headers=headers)
+        response["X-Cache"] = outcome
+        return response
+
+    def compute(self, key, stale_key, build):
+        """Build the response and store it; returns `(response, entry)`, entry None when not cacheable."""
+        response = build()
+        if not isinstance(response, Response) or response.status_code != 200:
+            return response, None
+        headers = {header: value for header, value in response.items() if header != "Content-Type"}
+        entry = (response.data, headers)
+        cache.set(key, entry, self.cache_timeout)
+        if stale_key is not None:
+            cache.set(stale_key, entry, self.stale_timeout)
+        return response, entry
+
+    def compute_once(self, key, stale_key, has_stale, build):
+        """
+        Compute under the cross-worker lock. Returns `(None, None)` when another
+        worker holds it and there is a previous response to serve meanwhile;
+        otherwise polls for that worker's result until `coalesce_wait` runs out.
+        """
+        lock_key = f"{LOCK_PREFIX}{key}"
+        if cache.add(lock_key, 1, timeout=self.coalesce_lock_timeout):
+            try:
+                return self.compute(key, stale_key, build)
+            finally:
+                cache.delete(lock_key)
+
+        if has_stale:
+            return None, None
+        deadline = time.monotonic() + self.coalesce_wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return None, entry
+        return None, None
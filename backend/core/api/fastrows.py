@@ -0,0 +1,182 @@
+"""
+Read-only fast path for the list endpoints.
+
+Each row builder mirrors one DRF serializer from `core.api.serializers`, but
+reads plain dicts from `.values()` and assembles the output directly instead
+of walking model attributes through DRF field machinery. Output is identical
+to the serializer it replaces (see the parity tests in `core/tests.py`).
+
+Date, datetime and decimal columns are formatted with unbound DRF fields so
+timezone handling and decimal coercion follow the REST_FRAMEWORK settings.
+"""
+import copy
+
+from rest_framework import serializers
+
+from core.api.streaming import chunked
+from core.models import Service, ServiceAssignment
+
+
+_date = serializers.DateField().to_representation
+_datetime = serializers.DateTimeField().to_representation
+_gps = serializers.DecimalField(max_digits=9, decimal_places=6).to_representation
+
+
+def choice_labels(choices):
+    """Precomputed replacement for `get_<field>_display()`."""
+    labels = dict(choices)
+    return lambda value: str(labels.get(value, value))
+
+
+class FastRows:
+    """
+    Declarative `.values()` row builder.
+
+    `columns` is a sequence of `(output_key, values_path, formatter)`; the
+    formatter is skipped for NULLs, matching how DRF serializers emit `None`.
+    Columns with a `None` path are placeholders filled in by `build_many()`.
+    """
+
+    columns = ()
+
+    def field_names(self):
+        return [key for key, _path, _fmt in self.columns]
+
+    def select(self, fields):
+        """Return a builder restricted to `fields` (keeping declaration order), or self for all."""
+        if fields is None:
+            return self
+        narrowed = copy.copy(self)
+        narrowed.columns = tuple(column for column in self.columns if column[0] in fields)
+        return narrowed
+
+    def paths(self):
+        return [path for _key, path, _fmt in self.columns if path is not None]
+
+    def values(self, qs, extra=()):
+        paths = list(dict.fromkeys([*self.paths(), *extra]))
+        return qs.prefetch_related(None).values(*paths)
+
+    def build(self, row):
+        out = {}
+        for key, path, fmt in self.columns:
+            value = row[path] if path is not None else None
+            out[key] = value if value is None or fmt is None else fmt(value)
+        return out
+
+    def build_many(self, rows):
+        return [self.build(row) for row in rows]
+
+
+class DashboardServiceRows(FastRows):
+    """Mirrors `DashboardServiceSerializer`."""
+
+    columns = (
+        ("id", "id", None),
+        ("memorial_name", "memorial__customer__full_name", str),
+        ("cemetery_name", "memorial__plot__cemetery__name", str),
+        ("scheduled_start", "scheduled_start", _datetime),
+        ("status", "status", None),
+        ("status_display", "status", choice_labels(Service.Status.choices)),
+    )
+
+
+class MemorialSummaryRows(FastRows):
+    """Mirrors `MemorialSummarySerializer`."""
+
+    columns = (
+        ("id", "id", None),
+        ("customer", "customer__full_name", str),
+        ("cemetery", "plot__cemetery__name", str),
+        ("last_service_status", "last_service_status", str),
+        ("last_service_date", "last_service_date", _date),
+    )
+
+
+class CustomerSummaryRows(FastRows):
+    """Mirrors `CustomerSummarySerializer`."""
+
+    columns = (
+        ("id", "id", None),
+        ("full_name", "full_name", str),
+        ("email", "email", str),
+        ("phone", "phone", str),
+        ("memorials_count", "memorials_count", int),
+        ("last_contact", "last_contact", _date),
+    )
+
+
+class CemeterySummaryRows(FastRows):
+    """Mirrors `CemeterySummarySerializer`."""
+
+    columns = (
+        ("id", "id", None),
+        ("name", "name", str),
+        ("city", "city", str),
+        ("memorials_count", "memorials_count", int),
+        ("active_services", "active_services", int),
+    )
+
+
+class SchedulingServiceRows(FastRows):
+    """
+    Mirrors `SchedulingServiceSerializer`.
+
+    The technician comes from the service's first assignment (lowest id), looked
+    up for a whole batch of rows in one query instead of one query per row, and
+    only when a technician column is selected.
+    """
+
+    columns = (
+        ("id", "id", None),
+        ("service_type", "service_type", None),
+        ("status", "status", None),
+        ("scheduled_start", "scheduled_start", _datetime),
+        ("estimated_minutes", "estimated_minutes", int),
+        ("memorial_name", "memorial__customer__full_name", str),
+        ("cemetery_name", "memorial__plot__cemetery__name", str),
+        ("technician_id", None, None),
+        ("technician_name", None, None),
+        ("price", "current_price", float),
+        ("gps_lat", "memorial__plot__gps_lat", _gps),
+        ("gps_lng", "memorial__plot__gps_lng", _gps),
+    )
+    technician_fields = ("technician_id", "technician_name")
+    lookup_batch_size = 500
+
+    def wants_technician(self):
+        return any(key in self.technician_fields for key, _path, _fmt in self.columns)
+
+    def paths(self):
+        paths = super().paths()
+        if self.wants_technician() and "id" not in paths:
+            paths.append("id")
+        return paths
+
+    def technicians(self, service_ids):
+        found = {}
+        for ids in chunked(service_ids, self.lookup_batch_size):
+            assignments = (
+                ServiceAssignment.objects.filter(service_id__in=ids)
+                .order_by("-id")
+                .values_list("service_id", "employee_id", "employee__full_name")
+            )
+            # Descending ids: the lowest assignment id per service is written last and wins.
+            for service_id, employee_id, full_name in assignments:
+                found[service_id] = (employee_id, full_name)
+        return found
+
+    def build_many(self, rows):
+        rows = list(rows)
+        out = [self.build(row) for row in rows]
+        if not self.wants_technician():
+            return out
+
+        technicians = self.technicians([row["id"] for row in rows])
+        for row, item in zip(rows, out):
+            technician_id, technician_name = technicians.get(row["id"], (None, None))
+            if "technician_id" in item:
+                item["technician_id"] = technician_id
+            if "technician_name" in item:
+                item["technician_name"] = technician_name
+        return out
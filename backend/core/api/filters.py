@@ -0,0 +1,156 @@
+import datetime
+from abc import ABC, abstractmethod
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from core import search
+
+
+class ListFilter(ABC):
+    """
+    A whitelisted query parameter compiled to a queryset predicate.
+
+    `path` is the ORM lookup path the predicate runs against.
+    """
+
+    def __init__(self, param, path):
+        self.param = param
+        self.path = path
+
+    def params(self):
+        return [self.param]
+
+    def is_active(self, query_params):
+        return any(query_params.get(param) not in (None, "") for param in self.params())
+
+    def split(self, raw):
+        return [part.strip() for part in raw.split(",") if part.strip()]
+
+    def invalid(self, param, message):
+        return ValidationError({param: [message]})
+
+    @abstractmethod
+    def apply(self, qs, query_params):
+        """`qs` narrowed by this parameter; only called when `is_active()`."""
+
+
+class ChoiceFilter(ListFilter):
+    """`?status=scheduled,in_progress` -> `status IN (...)`, validated against the choices."""
+
+    def __init__(self, param, path, choices):
+        super().__init__(param, path)
+        self.choices = {value for value, _label in choices}
+
+    def apply(self, qs, query_params):
+        values = self.split(query_params[self.param])
+        unknown = [value for value in values if value not in self.choices]
+        if unknown:
+            raise self.invalid(self.param, f"Unknown value(s): {', '.join(unknown)}.")
+        return qs.filter(**{f"{self.path}__in": values})
+
+
+class BooleanFilter(ListFilter):
+    """`?is_active=true` -> `is_active = TRUE`."""
+
+    values = {"true": True, "1": True, "false": False, "0": False}
+
+    def apply(self, qs, query_params):
+        raw = query_params[self.param].lower()
+        if raw not in self.values:
+            raise self.invalid(self.param, "Expected true or false.")
+        return qs.filter(**{self.path: self.values[raw]})
+
+
+class IdFilter(ListFilter):
+    """`?cemetery_id=3,4` -> `plot__cemetery_id IN (3, 4)`."""
+
+    def apply(self, qs, query_params):
+        try:
+            ids = [int(value) for value in self.split(query_params[self.param])]
+        except ValueError:
+            raise self.invalid(self.param, "Expected a comma-separated list of integers.")
+        return qs.filter(**{f"{self.path}__in": ids})
+
+
+class DateRangeFilter(ListFilter):
+    """
+    `?<param>_after=...&<param>_before=...`, both bounds inclusive.
+
+    Bounds accept dates or datetimes. On datetime columns a bare date covers the
+    whole day, and the predicate stays a plain range on the column so it can use
+    the index instead of wrapping the column in a `DATE()` cast.
+    """
+
+    def __init__(self, param, path, is_datetime=False):
+        super().__init__(param, path)
+        self.is_datetime = is_datetime
+
+    def params(self):
+        return [f"{self.param}_after", f"{self.param}_before"]
+
+    def parse(self, param, raw, upper):
+        try:
+            value = parse_datetime(raw) if self.is_datetime else None
+            day = None if value is not None else parse_date(raw)
+        except ValueError:
+            value = day = None
+        if value is not None:
+            return ("lte" if upper else "gte"), (
+                timezone.make_aware(value) if timezone.is_naive(value) else value
+            )
+        if day is None:
+            raise self.invalid(param, "Expected an ISO 8601 date or datetime.")
+        if not self.is_datetime:
+            return ("lte" if upper else "gte"), day
+        if upper:
+            day += datetime.timedelta(days=1)
+        bound = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+        return ("lt" if upper else "gte"), bound
+
+    def apply(self, qs, query_params):
+        after_param, before_param = self.params()
+        for param, upper in ((after_param, False), (before_param, True)):
+            raw = query_params.get(param)
+            if raw:
+                lookup, value = self.parse(param, raw, upper)
+                qs = qs.filter(**{f"{self.path}__{lookup}": value})
+        return qs
+
+
+class SearchFilter(ListFilter):
+    """
+    `?q=ada love` -> every word must start a word of at least one of the
+    search documents named by `sources`.
+
+    `sources` are `(path, kind)` pairs: `path` leads from the listed row to
+    a row indexed as `kind` by `core.search` (`"pk"` for the row itself), so
+    `("customer", "customer")` on memorials matches the customer's name,
+    email and phone. Each word is looked up in the full-text index, and each
+    hop of `path` becomes an `IN` subquery on a foreign key, so the list
+    table is read through its indexes rather than scanned.
+    """
+
+    def __init__(self, sources, param="q"):
+        super().__init__(param, sources[0][0])
+        self.sources = sources
+
+    def within(self, model, path, ids):
+        name, _, rest = path.partition("__")
+        if not rest:
+            return Q(**{f"{name}__in": ids})
+        related = model._meta.get_field(name).related_model
+        return Q(**{f"{name}__in": related.objects.filter(self.within(related, rest, ids)).values("pk")})
+
+    def apply(self, qs, query_params):
+        terms = search.query_terms(query_params[self.param])
+        if not terms:
+            return qs.none()
+        for term in terms:
+            match = Q()
+            for path, kind in self.sources:
+                match |= self.within(qs.model, path, search.matching_ids(term, kind))
+            qs = qs.filter(match)
+        return qs
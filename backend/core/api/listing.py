@@ -0,0 +1,147 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.api.serializers import restrict_fields
+from core.api.streaming import chunked, serializer_chunks, streaming_json_response
+
+
+STREAM_TRUE_VALUES = {"1", "true", "yes", "json"}
+
+
+class ListResponseMixin:
+    """
+    Shared response handling for the core.api list endpoints.
+
+    Views set `keyset` and `serializer_class` and return
+    `self.list_response(request, qs)` from `get()`. The response is one of:
+
+    * a plain list (default),
+    * a keyset page when `limit`/`cursor` are passed,
+    * a streamed JSON array when `stream = True` on the view or `?stream=1`,
+      or NDJSON with `?stream=ndjson`. Streaming ignores pagination params.
+
+    When `fast_rows` is set, rows are read with `.values()` and built by the
+    matching `core.api.fastrows` builder instead of `serializer_class`.
+
+    `?fields=a,b` limits the output to those fields.
+
+    `filters` lists the whitelisted `core.api.filters` query parameters, and
+    `orderings` maps accepted `?ordering=` values to alternative keysets.
+    """
+
+    keyset = None
+    orderings = {}
+    serializer_class = None
+    fast_rows = None
+    filters = ()
+    stream = False
+    stream_chunk_size = 500
+
+    def available_fields(self):
+        if self.fast_rows is not None:
+            return self.fast_rows.field_names()
+        return list(self.serializer_class().fields)
+
+    def get_fields(self, request):
+        raw = request.query_params.get("fields")
+        if not raw:
+            return None
+        fields = [name.strip() for name in raw.split(",") if name.strip()]
+        available = self.available_fields()
+        unknown = [name for name in fields if name not in available]
+        if unknown:
+            raise ValidationError({"fields": [f"Unknown field(s): {', '.join(unknown)}."]})
+        return set(fields)
+
+    def get_stream_format(self, request):
+        value = request.query_params.get("stream", "").lower()
+        if value == "ndjson":
+            return "ndjson"
+        if value in STREAM_TRUE_VALUES or (self.stream and value not in {"0", "false", "no"}):
+            return "json"
+        return None
+
+    def get_keyset(self, request):
+        ordering = request.query_params.get("ordering")
+        if not ordering:
+            return self.keyset
+        if ordering not in self.orderings:
+            choices = ", ".join(self.orderings) or "none"
+            raise ValidationError({"ordering": [f"Unknown ordering. Choices: {choices}."]})
+        return self.orderings[ordering]
+
+    def active_filters(self, request):
+        return [f for f in self.filters if f.is_active(request.query_params)]
+
+    def prune_queryset(self, qs, fields, keyset):
+        """
+        Apply `.only()` for the requested serializer fields and drop unused joins.
+
+        Falls back to the untouched queryset whenever a field is not a plain model
+        attribute path (method fields, callables), since those may read anything.
+        """
+        if fields is None:
+            return qs
+        serializer = self.serializer_class()
+        paths = {name for name, _desc in keyset.fields}
+        for name in fields:
+            field = serializer.fields[name]
+            if field.source == "*":
+                return qs
+            paths.add("__".join(field.source_attrs))
+
+        only, relations = [], set()
+        for path in paths:
+            model = qs.model
+            parts = path.split("__")
+            for i, part in enumerate(parts):
+                try:
+                    model_field = model._meta.get_field(part)
+                except FieldDoesNotExist:
+                    return qs
+                if i < len(parts) - 1:
+                    if not model_field.is_relation:
+                        return qs
+                    relations.add("__".join(parts[: i + 1]))
+                    model = model_field.related_model
+            only.append(path)
+
+        qs = qs.prefetch_related(None).select_related(None)
+        if relations:
+            qs = qs.select_related(*sorted(relations))
+        # Foreign keys followed by select_related must not be deferred themselves.
+        return qs.only(*only, *sorted(relations))
+
+    def list_response(self, request, qs):
+        fields = self.get_fields(request)
+        keyset = self.get_keyset(request)
+        filters = self.active_filters(request)
+        rows = self.fast_rows.select(fields) if self.fast_rows is not None else None
+        for list_filter in filters:
+            qs = list_filter.apply(qs, request.query_params)
+        if rows is not None:
+            qs = rows.values(qs, extra=[name for name, _desc in keyset.fields])
+        else:
+            qs = self.prune_queryset(qs, fields, keyset)
+
+        stream_format = self.get_stream_format(request)
+        if stream_format:
+            ordered = keyset.order(qs)
+            size = self.stream_chunk_size
+            if rows is not None:
+                chunks = (rows.build_many(chunk) for chunk in chunked(ordered.iterator(chunk_size=size), size))
+            else:
+                chunks = serializer_chunks(ordered, self.serializer_class, chunk_size=size, fields=fields)
+            return streaming_json_response(chunks, ndjson=stream_format == "ndjson")
+
+        if not keyset.is_requested(request):
+            return Response(self.serialize(keyset.order(qs), rows, fields))
+
+        page = keyset.paginate(request, qs)
+        return page.response(self.serialize(page.rows, rows, fields))
+
+    def serialize(self, objs, rows, fields):
+        if rows is not None:
+            return rows.build_many(objs)
+        return restrict_fields(self.serializer_class(objs, many=True), fields).data
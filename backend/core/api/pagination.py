@@ -0,0 +1,152 @@
+import base64
+import binascii
+import json
+
+from django.db import models
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+
+class Keyset:
+    """
+    Keyset (seek) pagination over a fixed, totally ordered set of fields.
+
+    The last field must be unique (normally `id`) so every row has a distinct
+    position. Fields listed in `nulls_last` are treated as nullable and sorted
+    with NULLs at the end of the forward order.
+
+    Pagination is opt-in: it only kicks in when the request carries `limit` or
+    `cursor`, so existing callers keep receiving a plain list.
+    """
+
+    default_limit = 50
+    max_limit = 200
+
+    def __init__(self, *fields, nulls_last=()):
+        self.fields = [(f.lstrip("-"), f.startswith("-")) for f in fields]
+        self.nulls_last = set(nulls_last)
+        # Ties a cursor to the ordering it was issued for.
+        self.signature = ",".join(fields)
+
+    def ordering(self, reverse=False):
+        order = []
+        for name, desc in self.fields:
+            expr = models.F(name)
+            descending = desc != reverse
+            if name in self.nulls_last:
+                nulls = {"nulls_first": True} if reverse else {"nulls_last": True}
+                order.append(expr.desc(**nulls) if descending else expr.asc(**nulls))
+            else:
+                order.append(expr.desc() if descending else expr.asc())
+        return order
+
+    def order(self, qs):
+        return qs.order_by(*self.ordering())
+
+    def is_requested(self, request):
+        params = request.query_params
+        return "limit" in params or "cursor" in params
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except (TypeError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def seek(self, values, reverse=False):
+        """Predicate selecting rows strictly after `values` in the (possibly reversed) order."""
+        condition = None
+        for (name, desc), value in reversed(list(zip(self.fields, values))):
+            after, equal = self._compare(name, desc != reverse, value, reverse)
+            if condition is not None and equal is not None:
+                chained = equal & condition
+                condition = chained if after is None else after | chained
+            else:
+                condition = after
+        return condition if condition is not None else Q(pk__in=[])
+
+    def _compare(self, name, descending, value, reverse):
+        lookup = "lt" if descending else "gt"
+        if name not in self.nulls_last:
+            return Q(**{f"{name}__{lookup}": value}), Q(**{name: value})
+
+        if reverse:
+            # NULLs come first: nothing sorts before them, everything non-null sorts after.
+            if value is None:
+                return Q(**{f"{name}__isnull": False}), Q(**{f"{name}__isnull": True})
+            return Q(**{f"{name}__{lookup}": value}), Q(**{name: value})
+
+        if value is None:
+            return None, Q(**{f"{name}__isnull": True})
+        return (
+            Q(**{f"{name}__{lookup}": value}) | Q(**{f"{name}__isnull": True}),
+            Q(**{name: value}),
+        )
+
+    def row_values(self, row):
+        if isinstance(row, dict):
+            return [row[name] for name, _desc in self.fields]
+        values = []
+        for name, _desc in self.fields:
+            value = row
+            for part in name.split("__"):
+                value = getattr(value, part, None)
+                if value is None:
+                    break
+            values.append(value)
+        return values
+
+    def encode_cursor(self, row, direction):
+        values = [v.isoformat() if hasattr(v, "isoformat") else v for v in self.row_values(row)]
+        raw = json.dumps({"k": self.signature, "d": direction, "v": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            signature, direction, values = payload["k"], payload["d"], payload["v"]
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+            raise NotFound("Invalid cursor.")
+        if signature != self.signature or direction not in ("n", "p"):
+            raise NotFound("Invalid cursor.")
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise NotFound("Invalid cursor.")
+        return direction, values
+
+    def paginate(self, request, qs):
+        limit = self.get_limit(request)
+        token = request.query_params.get("cursor")
+        direction, values = self.decode_cursor(token) if token else ("n", None)
+        reverse = direction == "p"
+
+        if values is not None:
+            qs = qs.filter(self.seek(values, reverse=reverse))
+        rows = list(qs.order_by(*self.ordering(reverse=reverse))[: limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if reverse:
+            rows.reverse()
+
+        more_after = reverse or has_more
+        more_before = has_more if reverse else values is not None
+
+        next_cursor = prev_cursor = None
+        if rows and more_after:
+            next_cursor = self.encode_cursor(rows[-1], "n")
+        if rows and more_before:
+            prev_cursor = self.encode_cursor(rows[0], "p")
+        return KeysetPage(rows, next_cursor, prev_cursor)
+
+
+class KeysetPage:
+    def __init__(self, rows, next_cursor, prev_cursor):
+        self.rows = rows
+        self.next = next_cursor
+        self.prev = prev_cursor
+
+    def response(self, data):
+        return Response({"results": data, "next": self.next, "prev": self.prev})
+
@@ -1,6 +1,31 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from core.models import Service, ServiceAssignment, Photo, Employee, Memorial, Customer, Cemetery
+from core.ingest import FORMATS, format_for
+from core.models import (
+    Service,
+    ServiceAssignment,
+    ServiceStatusHistory,
+    Photo,
+    Employee,
+    Memorial,
+    Customer,
+    Cemetery,
+    Plot,
+    Invoice,
+    InvoiceItem,
+    Payment,
+)
+
+
+def restrict_fields(serializer, fields):
+    """Drop every field not in `fields` from a (possibly many=True) serializer."""
+    if fields is None:
+        return serializer
+    target = getattr(serializer, "child", serializer)
+    for name in list(target.fields):
+        if name not in fields:
+            target.fields.pop(name)
+    return serializer
 
 
 class ServiceSerializer(serializers.ModelSerializer):
@@ -72,7 +97,7 @@ class RecentServiceSerializer(serializers.ModelSerializer):
     memorial_name = serializers.CharField(source="memorial.customer.full_name", read_only=True)
     cemetery_name = serializers.CharField(source="memorial.plot.cemetery.name", read_only=True)
     completed_date = serializers.DateField(read_only=True)
-    amount = serializers.DecimalField(max_digits=10, decimal_places=2, source="invoices__total_amount", read_only=True)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, source="current_price", read_only=True)
 
     class Meta:
         model = Service
@@ -149,12 +174,130 @@ class SchedulingServiceSerializer(serializers.ModelSerializer):
         return assignment.employee.full_name if assignment else None
 
     def get_price(self, obj):
-        raw = getattr(obj, "price", None)
+        raw = obj.current_price
         if raw is None:
             return None
         return float(raw)
 
 
+# Memorial detail. Every nested serializer reads only what
+# `memorial_detail_queryset()` selects or prefetches, so the query count
+# stays fixed however many services, photos or invoices a memorial has.
+
+class DetailCustomerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Customer
+        fields = ["id", "full_name", "email", "phone", "address_line1", "address_line2", "city", "state", "postal_code"]
+
+
+class DetailCemeterySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Cemetery
+        fields = ["id", "name", "city", "state"]
+
+
+class DetailPlotSerializer(serializers.ModelSerializer):
+    cemetery = DetailCemeterySerializer(read_only=True)
+
+    class Meta:
+        model = Plot
+        fields = ["id", "cemetery", "section", "row", "plot_number", "gps_lat", "gps_lng", "access_notes"]
+
+
+class DetailAssignmentSerializer(serializers.ModelSerializer):
+    employee_name = serializers.CharField(source="employee.full_name", read_only=True)
+
+    class Meta:
+        model = ServiceAssignment
+        fields = ["id", "employee_id", "employee_name", "role"]
+
+
+class DetailStatusHistorySerializer(serializers.ModelSerializer):
+    changed_by_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ServiceStatusHistory
+        fields = ["id", "old_status", "new_status", "changed_by_id", "changed_by_name", "changed_at"]
+
+    def get_changed_by_name(self, obj):
+        return obj.changed_by.full_name if obj.changed_by_id else None
+
+
+class DetailInvoiceItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InvoiceItem
+        fields = ["id", "description", "quantity", "unit_price"]
+
+
+class DetailPaymentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Payment
+        fields = ["id", "provider", "status", "method", "currency", "amount", "succeeded_at"]
+
+
+class DetailInvoiceSerializer(serializers.ModelSerializer):
+    items = DetailInvoiceItemSerializer(many=True, read_only=True)
+    payments = DetailPaymentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Invoice
+        fields = ["id", "status", "issued_date", "due_date", "currency", "total_amount", "paid_at", "items", "payments"]
+
+
+class DetailServiceSerializer(serializers.ModelSerializer):
+    assignments = DetailAssignmentSerializer(many=True, read_only=True)
+    status_history = DetailStatusHistorySerializer(many=True, read_only=True)
+    invoices = DetailInvoiceSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Service
+        fields = [
+            "id",
+            "service_type",
+            "status",
+            "scheduled_start",
+            "estimated_minutes",
+            "completed_date",
+            "current_price",
+            "internal_notes",
+            "assignments",
+            "status_history",
+            "invoices",
+        ]
+
+
+class DetailPhotoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Photo
+        fields = ["id", "service_id", "photo_type", "image_url", "caption", "created_at"]
+
+
+class MemorialDetailSerializer(serializers.ModelSerializer):
+    customer = DetailCustomerSerializer(read_only=True)
+    plot = DetailPlotSerializer(read_only=True)
+    services = DetailServiceSerializer(many=True, read_only=True)
+    photos = DetailPhotoSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Memorial
+        fields = [
+            "id",
+            "material",
+            "inscription_text",
+            "condition_summary",
+            "install_date",
+            "notes",
+            "last_service_status",
+            "last_service_date",
+            "customer",
+            "plot",
+            "services",
+            "photos",
+            "created_at",
+            "updated_at",
+        ]
+
+
 class CreateSchedulingServiceSerializer(serializers.Serializer):
     memorial_id = serializers.IntegerField()
     service_type = serializers.ChoiceField(choices=Service.ServiceType.choices, required=False)
@@ -216,3 +359,16 @@ class EmployeeCreateSerializer(serializers.Serializer):
         if User.objects.filter(username=value).exists():
             raise serializers.ValidationError("Username already exists.")
         return value
+
+
+class PlotImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=FORMATS, required=False)
+    cemetery_id = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if "format" not in attrs:
+            attrs["format"] = format_for(attrs["file"].name or "")
+            if attrs["format"] is None:
+                raise serializers.ValidationError({"format": ["Cannot tell the format from the file name; give one."]})
+        return attrs
@@ -0,0 +1,62 @@
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from core.api.serializers import restrict_fields
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _row_encoder():
+    renderer = JSONRenderer
+    separators = (",", ":") if renderer.compact else (", ", ": ")
+    return renderer.encoder_class(
+        ensure_ascii=renderer.ensure_ascii,
+        allow_nan=not renderer.strict,
+        separators=separators,
+    )
+
+
+def serializer_chunks(qs, serializer_class, chunk_size=500, fields=None):
+    """Serialize `qs` row by row with a single serializer instance, one chunk at a time."""
+    child = restrict_fields(serializer_class(), fields)
+    for objs in chunked(qs.iterator(chunk_size=chunk_size), chunk_size):
+        yield [child.to_representation(obj) for obj in objs]
+
+
+def iter_json_rows(chunks, ndjson=False):
+    """
+    Yield already-serialized rows as a JSON array (or NDJSON), one flushed chunk at a time.
+
+    `chunks` is an iterable of row lists, typically produced lazily from a
+    `.iterator(chunk_size=...)` walk, so neither the model instances nor the
+    serialized list are ever held in full.
+    """
+    encode = _row_encoder().encode
+    first = True
+
+    if not ndjson:
+        yield b"["
+    for rows in chunks:
+        buffer = []
+        for row in rows:
+            text = encode(row).replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+            if ndjson:
+                buffer.append(text + "\n")
+            else:
+                buffer.append(text if first else "," + text)
+            first = False
+        if buffer:
+            yield "".join(buffer).encode()
+    if not ndjson:
+        yield b"]"
+
+
+def streaming_json_response(chunks, ndjson=False):
+    content_type = "application/x-ndjson" if ndjson else "application/json"
+    return StreamingHttpResponse(iter_json_rows(chunks, ndjson=ndjson), content_type=content_type)
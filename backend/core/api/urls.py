@@ -3,9 +3,11 @@ from .views import (
     AssignTechnicianView,
     DashboardSummaryView,
     MemorialListView,
+    MemorialDetailView,
     CustomerListView,
     CemeteryListView,
     TechnicianListView,
+    TechnicianRouteView,
     SchedulingServiceListView,
     SchedulingServiceCreateView,
     SendCustomerEmailView,
@@ -14,14 +16,30 @@ from .views import (
     EmployeeRoleListView,
     EmployeeRoleDetailView,
     EmployeeCreateView,
+    RevenueByServiceTypeReportView,
+    LifetimeValueReportView,
+    NewCustomersReportView,
+    CompletionRateReportView,
+    CustomerValueView,
+    ResponseCacheStatsView,
+    SearchView,
+    AutocompleteView,
+    PlotNearbyView,
+    PlotImportView,
+    MapClusterView,
+    SyncView,
+    ServiceEventStreamView,
+    BatchView,
 )
 
 urlpatterns = [
     path("dashboard/summary/", DashboardSummaryView.as_view(), name="dashboard-summary"),
     path("memorials/", MemorialListView.as_view(), name="memorial-list"),
+    path("memorials/<int:memorial_id>/", MemorialDetailView.as_view(), name="memorial-detail"),
     path("customers/", CustomerListView.as_view(), name="customer-list"),
     path("cemeteries/", CemeteryListView.as_view(), name="cemetery-list"),
     path("technicians/", TechnicianListView.as_view(), name="technician-list"),
+    path("technicians/<int:technician_id>/route/", TechnicianRouteView.as_view(), name="technician-route"),
     path("scheduling/services/", SchedulingServiceListView.as_view(), name="scheduling-service-list"),
     path("scheduling/services/create/", SchedulingServiceCreateView.as_view(), name="scheduling-service-create"),
     path("emails/send/", SendCustomerEmailView.as_view(), name="emails-send"),
@@ -31,4 +49,18 @@ urlpatterns = [
     path("manage/employees/create/", EmployeeCreateView.as_view(), name="manage-employees-create"),
     path("manage/employees/<int:employee_id>/", EmployeeRoleDetailView.as_view(), name="manage-employee-detail"),
     path("manager/services/<int:service_id>/assign/", AssignTechnicianView.as_view()),
+    path("reports/revenue-by-service-type/", RevenueByServiceTypeReportView.as_view(), name="report-revenue-by-service-type"),
+    path("reports/lifetime-value/", LifetimeValueReportView.as_view(), name="report-lifetime-value"),
+    path("reports/new-customers/", NewCustomersReportView.as_view(), name="report-new-customers"),
+    path("reports/completion-rate/", CompletionRateReportView.as_view(), name="report-completion-rate"),
+    path("analytics/customer-value/", CustomerValueView.as_view(), name="analytics-customer-value"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("plots/nearby/", PlotNearbyView.as_view(), name="plots-nearby"),
+    path("plots/import/", PlotImportView.as_view(), name="plots-import"),
+    path("map/clusters/", MapClusterView.as_view(), name="map-clusters"),
+    path("sync/", SyncView.as_view(), name="sync"),
+    path("events/services/", ServiceEventStreamView.as_view(), name="service-events"),
+    path("batch/", BatchView.as_view(), name="batch"),
+    path("cache/stats/", ResponseCacheStatsView.as_view(), name="response-cache-stats"),
 ]
@@ -1,24 +1,48 @@
+import io
+import json
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.authentication import BasicAuthentication
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.db import models, transaction
-from django.db.models import Q, Sum
+from django.db.models import Prefetch, Q, Sum
 from django.shortcuts import get_object_or_404
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from django.views import View
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.conf import settings
 from django.core.mail import send_mail
 from django.contrib.auth.models import User
 
-from core.models import Service, Employee, ServiceAssignment, Invoice, Memorial, Customer, Cemetery
+from core.models import (
+    Service,
+    Employee,
+    ServiceAssignment,
+    Invoice,
+    Memorial,
+    Customer,
+    Cemetery,
+    Plot,
+    DailyMetrics,
+    Payment,
+    Photo,
+    ServiceStatusHistory,
+    InvoiceItem,
+    SearchDocument,
+)
 from core.api.serializers import (
     AssignTechnicianSerializer,
-    DashboardServiceSerializer,
     RecentServiceSerializer,
     MemorialSummarySerializer,
+    MemorialDetailSerializer,
     CustomerSummarySerializer,
     CemeterySummarySerializer,
     TechnicianSerializer,
@@ -29,20 +53,47 @@ from core.api.serializers import (
     EmployeeRoleSerializer,
     EmployeeRoleUpdateSerializer,
     EmployeeCreateSerializer,
+    PlotImportSerializer,
+)
+from core.api.fastrows import (
+    CemeterySummaryRows,
+    CustomerSummaryRows,
+    DashboardServiceRows,
+    MemorialSummaryRows,
+    SchedulingServiceRows,
 )
+from core.api import batch
+from core.api.caching import CachedResponseMixin, ConditionalGetMixin, cache_stats
+from core.api.filters import BooleanFilter, ChoiceFilter, DateRangeFilter, IdFilter, SearchFilter
+from core.api.listing import ListResponseMixin
+from core.api.pagination import Keyset
+from core import analytics, autocomplete, clusters, events, ingest, rollups, routes, search, spatial, sync
 
 
 def scheduling_services_queryset():
     return (
         Service.objects.select_related("memorial__customer", "memorial__plot__cemetery")
         .prefetch_related("assignments__employee")
-        .annotate(
-            price=models.Subquery(
-                Invoice.objects.filter(service=models.OuterRef("pk"))
-                .order_by("-issued_date", "-created_at")
-                .values("total_amount")[:1]
-            )
-        )
+    )
+
+
+def memorial_detail_queryset():
+    """
+    A memorial with everything `MemorialDetailSerializer` renders, in eight
+    queries however many children it has: the memorial joined to its
+    customer, plot and cemetery, then one query per prefetched level.
+    """
+    return Memorial.objects.select_related("customer", "plot__cemetery").prefetch_related(
+        Prefetch("services", queryset=Service.objects.order_by("-created_at", "-id")),
+        Prefetch("services__assignments", queryset=ServiceAssignment.objects.select_related("employee").order_by("id")),
+        Prefetch(
+            "services__status_history",
+            queryset=ServiceStatusHistory.objects.select_related("changed_by").order_by("-changed_at", "-id"),
+        ),
+        Prefetch("services__invoices", queryset=Invoice.objects.order_by("-issued_date", "-created_at", "-id")),
+        Prefetch("services__invoices__items", queryset=InvoiceItem.objects.order_by("id")),
+        Prefetch("services__invoices__payments", queryset=Payment.objects.order_by("created_at", "id")),
+        Prefetch("photos", queryset=Photo.objects.order_by("created_at", "id")),
     )
 
 
@@ -50,11 +101,8 @@ def set_service_price(service, amount):
     if amount is None:
         return
 
-    invoice = (
-        Invoice.objects.filter(service=service)
-        .order_by("-issued_date", "-created_at")
-        .first()
-    )
+    # `current_invoice` is kept pointing at the latest invoice, so no ordered lookup is needed.
+    invoice = Invoice.objects.filter(pk=service.current_invoice_id).first() if service.current_invoice_id else None
     if invoice:
         invoice.total_amount = amount
         if not invoice.issued_date:
@@ -112,39 +160,91 @@ class AssignTechnicianView(APIView):
             plot = s.memorial.plot
             plot.gps_lat = gps_lat
             plot.gps_lng = gps_lng
-            plot.save(update_fields=["gps_lat", "gps_lng", "updated_at"])
+            plot.save(update_fields=["gps_lat", "gps_lng", "geohash", "updated_at"])
 
         payload = SchedulingServiceSerializer(
-            scheduling_services_queryset()
-            .get(id=s.id)
+            scheduling_services_queryset().get(id=s.id)
         ).data
         return Response({"ok": True, "service": payload}, status=status.HTTP_200_OK)
 
 
-class TechnicianListView(APIView):
+class TechnicianListView(CachedResponseMixin, APIView):
     permission_classes = [AllowAny]
+    cache_models = (Employee,)
 
     def get(self, request):
         techs = (
             Employee.objects.filter(role=Employee.Role.TECH, is_active=True)
             .order_by("full_name")
         )
-        return Response(TechnicianSerializer(techs, many=True).data)
+        return self.cached_response(request, lambda: Response(TechnicianSerializer(techs, many=True).data))
 
 
-class SchedulingServiceListView(APIView):
+class TechnicianRouteView(ConditionalGetMixin, APIView):
+    """
+    A technician's open services for `?date=` (default today) in the order
+    that minimizes travel between their plots (`core.routes`), with each
+    leg's distance and the total in scheduled and suggested order.
+    Services whose plot has no coordinates are listed under `unlocated`.
+    """
     permission_classes = [AllowAny]
+    cache_models = (Employee, Service, ServiceAssignment, Memorial, Plot, Customer, Cemetery)
+
+    def cache_variant(self, request):
+        # Without `?date=` the answer changes at midnight.
+        return str(self.get_day(request))
+
+    def get_day(self, request):
+        raw = request.query_params.get("date")
+        if not raw:
+            return timezone.localdate()
+        try:
+            day = parse_date(raw)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({"date": ["Expected an ISO 8601 date."]})
+        return day
+
+    def get(self, request, technician_id):
+        day = self.get_day(request)
+
+        def build():
+            tech = get_object_or_404(Employee, id=technician_id, role=Employee.Role.TECH)
+            route = routes.plan_route(tech.id, day)
+            return Response({"technician_id": tech.id, "technician_name": tech.full_name, "date": day, **route})
+
+        return self.conditional_response(request, build)
+
+
+class SchedulingServiceListView(ConditionalGetMixin, ListResponseMixin, APIView):
+    permission_classes = [AllowAny]
+    cache_models = (Service, ServiceAssignment, Employee, Memorial, Customer, Plot, Cemetery, Invoice)
+    keyset = Keyset("scheduled_start", "-created_at", "-id", nulls_last=["scheduled_start"])
+    orderings = {
+        "scheduled_start": keyset,
+        "-scheduled_start": Keyset("-scheduled_start", "created_at", "id", nulls_last=["scheduled_start"]),
+        "created_at": Keyset("created_at", "id"),
+        "-created_at": Keyset("-created_at", "-id"),
+    }
+    serializer_class = SchedulingServiceSerializer
+    fast_rows = SchedulingServiceRows()
+    filters = [
+        ChoiceFilter("status", "status", Service.Status.choices),
+        ChoiceFilter("service_type", "service_type", Service.ServiceType.choices),
+        IdFilter("cemetery_id", "memorial__plot__cemetery_id"),
+        IdFilter("customer_id", "memorial__customer_id"),
+        IdFilter("memorial_id", "memorial_id"),
+        DateRangeFilter("scheduled_start", "scheduled_start", is_datetime=True),
+        SearchFilter([("memorial__customer", "customer"), ("memorial__plot__cemetery", "cemetery"), ("pk", "service")]),
+    ]
 
     def get(self, request):
         services = (
             scheduling_services_queryset()
             .filter(status__in=[Service.Status.DRAFT, Service.Status.SCHEDULED, Service.Status.IN_PROGRESS])
-            .order_by(
-                models.F("scheduled_start").asc(nulls_last=True),
-                "-created_at",
-            )
         )
-        return Response(SchedulingServiceSerializer(services, many=True).data)
+        return self.conditional_response(request, lambda: self.list_response(request, services))
 
 
 class SchedulingServiceCreateView(APIView):
@@ -166,8 +266,7 @@ class SchedulingServiceCreateView(APIView):
         )
         set_service_price(service, initial_price)
         payload = SchedulingServiceSerializer(
-            scheduling_services_queryset()
-            .get(id=service.id)
+            scheduling_services_queryset().get(id=service.id)
         ).data
         return Response({"ok": True, "service": payload}, status=status.HTTP_201_CREATED)
 
@@ -257,34 +356,33 @@ class SendCustomerEmailView(APIView):
 
 
 @method_decorator(csrf_exempt, name="dispatch")
-class CustomerManageListCreateView(APIView):
+class CustomerManageListCreateView(ConditionalGetMixin, ListResponseMixin, APIView):
     permission_classes = [AllowAny]
     authentication_classes = [BasicAuthentication]
+    cache_models = (Customer, Memorial, Service)
+    keyset = Keyset("full_name", "id")
+    orderings = {
+        "full_name": keyset,
+        "-full_name": Keyset("-full_name", "-id"),
+        "created_at": Keyset("created_at", "id"),
+        "-created_at": Keyset("-created_at", "-id"),
+    }
+    serializer_class = CustomerSummarySerializer
+    fast_rows = CustomerSummaryRows()
+    filters = [
+        DateRangeFilter("last_contact", "last_contact"),
+        SearchFilter([("pk", "customer")]),
+    ]
 
     def get(self, request):
-        qs = (
-            Customer.objects.annotate(
-                memorials_count=models.Count("memorials", distinct=True),
-                last_contact=models.Max("memorials__services__completed_date"),
-            )
-            .order_by("full_name")
-        )
-        return Response(CustomerSummarySerializer(qs, many=True).data)
+        return self.conditional_response(request, lambda: self.list_response(request, Customer.objects.all()))
 
     def post(self, request):
         serializer = CustomerUpsertSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         customer = serializer.save()
-        customer_payload = (
-            Customer.objects.filter(id=customer.id)
-            .annotate(
-                memorials_count=models.Count("memorials", distinct=True),
-                last_contact=models.Max("memorials__services__completed_date"),
-            )
-            .first()
-        )
         return Response(
-            {"ok": True, "customer": CustomerSummarySerializer(customer_payload).data},
+            {"ok": True, "customer": CustomerSummarySerializer(customer).data},
             status=status.HTTP_201_CREATED,
         )
 
@@ -299,16 +397,8 @@ class CustomerManageDetailView(APIView):
         serializer = CustomerUpsertSerializer(customer, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         customer = serializer.save()
-        customer_payload = (
-            Customer.objects.filter(id=customer.id)
-            .annotate(
-                memorials_count=models.Count("memorials", distinct=True),
-                last_contact=models.Max("memorials__services__completed_date"),
-            )
-            .first()
-        )
         return Response(
-            {"ok": True, "customer": CustomerSummarySerializer(customer_payload).data},
+            {"ok": True, "customer": CustomerSummarySerializer(customer).data},
             status=status.HTTP_200_OK,
         )
 
@@ -319,13 +409,25 @@ class CustomerManageDetailView(APIView):
 
 
 @method_decorator(csrf_exempt, name="dispatch")
-class EmployeeRoleListView(APIView):
+class EmployeeRoleListView(ConditionalGetMixin, ListResponseMixin, APIView):
     permission_classes = [AllowAny]
     authentication_classes = [BasicAuthentication]
+    cache_models = (Employee, User)
+    keyset = Keyset("full_name", "id")
+    orderings = {
+        "full_name": keyset,
+        "-full_name": Keyset("-full_name", "-id"),
+    }
+    serializer_class = EmployeeRoleSerializer
+    filters = [
+        ChoiceFilter("role", "role", Employee.Role.choices),
+        BooleanFilter("is_active", "is_active"),
+        SearchFilter([("pk", "employee")]),
+    ]
 
     def get(self, request):
-        employees = Employee.objects.select_related("user").order_by("full_name")
-        return Response(EmployeeRoleSerializer(employees, many=True).data)
+        employees = Employee.objects.select_related("user")
+        return self.conditional_response(request, lambda: self.list_response(request, employees))
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -373,16 +475,25 @@ class EmployeeCreateView(APIView):
         return Response({"ok": True, "employee": EmployeeRoleSerializer(employee).data}, status=status.HTTP_201_CREATED)
 
 
-class DashboardSummaryView(APIView):
+class DashboardSummaryView(CachedResponseMixin, APIView):
     """
     Lightweight dashboard endpoint consumed by the static frontend.
     Uses AllowAny so the demo can load without auth; tighten in production.
     """
     permission_classes = [AllowAny]
+    upcoming_rows = DashboardServiceRows()
+    cache_models = (Service, Invoice, ServiceAssignment, Memorial, Customer, Plot, Cemetery, DailyMetrics)
+    coalesce = True
+
+    def cache_variant(self, request):
+        # The "today" figures roll over at midnight without any write.
+        return timezone.localdate().isoformat()
 
     def get(self, request):
-        now = timezone.now()
-        today = now.date()
+        return self.cached_response(request, self.summary)
+
+    def summary(self):
+        today = timezone.localdate()
 
         base_qs = (
             Service.objects.select_related(
@@ -395,36 +506,31 @@ class DashboardSummaryView(APIView):
             status__in=[Service.Status.SCHEDULED, Service.Status.IN_PROGRESS]
         )
 
-        upcoming_qs = (
+        upcoming_qs = self.upcoming_rows.values(
             active_qs
             .filter(scheduled_start__isnull=False)
-            .order_by("scheduled_start", "created_at")[:5]
-        )
-
-        completed_count = base_qs.filter(status=Service.Status.COMPLETED).count()
-        total_services = base_qs.count()
-
-        scheduled_today = active_qs.filter(
-            Q(scheduled_start__date=today) | Q(scheduled_date=today)
-        ).count()
-
-        crew_count = (
-            ServiceAssignment.objects.filter(service__in=active_qs)
-            .values("employee_id")
-            .distinct()
-            .count()
+            .order_by("scheduled_start", "created_at")
+        )[:5]
+
+        # Totals come from the per-day rollup rather than scanning services and invoices.
+        metrics = DailyMetrics.objects.aggregate(
+            total_revenue=Sum("revenue"),
+            completed_count=Sum("completed_count"),
+            total_services=Sum("total_count"),
+            active_services=Sum("active_count"),
+            scheduled_today=Sum("scheduled_count", filter=Q(day=today)),
+            crews_today=Sum("crew_count", filter=Q(day=today)),
         )
+        completed_count = metrics["completed_count"] or 0
+        total_services = metrics["total_services"] or 0
+        total_revenue = metrics["total_revenue"] or 0
 
-        total_revenue = Invoice.objects.aggregate(total=Sum("total_amount"))["total"] or 0
+        # Technicians assigned to any scheduled or in-progress service, from their counter cache.
+        crews_active = Employee.objects.filter(active_services__gt=0).count()
 
         recent_completed_qs = (
             base_qs.filter(status=Service.Status.COMPLETED)
             .order_by(models.F("completed_date").desc(nulls_last=True), "-created_at")[:5]
-            .annotate(amount=models.Subquery(
-                Invoice.objects.filter(service=models.OuterRef("pk"))
-                .order_by("-issued_date", "-created_at")
-                .values("total_amount")[:1]
-            ))
         )
 
         completion_rate = 0.0
@@ -434,68 +540,537 @@ class DashboardSummaryView(APIView):
         data = {
             "summary": {
                 "total_revenue": float(total_revenue),
-                "active_services": active_qs.count(),
-                "services_today": scheduled_today,
-                "crews_active": crew_count,
+                "active_services": metrics["active_services"] or 0,
+                "services_today": metrics["scheduled_today"] or 0,
+                "crews_active": crews_active,
+                "crews_today": metrics["crews_today"] or 0,
                 "completion_rate": completion_rate,
             },
-            "upcoming_services": DashboardServiceSerializer(upcoming_qs, many=True).data,
+            "upcoming_services": self.upcoming_rows.build_many(upcoming_qs),
             "recent_completed": RecentServiceSerializer(recent_completed_qs, many=True).data,
         }
 
         return Response(data, status=status.HTTP_200_OK)
 
 
-class MemorialListView(APIView):
+class MemorialListView(CachedResponseMixin, ListResponseMixin, APIView):
     permission_classes = [AllowAny]
+    cache_models = (Memorial, Service, Customer, Plot, Cemetery)
+    keyset = Keyset("customer__full_name", "id")
+    orderings = {
+        "customer": keyset,
+        "-customer": Keyset("-customer__full_name", "-id"),
+        "created_at": Keyset("created_at", "id"),
+        "-created_at": Keyset("-created_at", "-id"),
+    }
+    serializer_class = MemorialSummarySerializer
+    fast_rows = MemorialSummaryRows()
+    filters = [
+        ChoiceFilter("status", "last_service_status", Service.Status.choices),
+        IdFilter("cemetery_id", "plot__cemetery_id"),
+        IdFilter("customer_id", "customer_id"),
+        DateRangeFilter("completed_date", "last_service_date"),
+        SearchFilter([("customer", "customer"), ("plot__cemetery", "cemetery"), ("pk", "memorial")]),
+    ]
 
     def get(self, request):
-        qs = (
-            Memorial.objects.select_related("customer", "plot__cemetery")
-            .annotate(
-                last_service_status=models.Subquery(
-                    Service.objects.filter(memorial=models.OuterRef("pk"))
-                    .order_by("-completed_date", "-created_at")
-                    .values("status")[:1]
-                ),
-                last_service_date=models.Subquery(
-                    Service.objects.filter(memorial=models.OuterRef("pk"))
-                    .order_by("-completed_date", "-created_at")
-                    .values("completed_date")[:1]
-                ),
-            )
-            .order_by("customer__full_name")
-        )
-        return Response(MemorialSummarySerializer(qs, many=True).data)
+        qs = Memorial.objects.select_related("customer", "plot__cemetery")
+        return self.cached_response(request, lambda: self.list_response(request, qs))
+
+
+class MemorialDetailView(ConditionalGetMixin, APIView):
+    """
+    One memorial with its customer, plot and cemetery, every service (with
+    assignments, status history, invoices and their items and payments) and
+    its photos, in a fixed number of queries (`memorial_detail_queryset`).
+    """
+    permission_classes = [AllowAny]
+    cache_models = (
+        Memorial,
+        Customer,
+        Plot,
+        Cemetery,
+        Service,
+        ServiceAssignment,
+        ServiceStatusHistory,
+        Employee,
+        Invoice,
+        InvoiceItem,
+        Payment,
+        Photo,
+    )
+
+    def cache_variant(self, request):
+        return str(self.kwargs["memorial_id"])
 
+    def get(self, request, memorial_id):
+        def build():
+            memorial = get_object_or_404(memorial_detail_queryset(), id=memorial_id)
+            return Response(MemorialDetailSerializer(memorial).data)
 
-class CustomerListView(APIView):
+        return self.conditional_response(request, build)
+
+
+class CustomerListView(ConditionalGetMixin, ListResponseMixin, APIView):
     permission_classes = [AllowAny]
+    cache_models = (Customer, Memorial, Service)
+    keyset = Keyset("full_name", "id")
+    orderings = {
+        "full_name": keyset,
+        "-full_name": Keyset("-full_name", "-id"),
+        "created_at": Keyset("created_at", "id"),
+        "-created_at": Keyset("-created_at", "-id"),
+    }
+    serializer_class = CustomerSummarySerializer
+    fast_rows = CustomerSummaryRows()
+    filters = [
+        DateRangeFilter("last_contact", "last_contact"),
+        SearchFilter([("pk", "customer")]),
+    ]
 
     def get(self, request):
-        qs = (
-            Customer.objects.annotate(
-                memorials_count=models.Count("memorials", distinct=True),
-                last_contact=models.Max("memorials__services__completed_date"),
-            )
-            .order_by("full_name")
+        return self.conditional_response(request, lambda: self.list_response(request, Customer.objects.all()))
+
+
+class CemeteryListView(CachedResponseMixin, ListResponseMixin, APIView):
+    permission_classes = [AllowAny]
+    # The counter caches are refreshed from memorial, plot and service writes.
+    cache_models = (Cemetery, Plot, Memorial, Service)
+    coalesce = True
+    keyset = Keyset("name", "id")
+    orderings = {
+        "name": keyset,
+        "-name": Keyset("-name", "-id"),
+    }
+    serializer_class = CemeterySummarySerializer
+    fast_rows = CemeterySummaryRows()
+    filters = [
+        SearchFilter([("pk", "cemetery")]),
+    ]
+
+    def get(self, request):
+        return self.cached_response(request, lambda: self.list_response(request, Cemetery.objects.all()))
+
+
+class ReportView(APIView):
+    """
+    Reports computed from the monthly rollup tables in `core.rollups`, so the
+    cost does not grow with history. `?year=YYYY` narrows the report to one year.
+    """
+    permission_classes = [AllowAny]
+    report = None
+
+    def get_year(self, request):
+        raw = request.query_params.get("year")
+        if not raw:
+            return None
+        if not raw.isdigit() or not 1900 <= int(raw) <= 9999:
+            raise ValidationError({"year": ["Expected a four-digit year."]})
+        return int(raw)
+
+    def get(self, request):
+        return Response(self.report(year=self.get_year(request)), status=status.HTTP_200_OK)
+
+
+class RevenueByServiceTypeReportView(ReportView):
+    report = staticmethod(rollups.revenue_by_service_type)
+
+
+class NewCustomersReportView(ReportView):
+    report = staticmethod(rollups.new_customers_by_month)
+
+
+class CompletionRateReportView(ReportView):
+    report = staticmethod(rollups.completion_rate)
+
+
+class LifetimeValueReportView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(rollups.lifetime_value(), status=status.HTTP_200_OK)
+
+
+class CustomerValueView(APIView):
+    """
+    Lifetime value, repeat-service intervals and retention cohorts from
+    `core.analytics`. `?customer_id=1,2` adds per-customer rows for those ids.
+    """
+    permission_classes = [AllowAny]
+    max_customer_ids = 500
+
+    def get(self, request):
+        raw = request.query_params.get("customer_id", "")
+        try:
+            customer_ids = [int(part) for part in raw.split(",") if part.strip()]
+        except ValueError:
+            raise ValidationError({"customer_id": ["Expected a comma-separated list of integers."]})
+        if len(customer_ids) > self.max_customer_ids:
+            raise ValidationError({"customer_id": [f"At most {self.max_customer_ids} ids per request."]})
+
+        value = analytics.customer_value()
+        data = value.summary()
+        if customer_ids:
+            data["customers_detail"] = value.rows(customer_ids)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SearchView(ConditionalGetMixin, APIView):
+    """
+    Full-text search across customers, memorials, cemeteries, services and
+    staff (`core.search`). `?q=` is required; `?kind=customer,memorial` narrows
+    the kinds and `?limit=` caps the results. Each result carries a title,
+    a subtitle and a snippet split into `{"text", "match"}` segments.
+    """
+    permission_classes = [AllowAny]
+    cache_models = (SearchDocument, Customer, Memorial, Plot, Cemetery, Service, Employee)
+    min_query_length = 2
+    default_limit = 20
+    max_limit = 50
+
+    def get_kinds(self, request):
+        raw = request.query_params.get("kind", "")
+        kinds = [part.strip() for part in raw.split(",") if part.strip()]
+        unknown = [kind for kind in kinds if kind not in search.SEARCH_MODELS]
+        if unknown:
+            choices = ", ".join(search.SEARCH_MODELS)
+            raise ValidationError({"kind": [f"Unknown kind(s): {', '.join(unknown)}. Choices: {choices}."]})
+        return kinds
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except (TypeError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get(self, request):
+        text = request.query_params.get("q", "").strip()
+        if len("".join(search.query_terms(text))) < self.min_query_length:
+            raise ValidationError({"q": [f"Enter at least {self.min_query_length} letters or digits."]})
+        kinds = self.get_kinds(request)
+        limit = self.get_limit(request)
+        return self.conditional_response(
+            request, lambda: Response({"results": search.search(text, kinds=kinds, limit=limit)})
         )
-        return Response(CustomerSummarySerializer(qs, many=True).data)
 
 
-class CemeteryListView(APIView):
+class AutocompleteView(APIView):
+    """
+    Type-ahead for the customer, memorial, cemetery and technician pickers,
+    answered from the in-process index in `core.autocomplete`. Every word of
+    `?q=` must start a word of the name; `?kind=technician` narrows the kinds
+    and `?limit=` caps the results.
+    """
+    permission_classes = [AllowAny]
+    default_limit = 10
+    max_limit = 25
+
+    def get_kinds(self, request):
+        raw = request.query_params.get("kind", "")
+        kinds = [part.strip() for part in raw.split(",") if part.strip()]
+        unknown = [kind for kind in kinds if kind not in autocomplete.AUTOCOMPLETE_SOURCES]
+        if unknown:
+            choices = ", ".join(autocomplete.AUTOCOMPLETE_SOURCES)
+            raise ValidationError({"kind": [f"Unknown kind(s): {', '.join(unknown)}. Choices: {choices}."]})
+        return kinds
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except (TypeError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get(self, request):
+        kinds = self.get_kinds(request)
+        limit = self.get_limit(request)
+        text = request.query_params.get("q", "")
+        return Response({"results": autocomplete.autocomplete(text, kinds=kinds, limit=limit)})
+
+
+def bbox_param(request):
+    """`?bbox=south,west,north,east` in degrees; west > east crosses the antimeridian."""
+    parts = request.query_params.get("bbox", "").split(",")
+    try:
+        south, west, north, east = (float(part) for part in parts)
+    except ValueError:
+        raise ValidationError({"bbox": ["Expected south,west,north,east in degrees."]})
+    if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        raise ValidationError({"bbox": ["Expected south <= north within -90..90 and longitudes within -180..180."]})
+    return south, west, north, east
+
+
+class PlotNearbyView(ConditionalGetMixin, APIView):
+    """
+    Located plots near a point or inside a box (`core.spatial`), each with
+    its open services, for "what else is near this job".
+
+    `?lat=&lng=` (or `?plot_id=`, which also leaves that plot out) with
+    `?radius_m=` returns plots within the radius, nearest first, with
+    `distance_m`; `?bbox=south,west,north,east` returns the plots inside the
+    box by id. `?limit=` caps the results; `count` is the total match.
+    """
+    permission_classes = [AllowAny]
+    cache_models = (Plot, Cemetery, Memorial, Service)
+    default_radius_m = 500
+    max_radius_m = 50_000
+    default_limit = 100
+    max_limit = 500
+    open_statuses = [Service.Status.DRAFT, Service.Status.SCHEDULED, Service.Status.IN_PROGRESS]
+
+    def get_coordinate(self, request, name, bound):
+        raw = request.query_params.get(name)
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({name: ["Expected a number."]})
+        if not -bound <= value <= bound:
+            raise ValidationError({name: [f"Expected a value between -{bound} and {bound}."]})
+        return value
+
+    def get_radius(self, request):
+        try:
+            radius = float(request.query_params.get("radius_m", self.default_radius_m))
+        except (TypeError, ValueError):
+            raise ValidationError({"radius_m": ["Expected a number of metres."]})
+        if not 0 < radius <= self.max_radius_m:
+            raise ValidationError({"radius_m": [f"Expected a radius between 0 and {self.max_radius_m} metres."]})
+        return radius
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except (TypeError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def search(self, request, limit):
+        """`(ids, distances by id, count)` for the query parameters."""
+        params = request.query_params
+        if "bbox" in params:
+            ids, count = spatial.within(*bbox_param(request), limit)
+            return ids, {}, count
+        exclude = None
+        if "plot_id" in params:
+            if not params["plot_id"].isdigit():
+                raise ValidationError({"plot_id": ["Expected a plot id."]})
+            plot = get_object_or_404(Plot, id=int(params["plot_id"]))
+            if plot.gps_lat is None or plot.gps_lng is None:
+                raise ValidationError({"plot_id": ["This plot has no GPS coordinates."]})
+            lat, lng, exclude = float(plot.gps_lat), float(plot.gps_lng), plot.id
+        else:
+            lat, lng = self.get_coordinate(request, "lat", 90), self.get_coordinate(request, "lng", 180)
+        found, count = spatial.nearby(lat, lng, self.get_radius(request), limit, exclude=exclude)
+        return [object_id for object_id, _distance in found], dict(found), count
+
+    def get(self, request):
+        def build():
+            ids, distances, count = self.search(request, self.get_limit(request))
+            services = {}
+            open_services = (
+                Service.objects.filter(memorial__plot_id__in=ids, status__in=self.open_statuses)
+                .order_by("scheduled_start", "id")
+                .values("id", "memorial_id", "memorial__plot_id", "status", "service_type", "scheduled_start")
+            )
+            for row in open_services:
+                services.setdefault(row.pop("memorial__plot_id"), []).append(row)
+            plots = {
+                row["id"]: row
+                for row in Plot.objects.filter(id__in=ids).values(
+                    "id", "cemetery_id", "cemetery__name", "section", "row", "plot_number", "gps_lat", "gps_lng"
+                )
+            }
+            results = []
+            for object_id in ids:
+                if object_id not in plots:
+                    continue
+                row = plots[object_id]
+                row["cemetery"] = row.pop("cemetery__name")
+                row["distance_m"] = round(distances[object_id], 1) if object_id in distances else None
+                row["open_services"] = services.get(object_id, [])
+                results.append(row)
+            return Response({"count": count, "results": results})
+
+        return self.conditional_response(request, build)
+
+
+class MapClusterView(APIView):
+    """
+    Plot clusters for a map viewport (`core.clusters`):
+    `?bbox=south,west,north,east&zoom=`. Each cluster has its plot count,
+    centroid, services per status and, for a single plot, its `plot_id`.
+    Tiles are cached until a write touches them, so no ETag is needed to
+    keep pans and zooms cheap.
+    """
     permission_classes = [AllowAny]
+    max_zoom = 22
+
+    def get_zoom(self, request):
+        try:
+            zoom = int(request.query_params.get("zoom", ""))
+        except ValueError:
+            raise ValidationError({"zoom": ["Expected an integer zoom level."]})
+        if not 0 <= zoom <= self.max_zoom:
+            raise ValidationError({"zoom": [f"Expected a zoom level between 0 and {self.max_zoom}."]})
+        return zoom
 
     def get(self, request):
-        qs = (
-            Cemetery.objects.annotate(
-                memorials_count=models.Count("plots__memorials", distinct=True),
-                active_services=models.Count(
-                    "plots__memorials__services",
-                    filter=models.Q(plots__memorials__services__status__in=[Service.Status.SCHEDULED, Service.Status.IN_PROGRESS]),
-                    distinct=True,
-                ),
+        bbox = bbox_param(request)
+        zoom = self.get_zoom(request)
+        precision, found = clusters.clusters(*bbox, zoom)
+        if found is None:
+            raise ValidationError({"bbox": ["Viewport too large for this zoom level."]})
+        return Response({"zoom": zoom, "precision": precision, "clusters": found})
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class PlotImportView(APIView):
+    """
+    Create or update plots from an uploaded CSV or GeoJSON map
+    (`core.ingest`): multipart `file`, optional `format` (otherwise taken
+    from the file name) and `cemetery_id` for rows without one. Rows with
+    errors are skipped and listed in the response; the rest are imported.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = [BasicAuthentication]
+
+    def post(self, request):
+        serializer = PlotImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+
+        # Uploads past FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to disk, so this reads from a file either way.
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            result = ingest.import_plots(
+                stream,
+                serializer.validated_data["format"],
+                cemetery_id=serializer.validated_data.get("cemetery_id"),
             )
-            .order_by("name")
+        except ValueError as exc:
+            raise ValidationError({"file": [str(exc)]})
+        finally:
+            stream.detach()
+        return Response({"ok": True, **result}, status=status.HTTP_200_OK)
+
+
+class SyncView(APIView):
+    """
+    Rows changed since `?since=<cursor>` plus deletions, for clients that
+    mirror the scheduling data (see `core.sync`). Omit `since` for a full
+    snapshot, then follow `?page=<next>` until `next` is null and sync from
+    the returned cursor.
+
+    Not read-only: a sync stamps pending changes with their sequence numbers
+    first, so it must reach the primary database. Snapshot pages do not stamp.
+    """
+    permission_classes = [AllowAny]
+
+    def get_cursor(self, request):
+        raw = request.query_params.get("since")
+        if not raw:
+            return None
+        try:
+            value = int(raw)
+        except ValueError:
+            value = -1
+        if value < 0:
+            raise ValidationError({"since": ["Expected a cursor returned by a previous sync."]})
+        return value
+
+    def get(self, request):
+        page = request.query_params.get("page")
+        if page:
+            return Response(sync.snapshot_page(None, page), status=status.HTTP_200_OK)
+        return Response(sync.changes_since(self.get_cursor(request)), status=status.HTTP_200_OK)
+
+
+class ServiceEventStreamView(View):
+    """
+    Server-Sent Events feed of scheduling board changes (`core.events`), so the
+    board can drop polling. Each event carries the service's board row.
+
+    Resumes after the `Last-Event-ID` header (sent by EventSource on reconnect)
+    or `?last_event_id=`. Under ASGI the stream stays open; under WSGI it ends
+    after `wsgi_stream_seconds` and the browser reconnects, so a dev server
+    still works without pinning a worker per client.
+    """
+    wsgi_stream_seconds = 25
+
+    def get_last_event_id(self, request):
+        raw = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+        try:
+            return int(raw) if raw else None
+        except ValueError:
+            return None
+
+    async def get(self, request):
+        last_id = self.get_last_event_id(request)
+        if isinstance(request, ASGIRequest):
+            body = events.stream(last_id)
+        else:
+            body = events.stream_for(last_id, self.wsgi_stream_seconds)
+        response = StreamingHttpResponse(body, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class BatchView(View):
+    """
+    Several GET requests to core.api routes in one round trip (`core.api.batch`):
+
+        POST {"requests": [{"id": "techs", "path": "/api/technicians/"}, "/api/cemeteries/"]}
+        -> {"responses": [{"id": "techs", "path": ..., "status": 200, "body": [...], "etag": ...}, ...]}
+
+    Items are plain paths or objects with `path`, an optional `id` echoed back
+    and an optional `if_none_match` ETag. Each item gets its own status; the
+    batch fails as a whole only when the payload is malformed or has more than
+    `max_requests` items. Items still running after `time_limit` seconds come
+    back as 504 (a sync view already running is not interrupted, its result
+    is dropped). Streams and the event feed cannot be batched.
+    """
+    http_method_names = ["post", "options"]
+    max_requests = 20
+    time_limit = 10
+
+    def get_items(self, request):
+        try:
+            payload = json.loads(request.body or b"null")
+        except ValueError:
+            raise ValidationError({"requests": ["Expected a JSON body."]})
+        raw = payload.get("requests") if isinstance(payload, dict) else None
+        if not isinstance(raw, list) or not raw:
+            raise ValidationError({"requests": ["Expected a non-empty list of sub-requests."]})
+        if len(raw) > self.max_requests:
+            raise ValidationError({"requests": [f"At most {self.max_requests} sub-requests per batch."]})
+
+        items = []
+        for index, item in enumerate(raw):
+            if isinstance(item, str):
+                item = {"path": item}
+            if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+                raise ValidationError({"requests": [f"Item {index}: expected a path or an object with a path."]})
+            items.append({"id": item.get("id", index), "path": item["path"], "if_none_match": item.get("if_none_match")})
+        return items
+
+    async def post(self, request):
+        try:
+            items = self.get_items(request)
+        except ValidationError as exc:
+            return JsonResponse(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+        results = await batch.dispatch(
+            request, items, self.time_limit, excluded=(BatchView, ServiceEventStreamView)
         )
-        return Response(CemeterySummarySerializer(qs, many=True).data)
+        responses = [{"id": item["id"], "path": item["path"], **out} for item, out in zip(items, results)]
+        return JsonResponse({"responses": responses}, encoder=JSONEncoder)
+
+
+class ResponseCacheStatsView(APIView):
+    """Hit and miss counters of the cached read endpoints (`core.api.caching`)."""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(cache_stats())
@@ -0,0 +1,196 @@
+"""
+In-process prefix index for the type-ahead pickers (`GET /api/autocomplete/`).
+
+Each kind keeps the normalized words of its names (accents stripped,
+casefolded) in one sorted list, with the owning row id alongside, so a
+prefix lookup is two bisects plus a scan of the matching range. Queries
+of several words scan the range of the rarest one and check the others
+against each row's words, so "mar sm" finds "Mary Smith". Nothing here
+touches the database once an index is built.
+
+Each kind is a `core.indexes.SortedIndex`: built on its first query in
+each process and patched from core.signals once a write commits.
+
+Memory is bounded per kind: at most `MAX_TOKENS` words of up to
+`MAX_TOKEN_LEN` characters per row, and no more than `MAX_ENTRIES` rows
+(about 350 bytes each, so a full kind stays near 35 MB). A kind that
+outgrows the cap is not held in memory; its queries fall back to
+`istartswith` lookups in the database until it shrinks again.
+"""
+import re
+import sys
+import unicodedata
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.indexes import SortedIndex
+from core.models import Cemetery, Customer, Employee, Memorial, Plot
+
+
+# Kind -> (queryset factory, title path, subtitle path, tokenized paths).
+AUTOCOMPLETE_SOURCES = {
+    "customer": (lambda: Customer.objects.all(), "full_name", "email", ("full_name",)),
+    "memorial": (
+        lambda: Memorial.objects.all(),
+        "customer__full_name",
+        "plot__cemetery__name",
+        ("customer__full_name", "plot__cemetery__name"),
+    ),
+    "cemetery": (lambda: Cemetery.objects.all(), "name", "city", ("name", "city")),
+    "technician": (
+        lambda: Employee.objects.filter(role=Employee.Role.TECH, is_active=True),
+        "full_name",
+        "email",
+        ("full_name",),
+    ),
+}
+
+MAX_ENTRIES = 100_000
+MAX_TOKENS = 6
+MAX_TOKEN_LEN = 32
+MAX_QUERY_TOKENS = 4
+# Candidates examined per query; bounds the cost of one-letter prefixes.
+MAX_SCAN = 2000
+WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text):
+    """Casefolded words of `text`, with accents and punctuation removed."""
+    if not text:
+        return []
+    text = text.casefold()
+    if not text.isascii():
+        text = "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+    return WORD.findall(text)
+
+
+def words_for(values):
+    """The row's words as one string, each preceded by a space, for quick prefix checks."""
+    tokens = []
+    for value in values:
+        for token in normalize(value):
+            token = sys.intern(token[:MAX_TOKEN_LEN])
+            if token not in tokens:
+                tokens.append(token)
+    return "".join(f" {token}" for token in tokens[:MAX_TOKENS])
+
+
+class PrefixIndex(SortedIndex):
+    """Words of one kind's names; entries are `(title, subtitle, words)`."""
+
+    def __init__(self, kind):
+        super().__init__(f"autocomplete:{kind}", MAX_ENTRIES)
+        self.kind = kind
+        self.source, self.title, self.subtitle, self.tokenized = AUTOCOMPLETE_SOURCES[kind]
+
+    def queryset(self):
+        return self.source()
+
+    def rows(self, qs):
+        paths = list(dict.fromkeys([self.title, self.subtitle, *self.tokenized]))
+        title, subtitle = paths.index(self.title), paths.index(self.subtitle)
+        tokenized = [paths.index(path) for path in self.tokenized]
+        for object_id, *values in qs.values_list("id", *paths).iterator(chunk_size=2000):
+            yield object_id, (
+                values[title] or "",
+                values[subtitle] or "",
+                words_for(values[position] for position in tokenized),
+            )
+
+    def keys(self, entry):
+        return entry[2].split()
+
+    def candidates(self, terms, limit):
+        """Up to `limit` matching ids in word order, out of the first `MAX_SCAN` under the rarest prefix."""
+        # Drive the scan with the rarest prefix; the others are checked against each row's words.
+        spans = sorted((self.span(term), term) for term in terms)
+        (start, end), driver = min(spans, key=lambda item: item[0][1] - item[0][0])
+        ids = self.ids[start:min(end, start + MAX_SCAN)]
+        for term in terms:
+            if term != driver:
+                needle = f" {term}"
+                ids = [object_id for object_id in ids if needle in self.entries[object_id][2]]
+        # A row with two words under the prefix ("ann annette") shows up twice.
+        found = {}
+        for object_id in ids:
+            found[object_id] = None
+            if len(found) >= limit:
+                break
+        return list(found)
+
+    def fallback(self, terms, limit):
+        qs = self.source()
+        for term in terms:
+            match = Q()
+            for path in self.tokenized:
+                match |= Q(**{f"{path}__istartswith": term}) | Q(**{f"{path}__icontains": f" {term}"})
+            qs = qs.filter(match)
+        return list(self.rows(qs.order_by(self.title, "id")[:limit]))
+
+    def search(self, terms, limit):
+        """`[(id, title, subtitle), ...]` for rows with a word starting with each of `terms`."""
+        self.ensure_current()
+        if self.overflow:
+            matches = self.fallback(terms, limit)
+        else:
+            with self.lock:
+                matches = [(object_id, self.entries[object_id]) for object_id in self.candidates(terms, limit)]
+        return [(object_id, title, subtitle) for object_id, (title, subtitle, _words) in matches]
+
+INDEXES = {kind: PrefixIndex(kind) for kind in AUTOCOMPLETE_SOURCES}
+
+
+def autocomplete(text, kinds=None, limit=10):
+    """Rows of `kinds` (all by default) whose words start with the words of `text`."""
+    terms = [term[:MAX_TOKEN_LEN] for term in normalize(text)[:MAX_QUERY_TOKENS]]
+    if not terms:
+        return []
+    prefix = " ".join(terms)
+    results = []
+    for kind in kinds or AUTOCOMPLETE_SOURCES:
+        for object_id, title, subtitle in INDEXES[kind].search(terms, limit):
+            results.append({"kind": kind, "id": object_id, "title": title, "subtitle": subtitle})
+    # Names that start with the whole query first, then by name.
+    results.sort(key=lambda r: (not " ".join(normalize(r["title"])).startswith(prefix), r["title"].casefold()))
+    return results[:limit]
+
+
+def refresh_on_commit(kind, ids):
+    """Patch `ids` of `kind` (evaluated at commit time) into the index once the write commits."""
+    transaction.on_commit(partial(INDEXES[kind].refresh, ids))
+
+
+def object_saved(instance, created):
+    """Schedule the index updates for a saved row; see core.signals."""
+    pk = instance.pk
+    if isinstance(instance, Employee):
+        # Not a TrackedModel; role and is_active decide membership, so always re-read it.
+        refresh_on_commit("technician", [pk])
+    elif isinstance(instance, Customer):
+        if created or instance.has_changed("full_name", "email"):
+            refresh_on_commit("customer", [pk])
+        if not created and instance.has_changed("full_name"):
+            refresh_on_commit("memorial", Memorial.objects.filter(customer_id=pk).values_list("id", flat=True))
+    elif isinstance(instance, Cemetery):
+        if created or instance.has_changed("name", "city"):
+            refresh_on_commit("cemetery", [pk])
+        if not created and instance.has_changed("name"):
+            refresh_on_commit(
+                "memorial", Memorial.objects.filter(plot__cemetery_id=pk).values_list("id", flat=True)
+            )
+    elif isinstance(instance, Plot):
+        if not created and instance.has_changed("cemetery_id"):
+            refresh_on_commit("memorial", Memorial.objects.filter(plot_id=pk).values_list("id", flat=True))
+    elif isinstance(instance, Memorial):
+        if created or instance.has_changed("customer_id", "plot_id"):
+            refresh_on_commit("memorial", [pk])
+
+
+def object_deleted(instance):
+    kind = {Customer: "customer", Cemetery: "cemetery", Memorial: "memorial", Employee: "technician"}.get(
+        type(instance)
+    )
+    if kind:
+        refresh_on_commit(kind, [instance.pk])
@@ -0,0 +1,182 @@
+"""
+Map clusters of plots and their services (`GET /api/map/clusters/`).
+
+Geohash cells (core.geohash) form the hierarchy: each zoom level maps to
+a geohash precision whose cells are roughly a quarter of a map tile wide,
+and every located plot falls in one cell per precision. A cluster is one
+such cell with its plot count, the centroid of its plots and the number of
+services per status.
+
+Clusters are computed and cached in tiles: all the clusters inside one
+cell `TILE_DEPTH` levels coarser. Each tile's cache key carries a counter
+for that tile (`core.generations.counter`). A write bumps the counters
+of just the tiles containing the plots it touched, at every level, once
+the transaction commits (see core.signals), so a pan or zoom over
+unchanged areas is a cache lookup and a write elsewhere costs nothing.
+"""
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Min, Q
+from django.db.models.functions import Substr
+
+from core.generations import bump_counters, counters
+from core.geohash import RANGE_END, cell_count, cell_size, cells, split_box
+from core.models import Memorial, Plot, Service
+
+
+MAX_PRECISION = 8
+TILE_DEPTH = 2
+MAX_TILES = 64
+TILE_PREFIX = "core:map:tile:"
+TILE_TIMEOUT = 24 * 60 * 60
+# Cells about a quarter of a 256 px map tile wide.
+CELLS_PER_MAP_TILE = 4
+
+
+def precision_for_zoom(zoom):
+    """The finest geohash precision whose cells are at least a quarter map tile wide at `zoom`."""
+    width = 360.0 / (1 << zoom) / CELLS_PER_MAP_TILE
+    precision = 1
+    while precision < MAX_PRECISION and cell_size(precision + 1)[1] >= width:
+        precision += 1
+    return precision
+
+
+def tile_precision(precision):
+    return max(1, precision - TILE_DEPTH)
+
+
+def _counter_name(tile):
+    return f"map:{tile}"
+
+
+def _ranges(field, tiles):
+    match = Q()
+    for tile in tiles:
+        match |= Q(**{f"{field}__gte": tile, f"{field}__lt": tile + RANGE_END})
+    return match
+
+
+def compute_tiles(tiles, precision):
+    """`{tile: [cluster, ...]}` for the tiles, with clusters at `precision`; two queries in all."""
+    size = len(tiles[0])
+    found = {tile: {} for tile in tiles}
+    plots = (
+        Plot.objects.filter(_ranges("geohash", tiles))
+        .annotate(cell=Substr("geohash", 1, precision))
+        .values("cell")
+        .annotate(count=Count("id"), lat=Avg("gps_lat"), lng=Avg("gps_lng"), first_id=Min("id"))
+        .order_by()
+    )
+    for row in plots:
+        found[row["cell"][:size]][row["cell"]] = {
+            "cell": row["cell"],
+            "count": row["count"],
+            "lat": round(float(row["lat"]), 6),
+            "lng": round(float(row["lng"]), 6),
+            # A single plot can be drawn (and linked) as itself.
+            "plot_id": row["first_id"] if row["count"] == 1 else None,
+            "services": {},
+        }
+    services = (
+        Service.objects.filter(_ranges("memorial__plot__geohash", tiles))
+        .annotate(cell=Substr("memorial__plot__geohash", 1, precision))
+        .values("cell", "status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for row in services:
+        cluster = found[row["cell"][:size]].get(row["cell"])
+        if cluster is not None:
+            cluster["services"][row["status"]] = row["count"]
+    return {tile: sorted(by_cell.values(), key=lambda c: c["cell"]) for tile, by_cell in found.items()}
+
+
+def viewport_tiles(south, west, north, east, precision):
+    """Tile hashes covering the viewport, or None when there would be more than `MAX_TILES`."""
+    level = tile_precision(precision)
+    boxes = split_box(max(-90.0, south), west, min(90.0, north), east)
+    if sum(cell_count(*box, level) for box in boxes) > MAX_TILES:
+        return None
+    return list(dict.fromkeys(tile for box in boxes for tile in cells(*box, level)))
+
+
+def clusters(south, west, north, east, zoom):
+    """
+    `(precision, clusters)` for the viewport at `zoom`, or `(precision, None)`
+    when the viewport spans more than `MAX_TILES` tiles at that zoom.
+    """
+    precision = precision_for_zoom(zoom)
+    tiles = viewport_tiles(south, west, north, east, precision)
+    if tiles is None:
+        return precision, None
+
+    versions = counters([_counter_name(tile) for tile in tiles])
+    keys = {tile: f"{TILE_PREFIX}{tile}:{precision}:{versions[_counter_name(tile)]}" for tile in tiles}
+    cached = cache.get_many(list(keys.values()))
+    tile_clusters = {tile: cached[key] for tile, key in keys.items() if key in cached}
+    missing = [tile for tile in tiles if tile not in tile_clusters]
+    if missing:
+        computed = compute_tiles(missing, precision)
+        cache.set_many({keys[tile]: computed[tile] for tile in missing}, timeout=TILE_TIMEOUT)
+        tile_clusters.update(computed)
+
+    boxes = split_box(south, west, north, east)
+    return precision, [
+        cluster
+        for tile in tiles
+        for cluster in tile_clusters[tile]
+        if any(b_south <= cluster["lat"] <= b_north and b_west <= cluster["lng"] <= b_east
+               for b_south, b_west, b_north, b_east in boxes)
+    ]
+
+
+def touched_geohashes(geohashes=(), plot_ids=(), memorial_ids=()):
+    """The given cells plus those of the given plots and of the memorials' plots."""
+    geohashes = set(geohashes)
+    if plot_ids or memorial_ids:
+        located = Plot.objects.filter(Q(id__in=plot_ids) | Q(memorials__id__in=memorial_ids))
+        geohashes.update(located.values_list("geohash", flat=True))
+    return geohashes - {None, ""}
+
+
+def tile_cells(plots):
+    """Distinct cells of the finest tiles holding the plots of the queryset `plots`, for `invalidate()`."""
+    level = tile_precision(MAX_PRECISION)
+    cells = plots.exclude(geohash="").annotate(cell=Substr("geohash", 1, level))
+    return set(cells.values_list("cell", flat=True).order_by().distinct())
+
+
+def invalidate(geohashes):
+    """Bump the counter of every tile, at every level, holding one of the cells `geohashes`."""
+    tiles = {geohash[:level] for geohash in geohashes for level in range(1, tile_precision(MAX_PRECISION) + 1)}
+    bump_counters([_counter_name(tile) for tile in tiles])
+
+
+def invalidate_on_commit(**touched):
+    # Resolved now: a deleted service's memorial may be gone by commit time.
+    geohashes = touched_geohashes(**touched)
+    if geohashes:
+        transaction.on_commit(partial(invalidate, geohashes))
+
+
+def object_saved(instance, created):
+    """Schedule the tile invalidation for a saved plot, memorial or service; see core.signals."""
+    if isinstance(instance, Plot):
+        if created or instance.has_changed("gps_lat", "gps_lng"):
+            invalidate_on_commit(geohashes={instance.geohash, instance.loaded_value("geohash")})
+    elif isinstance(instance, Memorial):
+        if not created and instance.has_changed("plot_id"):
+            invalidate_on_commit(plot_ids={instance.plot_id, instance.loaded_value("plot_id")})
+    elif isinstance(instance, Service):
+        if created or instance.has_changed("status", "memorial_id"):
+            invalidate_on_commit(memorial_ids={instance.memorial_id, instance.loaded_value("memorial_id")})
+
+
+def object_deleted(instance):
+    if isinstance(instance, Plot):
+        invalidate_on_commit(geohashes={instance.geohash})
+    elif isinstance(instance, Service):
+        invalidate_on_commit(memorial_ids={instance.memorial_id})
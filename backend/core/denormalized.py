@@ -0,0 +1,265 @@
+"""
+Denormalized columns kept in step with the rows they summarize.
+
+Each `refresh_*` function recomputes the stored values for a few rows and is
+called from `core.signals` after writes; each `rebuild_*` function recounts
+every row set-based, rewrites the rows whose stored values differ, and backs
+the matching management command. Writes made through `QuerySet.update()` or
+`bulk_create()` skip the signals, so run the rebuild commands after bulk
+imports. Like the refreshes, the rebuilds stamp `updated_at` on the rows they
+rewrite and log them for delta sync (`core.sync`); they also bump the
+generation of the model they rewrite (`core.generations`).
+"""
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.generations import bump_generation
+from core.models import Cemetery, Customer, Employee, Invoice, Memorial, Plot, Service, ServiceAssignment
+from core.sync import record_changes
+
+
+LATEST_SERVICE_ORDER = ("-completed_date", "-created_at", "-id")
+CURRENT_INVOICE_ORDER = ("-issued_date", "-created_at", "-id")
+ACTIVE_SERVICE_STATUSES = (Service.Status.SCHEDULED, Service.Status.IN_PROGRESS)
+# Rows rewritten per UPDATE by the rebuilds.
+REBUILD_BATCH_SIZE = 1000
+
+
+def latest_services(memorial_ref):
+    return Service.objects.filter(memorial=memorial_ref).order_by(*LATEST_SERVICE_ORDER)
+
+
+def refresh_last_service(memorial_ids):
+    """
+    Recompute `Memorial.last_service*` for the given memorials.
+
+    The memorial row is locked before reading its services, so concurrent
+    writers to the same memorial apply their refreshes one after another and
+    the last one to commit always sees every committed service.
+    """
+    for memorial_id in sorted({mid for mid in memorial_ids if mid}):
+        with transaction.atomic():
+            current = (
+                Memorial.objects.select_for_update()
+                .filter(pk=memorial_id)
+                .values_list("last_service_id", "last_service_status", "last_service_date")
+                .first()
+            )
+            if current is None:
+                continue
+            latest = latest_services(memorial_id).values_list("id", "status", "completed_date").first()
+            latest = latest or (None, None, None)
+            if tuple(current) == tuple(latest):
+                continue
+            Memorial.objects.filter(pk=memorial_id).update(
+                last_service_id=latest[0],
+                last_service_status=latest[1],
+                last_service_date=latest[2],
+                updated_at=timezone.now(),
+            )
+            record_changes(Memorial, [memorial_id])
+
+
+def rebuild_last_service():
+    """Recompute `Memorial.last_service*` for every memorial; returns the number of rows updated."""
+    latest = latest_services(models.OuterRef("pk"))
+    fresh = {
+        "last_service_id": models.Subquery(latest.values("id")[:1]),
+        "last_service_status": models.Subquery(latest.values("status")[:1]),
+        "last_service_date": models.Subquery(latest.values("completed_date")[:1]),
+    }
+    return rewrite(Memorial, fresh, drifted_rows(Memorial, fresh))
+
+
+def current_invoices(service_ref):
+    return Invoice.objects.filter(service=service_ref).order_by(*CURRENT_INVOICE_ORDER)
+
+
+def _still_current(invoice, service_id, current_invoice_id, created):
+    """
+    True when `invoice` is known to be the current invoice of `service_id`
+    without rescanning: the first invoice of a service without one, or an
+    edit to the current invoice that left its sort keys alone.
+    """
+    if invoice.service_id != service_id:
+        return False
+    if created:
+        return current_invoice_id is None
+    return (
+        invoice.pk == current_invoice_id
+        and invoice.loaded_value("service_id") == service_id
+        and invoice.loaded_value("issued_date") == invoice.issued_date
+    )
+
+
+def refresh_current_price(service_ids, invoice=None, created=False):
+    """
+    Recompute `Service.current_invoice`/`current_price` for the given services.
+
+    `invoice` is the row that was just written, if any; common writes (a first
+    invoice, a price edit) are resolved from it directly and only the rest
+    fall back to the ordered scan over the service's invoices. Like
+    `refresh_last_service`, the service row is locked for the duration.
+    """
+    for service_id in sorted({sid for sid in service_ids if sid}):
+        with transaction.atomic():
+            current = (
+                Service.objects.select_for_update()
+                .filter(pk=service_id)
+                .values_list("current_invoice_id", "current_price")
+                .first()
+            )
+            if current is None:
+                continue
+            if invoice is not None and _still_current(invoice, service_id, current[0], created):
+                latest = (invoice.pk, invoice.total_amount)
+            else:
+                latest = current_invoices(service_id).values_list("id", "total_amount").first()
+                latest = latest or (None, None)
+            if tuple(current) == tuple(latest):
+                continue
+            Service.objects.filter(pk=service_id).update(
+                current_invoice_id=latest[0],
+                current_price=latest[1],
+                updated_at=timezone.now(),
+            )
+            record_changes(Service, [service_id])
+
+
+def rebuild_current_price():
+    """Recompute `Service.current_invoice`/`current_price` for every service; returns the number of rows updated."""
+    current = current_invoices(models.OuterRef("pk"))
+    fresh = {
+        "current_invoice_id": models.Subquery(current.values("id")[:1]),
+        "current_price": models.Subquery(current.values("total_amount")[:1]),
+    }
+    return rewrite(Service, fresh, drifted_rows(Service, fresh))
+
+
+def _grouped(qs, group, aggregate):
+    """Scalar subquery computing `aggregate` over `qs` (already filtered to one group)."""
+    return models.Subquery(qs.order_by().values(group).annotate(value=aggregate).values("value")[:1])
+
+
+def customer_counters(customer_ref):
+    memorials = Memorial.objects.filter(customer=customer_ref)
+    services = Service.objects.filter(memorial__customer=customer_ref)
+    return {
+        "memorials_count": Coalesce(_grouped(memorials, "customer", models.Count("pk")), 0),
+        "last_contact": _grouped(services, "memorial__customer", models.Max("completed_date")),
+    }
+
+
+def cemetery_counters(cemetery_ref):
+    memorials = Memorial.objects.filter(plot__cemetery=cemetery_ref)
+    services = Service.objects.filter(memorial__plot__cemetery=cemetery_ref, status__in=ACTIVE_SERVICE_STATUSES)
+    return {
+        "memorials_count": Coalesce(_grouped(memorials, "plot__cemetery", models.Count("pk")), 0),
+        "active_services": Coalesce(_grouped(services, "memorial__plot__cemetery", models.Count("pk")), 0),
+    }
+
+
+def employee_counters(employee_ref):
+    assignments = ServiceAssignment.objects.filter(employee=employee_ref, service__status__in=ACTIVE_SERVICE_STATUSES)
+    return {
+        "active_services": Coalesce(_grouped(assignments, "employee", models.Count("pk")), 0),
+    }
+
+
+COUNTER_CACHES = {
+    Customer: customer_counters,
+    Cemetery: cemetery_counters,
+    Employee: employee_counters,
+}
+
+
+def refresh_counters(model, ids):
+    """
+    Recompute the counter caches of the given `Customer`, `Cemetery` or `Employee` rows.
+
+    Counters are recomputed from the source tables rather than incremented,
+    so a refresh also repairs earlier drift; the row lock serializes
+    concurrent writers as in `refresh_last_service`.
+    """
+    counters = COUNTER_CACHES[model]
+    names = list(counters_for(model))
+    for pk in sorted({pk for pk in ids if pk}):
+        with transaction.atomic():
+            current = model.objects.select_for_update().filter(pk=pk).values_list(*names).first()
+            if current is None:
+                continue
+            fresh = model.objects.filter(pk=pk).values_list(*counters(pk).values()).first()
+            if tuple(current) == tuple(fresh):
+                continue
+            model.objects.filter(pk=pk).update(**dict(zip(names, fresh)), updated_at=timezone.now())
+            record_changes(model, [pk])
+
+
+def refresh_memorial_counters(memorial_ids):
+    """Refresh the customers and cemeteries that the given memorials count towards."""
+    memorial_ids = {mid for mid in memorial_ids if mid}
+    if not memorial_ids:
+        return
+    owners = Memorial.objects.filter(pk__in=memorial_ids).values_list("customer_id", "plot__cemetery_id")
+    customer_ids, cemetery_ids = zip(*owners) if owners else ((), ())
+    refresh_counters(Customer, customer_ids)
+    refresh_counters(Cemetery, cemetery_ids)
+
+
+def service_employees(service_ids):
+    return ServiceAssignment.objects.filter(service_id__in=[pk for pk in service_ids if pk]).values_list(
+        "employee_id", flat=True
+    )
+
+
+def plot_cemeteries(plot_ids):
+    return Plot.objects.filter(pk__in=[pk for pk in plot_ids if pk]).values_list("cemetery_id", flat=True)
+
+
+def counters_for(model):
+    return COUNTER_CACHES[model](models.OuterRef("pk"))
+
+
+def drifted_rows(model, fresh):
+    """
+    Rows of `model` whose stored columns differ from the `fresh` expressions
+    (`{column: expression}`), annotated with `fresh_<column>`. NULLs compare
+    equal to each other and unequal to everything else.
+    """
+    drifted = models.Q()
+    for name in fresh:
+        recount = f"fresh_{name}"
+        drifted |= (
+            models.Q(**{f"{name}__isnull": True, f"{recount}__isnull": False})
+            | models.Q(**{f"{name}__isnull": False, f"{recount}__isnull": True})
+            | models.Q(**{f"{name}__lt": models.F(recount)})
+            | models.Q(**{f"{name}__gt": models.F(recount)})
+        )
+    return model.objects.annotate(**{f"fresh_{name}": expr for name, expr in fresh.items()}).filter(drifted)
+
+
+def rewrite(model, fresh, qs):
+    """
+    Set the `fresh` expressions on the rows of `qs`, a batch of ids at a time,
+    stamping `updated_at` and logging each row for sync; returns the number of rows.
+    """
+    ids = list(qs.order_by("pk").values_list("pk", flat=True))
+    now = timezone.now()
+    for start in range(0, len(ids), REBUILD_BATCH_SIZE):
+        batch = ids[start:start + REBUILD_BATCH_SIZE]
+        model.objects.filter(pk__in=batch).update(**fresh, updated_at=now)
+        record_changes(model, batch)
+    bump_generation(model)
+    return len(ids)
+
+
+def counter_drift(model):
+    """Rows of `model` whose stored counters differ from a fresh recount, annotated with `fresh_<name>`."""
+    return drifted_rows(model, counters_for(model))
+
+
+def rebuild_counters(model, only_drifted=True):
+    """Recompute the counter caches of `model` set-based; returns the number of rows updated."""
+    qs = counter_drift(model) if only_drifted else model.objects.all()
+    return rewrite(model, counters_for(model), qs)
@@ -0,0 +1,169 @@
+"""
+Scheduling board events for the SSE stream at `GET /api/events/services/`.
+
+core.signals calls `publish()` on service and assignment writes. The event is
+stored once the transaction commits, so listeners never see a change that
+rolled back, and it carries the service's scheduling board row (as
+`SchedulingServiceListView` renders it) so clients apply it without
+refetching.
+
+Events live in the `ServiceEvent` table, shared by every worker; only the
+latest `EVENT_BUFFER_SIZE` are kept for `Last-Event-ID` replay, and a client
+resuming from before that gets a `reset` event and reloads the board.
+Streams poll the table by id every `POLL_INTERVAL` seconds.
+
+Ids come from the table's sequence at insert time, so two workers storing
+events at the same instant can commit them out of order: a stream may see
+id 8 before id 7 exists. Each stream (`EventCursor`) therefore keeps
+watching the ids it skipped for `GAP_TIMEOUT` seconds, and on resume the
+`RESCAN_WINDOW` ids before `Last-Event-ID`. An event found late is sent
+without an id, so the client's `Last-Event-ID` does not move back, and with
+the service's current board row, so it cannot undo a newer event.
+"""
+import asyncio
+import json
+import time
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Q
+
+from core.api.fastrows import SchedulingServiceRows
+from core.models import Service, ServiceEvent
+
+
+EVENT_BUFFER_SIZE = 1000
+PRUNE_EVERY = 100
+POLL_INTERVAL = 0.5
+HEARTBEAT_INTERVAL = 15
+RETRY_MS = 3000
+# How long a skipped id is watched for, and how far behind Last-Event-ID a resumed stream looks.
+GAP_TIMEOUT = 10
+RESCAN_WINDOW = 50
+
+board_rows = SchedulingServiceRows()
+
+
+def publish(kind, service_id):
+    """Record `kind` for `service_id` once the current transaction commits."""
+    if service_id is not None:
+        transaction.on_commit(partial(_store, kind, service_id))
+
+
+def board_row(service_id):
+    rows = board_rows.build_many(board_rows.values(Service.objects.filter(pk=service_id)))
+    return rows[0] if rows else None
+
+
+def _store(kind, service_id):
+    event = ServiceEvent.objects.create(kind=kind, service_id=service_id, payload={"service": board_row(service_id)})
+    if event.id % PRUNE_EVERY == 0:
+        ServiceEvent.objects.filter(id__lte=event.id - EVENT_BUFFER_SIZE).delete()
+
+
+def latest_id():
+    return ServiceEvent.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def frame(event_id, kind, data):
+    event_id = "" if event_id is None else f"id: {event_id}\n"
+    return f"{event_id}event: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class EventCursor:
+    """
+    Position of one stream: the highest event id sent, plus the lower ids not
+    seen yet (`gaps`, id -> monotonic deadline) in case they commit late.
+    """
+
+    def __init__(self, last_id):
+        self.last_id = last_id
+        self.gaps = {}
+
+    def watch(self, ids):
+        deadline = time.monotonic() + GAP_TIMEOUT
+        for event_id in ids:
+            self.gaps.setdefault(event_id, deadline)
+
+    def late_frame(self, kind, service_id):
+        return frame(None, kind, {"service_id": service_id, "service": board_row(service_id)})
+
+    def replay(self):
+        """SSE frames to start the stream with (None: start from now)."""
+        if self.last_id is None:
+            self.last_id = latest_id()
+            return []
+        frames = []
+        oldest = ServiceEvent.objects.order_by("id").values_list("id", flat=True).first()
+        if oldest is not None and self.last_id < oldest - 1:
+            # Events after last_id were pruned; the client has to reload.
+            frames.append(frame(latest_id(), "reset", {}))
+            self.last_id = oldest - 1
+        else:
+            # Recent events just behind last_id may have committed after the client saw it.
+            window = range(max(self.last_id - RESCAN_WINDOW, 0) + 1, self.last_id + 1)
+            recent = time.time() - GAP_TIMEOUT
+            found = set()
+            for event_id, kind, service_id, created_at in ServiceEvent.objects.filter(
+                id__in=window
+            ).values_list("id", "kind", "service_id", "created_at"):
+                found.add(event_id)
+                if created_at.timestamp() >= recent:
+                    frames.append(self.late_frame(kind, service_id))
+            self.watch(event_id for event_id in window if event_id not in found)
+        return frames + self.poll()
+
+    def poll(self):
+        """SSE frames for the events stored since the last poll, including skipped ids that turned up."""
+        now = time.monotonic()
+        self.gaps = {event_id: deadline for event_id, deadline in self.gaps.items() if deadline > now}
+        match = Q(id__gt=self.last_id)
+        if self.gaps:
+            match |= Q(id__in=list(self.gaps))
+        frames = []
+        for event_id, kind, service_id, payload in (
+            ServiceEvent.objects.filter(match).order_by("id").values_list("id", "kind", "service_id", "payload")
+        ):
+            if event_id > self.last_id:
+                self.watch(range(self.last_id + 1, event_id))
+                self.last_id = event_id
+                frames.append(frame(event_id, kind, {"service_id": service_id, **payload}))
+            elif self.gaps.pop(event_id, None) is not None:
+                frames.append(self.late_frame(kind, service_id))
+        return frames
+
+
+async def stream(last_id):
+    """Endless SSE stream for ASGI: replay, then push new events as they are stored."""
+    yield f"retry: {RETRY_MS}\n\n"
+    cursor = EventCursor(last_id)
+    frames = await sync_to_async(cursor.replay)()
+    quiet_since = time.monotonic()
+    while True:
+        for chunk in frames:
+            yield chunk
+        if frames:
+            quiet_since = time.monotonic()
+        elif time.monotonic() - quiet_since >= HEARTBEAT_INTERVAL:
+            yield ": keepalive\n\n"
+            quiet_since = time.monotonic()
+        await asyncio.sleep(POLL_INTERVAL)
+        frames = await sync_to_async(cursor.poll)()
+
+
+def stream_for(last_id, seconds):
+    """
+    Bounded variant for WSGI servers, which would tie up a worker per open
+    stream: ends after `seconds`, and EventSource reconnects with Last-Event-ID.
+    """
+    yield f"retry: {RETRY_MS}\n\n"
+    cursor = EventCursor(last_id)
+    frames = cursor.replay()
+    deadline = time.monotonic() + seconds
+    while True:
+        yield from frames
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(POLL_INTERVAL)
+        frames = cursor.poll()
@@ -0,0 +1,132 @@
+"""
+Per-table generation counters for cache invalidation.
+
+Every save or delete of a `core` (or `auth`) model bumps that model's
+generation (see `core.signals`). Anything derived from a set of tables can then be cached
+under a key built from their current generations: once any of the tables
+changes the key changes with it, and the stale entry simply ages out.
+
+Counters are `Generation` rows, so all workers share them even when each
+keeps its own cache (the default LocMemCache): a write in one worker moves
+every worker onto new keys. A missing counter starts from the current time
+in nanoseconds rather than 1, so a table that was emptied can never bring
+a counter back to a value an older entry was keyed on.
+
+Generations are bumped once the writing transaction commits, with an
+atomic increment in autocommit, so writers never hold a counter's row lock
+across their transaction. A request that reads the old generation between
+the commit and the bump may cache the new rows under it, which is harmless:
+the bump moves everyone past that key.
+
+Each bump also records the wall-clock time of the write, which serves as
+the `Last-Modified` of anything derived from the table.
+"""
+import time
+
+from django.db import transaction
+from django.db.models import F
+
+from core.models import Generation
+
+
+KEY_PREFIX = "core:generation:"
+COUNTER_PREFIX = "core:counter:"
+
+
+def _key(model):
+    return f"{KEY_PREFIX}{model._meta.label_lower}"
+
+
+def _create(names):
+    now = time.time()
+    Generation.objects.bulk_create(
+        [Generation(name=name, value=time.time_ns(), modified=now) for name in names], ignore_conflicts=True
+    )
+
+
+def _rows(names):
+    """`{name: (value, modified)}` for `names`, creating the missing counters."""
+    names = list(dict.fromkeys(names))
+    found = {
+        name: (value, modified)
+        for name, value, modified in Generation.objects.filter(name__in=names).values_list("name", "value", "modified")
+    }
+    missing = [name for name in names if name not in found]
+    if missing:
+        _create(missing)
+        found.update(
+            (name, (value, modified))
+            for name, value, modified in Generation.objects.filter(name__in=missing).values_list("name", "value", "modified")
+        )
+    return found
+
+
+def _increment(names):
+    """Bump `names` in one UPDATE; returns the names that did not exist yet (and were created)."""
+    updated = Generation.objects.filter(name__in=names).update(value=F("value") + 1, modified=time.time())
+    if updated == len(names):
+        return []
+    existing = set(Generation.objects.filter(name__in=names).values_list("name", flat=True))
+    missing = [name for name in names if name not in existing]
+    _create(missing)
+    return missing
+
+
+def generation(model):
+    return _rows([_key(model)])[_key(model)][0]
+
+
+def bump_generation(model):
+    """Bump `model`'s generation once the current transaction commits (at once outside one)."""
+    transaction.on_commit(lambda: _increment([_key(model)]))
+
+
+def versions(*models):
+    """`(generations_key(*models), last_modified(*models))`, read together in one query."""
+    found = _rows(_key(model) for model in models)
+    key = ":".join(str(found[name][0]) for name in sorted(found))
+    return key, max(modified for _value, modified in found.values())
+
+
+def generations_key(*models):
+    """Cache key fragment that changes whenever any of `models` is written."""
+    return versions(*models)[0]
+
+
+def last_modified(*models):
+    """Unix time of the latest write to any of `models`."""
+    return versions(*models)[1]
+
+
+def counter(name):
+    """
+    Current value of the shared counter `name`, for state that tracks its
+    own writes rather than whole tables: the in-process indexes
+    (core.indexes) and the map tiles (core.clusters). Starts from the time
+    in nanoseconds, like generations.
+    """
+    return counters([name])[name]
+
+
+def counters(names):
+    """`{name: value}` of several shared counters in one query."""
+    keys = {f"{COUNTER_PREFIX}{name}": name for name in names}
+    return {keys[key]: value for key, (value, _modified) in _rows(keys).items()}
+
+
+def bump_counter(name):
+    """
+    Increment `name` now (callers run after their write commits); returns the
+    new value, or None if the counter did not exist and was started.
+    """
+    key = f"{COUNTER_PREFIX}{name}"
+    with transaction.atomic():
+        if _increment([key]):
+            return None
+        return Generation.objects.filter(name=key).values_list("value", flat=True).get()
+
+
+def bump_counters(names):
+    """Increment several counters in one UPDATE."""
+    if names:
+        _increment([f"{COUNTER_PREFIX}{name}" for name in dict.fromkeys(names)])
@@ -0,0 +1,127 @@
+"""
+Geohash cells for `Plot` coordinates.
+
+A geohash interleaves the bits of the longitude and latitude cell indexes
+(longitude first) and spells them in base 32, five bits per character, so
+every prefix of a hash names the enclosing, coarser cell. Plots store their
+hash at `PRECISION` characters (cells of about 5 m); a bounding box is
+covered by a handful of coarser cells, each of which is one range scan
+(`prefix <= geohash < prefix + "~"`) on the indexed column.
+
+Pure functions only, so models can use them without importing core.spatial.
+"""
+import math
+
+
+ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Sorts after every character of the alphabet, closing a prefix range.
+RANGE_END = "~"
+PRECISION = 9
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def _bits(precision):
+    """(latitude bits, longitude bits) of a hash of `precision` characters."""
+    total = precision * 5
+    return total // 2, total - total // 2
+
+
+def cell_size(precision):
+    """(height, width) in degrees of the cells at `precision`."""
+    lat_bits, lng_bits = _bits(precision)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def cell_index(lat, lng, precision):
+    """(row, column) of the cell at `precision` holding the point."""
+    lat_bits, lng_bits = _bits(precision)
+    row = min(int((lat + 90.0) / 180.0 * (1 << lat_bits)), (1 << lat_bits) - 1)
+    column = min(int((lng + 180.0) / 360.0 * (1 << lng_bits)), (1 << lng_bits) - 1)
+    return max(row, 0), max(column, 0)
+
+
+def cell_hash(row, column, precision):
+    lat_bits, lng_bits = _bits(precision)
+    value = 0
+    for bit in range(precision * 5):
+        # Even bits (from the most significant) come from the longitude.
+        if bit % 2 == 0:
+            lng_bits -= 1
+            value = (value << 1) | ((column >> lng_bits) & 1)
+        else:
+            lat_bits -= 1
+            value = (value << 1) | ((row >> lat_bits) & 1)
+    return "".join(ALPHABET[(value >> shift) & 31] for shift in range(precision * 5 - 5, -1, -5))
+
+
+def encode(lat, lng, precision=PRECISION):
+    return cell_hash(*cell_index(float(lat), float(lng), precision), precision)
+
+
+def point_hash(lat, lng):
+    """The stored hash of a point, or "" when either coordinate is missing."""
+    if lat is None or lng is None:
+        return ""
+    return encode(lat, lng)
+
+
+def cells(south, west, north, east, precision):
+    """Hashes of the cells at `precision` covering the box, row by row from the south-west."""
+    low_row, low_column = cell_index(south, west, precision)
+    high_row, high_column = cell_index(north, east, precision)
+    return [
+        cell_hash(row, column, precision)
+        for row in range(low_row, high_row + 1)
+        for column in range(low_column, high_column + 1)
+    ]
+
+
+def cell_count(south, west, north, east, precision):
+    low_row, low_column = cell_index(south, west, precision)
+    high_row, high_column = cell_index(north, east, precision)
+    return (high_row - low_row + 1) * (high_column - low_column + 1)
+
+
+def covering(south, west, north, east, max_cells=16):
+    """
+    Hashes of the cells covering the box, at the finest precision that needs
+    no more than `max_cells` of them. Boxes crossing the antimeridian are
+    not split; pass each side separately.
+    """
+    south, north = max(-90.0, south), min(90.0, north)
+    west, east = max(-180.0, west), min(180.0, east)
+    for precision in range(PRECISION, 0, -1):
+        if cell_count(south, west, north, east, precision) <= max_cells:
+            return cells(south, west, north, east, precision)
+    return [""]
+
+
+def split_box(south, west, north, east):
+    """
+    The box as one or two boxes within -180..180: longitudes past the
+    antimeridian, or west > east, wrap around.
+    """
+    if east - west >= 360.0:
+        return [(south, -180.0, north, 180.0)]
+    if west < -180.0:
+        return [(south, west + 360.0, north, 180.0), (south, -180.0, north, east)]
+    if east > 180.0:
+        return [(south, west, north, 180.0), (south, -180.0, north, east - 360.0)]
+    if west > east:
+        return [(south, west, north, 180.0), (south, -180.0, north, east)]
+    return [(south, west, north, east)]
+
+
+def radius_box(lat, lng, radius_m):
+    """(south, west, north, east) of a box that contains the circle."""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    cos_lat = math.cos(math.radians(lat))
+    dlng = 180.0 if cos_lat < 1e-9 else min(180.0, dlat / cos_lat)
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlambda = phi2 - phi1, math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
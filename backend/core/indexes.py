@@ -0,0 +1,167 @@
+"""
+Base for the in-process lookup indexes (core.autocomplete, core.spatial).
+
+An index holds, per row of its source queryset, an entry and one or more
+string keys. Keys live in one sorted list with the owning row ids in a
+parallel array, so all rows under a key prefix form one contiguous range,
+found with two bisects; entries live in a dict by id.
+
+Indexes are built on first use in each process. Writes reach them through
+core.signals: once the transaction commits, `refresh()` re-reads the
+affected rows and patches them in, and bumps a shared counter
+(`core.generations.counter`, kept in the database). Every other worker
+compares that counter at most once per `CHECK_INTERVAL` seconds and
+rebuilds when it moved, so a write shows up everywhere within about a
+second.
+
+A source with more than `max_entries` rows is not held in memory at all:
+the index reports `overflow` and callers fall back to the database.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from core.generations import bump_counter, counter
+
+
+CHECK_INTERVAL = 1.0
+# Sorts after every character a key can hold, closing a prefix range.
+LAST_CHAR = chr(0x10FFFF)
+
+
+class SortedIndex:
+    """Subclasses implement `queryset()`, `rows(qs)` and `keys(entry)`."""
+
+    def __init__(self, counter_name, max_entries):
+        self.counter_name = counter_name
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        self.sorted_keys = []
+        self.ids = array("q")
+        self.entries = {}
+        self.built = False
+        self.overflow = False
+        self.stale = False
+        self.version = None
+        self.checked_at = 0.0
+        self.changes = 0
+
+    def queryset(self):
+        raise NotImplementedError
+
+    def rows(self, qs):
+        """`(id, entry)` for each row of `qs`."""
+        raise NotImplementedError
+
+    def keys(self, entry):
+        raise NotImplementedError
+
+    # Building and freshness
+
+    def build(self):
+        version = counter(self.counter_name)
+        changes = self.changes
+        qs = self.queryset().order_by()
+        if qs.count() > self.max_entries:
+            entries, pairs, overflow = {}, [], True
+        else:
+            entries = dict(self.rows(qs))
+            pairs = sorted((key, object_id) for object_id, entry in entries.items() for key in self.keys(entry))
+            overflow = False
+        with self.lock:
+            self.sorted_keys = [key for key, _object_id in pairs]
+            self.ids = array("q", (object_id for _key, object_id in pairs))
+            self.entries = entries
+            self.overflow = overflow
+            self.version = version
+            self.checked_at = time.monotonic()
+            # A write committed while the rows were being read may be missing; rebuild next time.
+            self.stale = self.changes != changes
+            self.built = True
+
+    def is_current(self):
+        if not self.built or self.stale:
+            return False
+        now = time.monotonic()
+        if now - self.checked_at < CHECK_INTERVAL:
+            return True
+        if counter(self.counter_name) != self.version:
+            return False
+        self.checked_at = now
+        return True
+
+    def ensure_current(self):
+        if self.is_current():
+            return
+        with self.build_lock:
+            if not self.is_current():
+                self.build()
+
+    # Incremental updates
+
+    def _position(self, key, object_id):
+        # Equal keys are kept in id order, so (key, id) is a plain bisect too.
+        start, end = bisect_left(self.sorted_keys, key), bisect_right(self.sorted_keys, key)
+        return bisect_left(self.ids, object_id, start, end)
+
+    def _remove(self, object_id):
+        entry = self.entries.pop(object_id, None)
+        if entry is None:
+            return
+        for key in self.keys(entry):
+            position = self._position(key, object_id)
+            del self.sorted_keys[position]
+            del self.ids[position]
+
+    def _add(self, object_id, entry):
+        self.entries[object_id] = entry
+        for key in self.keys(entry):
+            position = self._position(key, object_id)
+            self.sorted_keys.insert(position, key)
+            self.ids.insert(position, object_id)
+
+    def refresh(self, ids):
+        """Re-read `ids` (ids or an id queryset); rows no longer in the source are dropped."""
+        version = bump_counter(self.counter_name)
+        with self.lock:
+            self.changes += 1
+            if not self.built or self.overflow:
+                return
+        ids = set(ids)
+        fresh = dict(self.rows(self.queryset().filter(id__in=ids).order_by())) if ids else {}
+        with self.lock:
+            for object_id in ids:
+                self._remove(object_id)
+                if object_id in fresh:
+                    self._add(object_id, fresh[object_id])
+            if len(self.entries) > self.max_entries:
+                self.stale = True
+            elif version is not None and version == self.version + 1:
+                self.version = version
+            else:
+                # Another worker wrote in between (or the counter was just started).
+                self.stale = True
+
+    def invalidate(self):
+        """Rebuild on next use here and, via the counter, in every other worker; for bulk writes."""
+        bump_counter(self.counter_name)
+        with self.lock:
+            self.changes += 1
+            self.stale = True
+
+    # Lookups
+
+    def span(self, prefix):
+        """Positions of the keys starting with `prefix`; call with `lock` held."""
+        return bisect_left(self.sorted_keys, prefix), bisect_left(self.sorted_keys, prefix + LAST_CHAR)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "built": self.built,
+                "overflow": self.overflow,
+                "entries": len(self.entries),
+                "keys": len(self.sorted_keys),
+            }
@@ -0,0 +1,347 @@
+"""
+Bulk plot import from CSV or GeoJSON cemetery maps (`manage.py import_plots`,
+`POST /api/plots/import/`).
+
+Both formats are read as a stream, CSV line by line and GeoJSON one feature
+at a time out of its `features` array, so memory is bounded by `CHUNK_SIZE`
+records whatever the size of the file. Each chunk is validated and written
+with a single `bulk_create(update_conflicts=True)` on the
+`uniq_plot_per_cemetery_location` constraint: a plot already at that
+cemetery/section/row/plot number takes the file's coordinates and access
+notes, so importing the same map twice is a no-op. Invalid records are
+reported with their CSV line or GeoJSON feature number and skipped; the
+rest of the file still goes in.
+
+`bulk_create()` sends no signals, so once each chunk commits the import
+does what core.signals does for saved plots: bump the `Plot` generation,
+mark the spatial grid stale and invalidate the map tiles it touched. The
+cemetery is part of the key and new plots have no memorials, so counter
+caches, search documents and autocomplete entries are unaffected.
+"""
+import csv
+import json
+import re
+from decimal import Decimal, InvalidOperation
+from functools import partial
+
+from django.db import transaction
+
+from core import clusters
+from core.generations import bump_generation
+from core.geohash import point_hash
+from core.models import Cemetery, Plot
+from core.spatial import PLOT_GRID
+
+
+FORMATS = ("csv", "geojson")
+CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+# Characters read from the stream at a time, and the most one GeoJSON feature may take.
+READ_SIZE = 64 * 1024
+MAX_FEATURE_CHARS = 1024 * 1024
+
+# Accepted column (CSV) and property (GeoJSON) names, lowercased, by model field.
+COLUMNS = {
+    "cemetery": "cemetery_id",
+    "cemetery_id": "cemetery_id",
+    "section": "section",
+    "row": "row",
+    "plot": "plot_number",
+    "plot_number": "plot_number",
+    "lat": "gps_lat",
+    "latitude": "gps_lat",
+    "gps_lat": "gps_lat",
+    "lng": "gps_lng",
+    "lon": "gps_lng",
+    "longitude": "gps_lng",
+    "gps_lng": "gps_lng",
+    "notes": "access_notes",
+    "access_notes": "access_notes",
+}
+LOCATION_FIELDS = ("section", "row", "plot_number")
+UNIQUE_FIELDS = ("cemetery", *LOCATION_FIELDS)
+UPDATE_FIELDS = ("gps_lat", "gps_lng", "geohash", "access_notes", "updated_at")
+COORDINATE_STEP = Decimal("0.000001")
+
+WHITESPACE = re.compile(r"\s*")
+DECODER = json.JSONDecoder()
+
+
+def format_for(name):
+    """The import format implied by a file name, or None."""
+    extension = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    return {"csv": "csv", "geojson": "geojson", "json": "geojson"}.get(extension)
+
+
+# Reading
+
+def read_csv(stream):
+    """`(line, values, errors)` per CSV record; the header names the columns."""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    fields = [COLUMNS.get(name.strip().lower()) for name in header]
+    if not set(LOCATION_FIELDS) & set(fields):
+        raise ValueError("The header needs a section, row or plot_number column.")
+    for record in reader:
+        if not any(value.strip() for value in record):
+            continue
+        errors = {}
+        if len(record) != len(fields):
+            errors["non_field_errors"] = [f"Expected {len(fields)} columns, found {len(record)}."]
+        values = {field: value for field, value in zip(fields, record) if field}
+        yield reader.line_num, values, errors
+
+
+class _JSONStream:
+    """Decodes a JSON document one value at a time from a text stream."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = ""
+        self.pos = 0
+        self.done = False
+
+    def _fill(self):
+        chunk = self.stream.read(READ_SIZE)
+        if not chunk:
+            self.done = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """The next non-whitespace character, or "" at the end."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Malformed GeoJSON: expected {' or '.join(repr(char) for char in chars)}.")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                value, end = None, None
+            # A number ending the buffer may go on in the next read.
+            if end is not None and (end < len(self.buffer) or self.done):
+                self.pos = end
+                return value
+            if len(self.buffer) - self.pos > MAX_FEATURE_CHARS:
+                raise ValueError("Malformed GeoJSON, or a feature larger than 1 MB.")
+            if not self._fill() and end is None:
+                raise ValueError("Malformed GeoJSON.")
+
+
+def _features(stream):
+    """The members of a FeatureCollection's `features` array, one at a time."""
+    reader = _JSONStream(stream)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "features":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(",]") == "]":
+                        break
+        else:
+            value = reader.value()
+            if key == "type" and value != "FeatureCollection":
+                raise ValueError("Expected a GeoJSON FeatureCollection.")
+        if reader.expect(",}") == "}":
+            return
+
+
+def _point(geometry):
+    """
+    (lat, lng) of a Point, or the mean vertex of a Polygon's (first) outer
+    ring; None for other geometry types.
+    """
+    kind, coordinates = geometry.get("type"), geometry.get("coordinates")
+    if kind == "MultiPolygon":
+        kind, coordinates = "Polygon", coordinates[0]
+    if kind == "Polygon":
+        # The ring repeats its first vertex at the end.
+        ring = coordinates[0][:-1]
+        return sum(vertex[1] for vertex in ring) / len(ring), sum(vertex[0] for vertex in ring) / len(ring)
+    if kind == "Point":
+        return coordinates[1], coordinates[0]
+    return None
+
+
+def read_geojson(stream):
+    """`(feature number, values, errors)` per feature; the geometry gives the coordinates."""
+    for number, feature in enumerate(_features(stream), start=1):
+        errors = {}
+        if not isinstance(feature, dict):
+            yield number, {}, {"non_field_errors": ["Expected a GeoJSON Feature."]}
+            continue
+        properties = feature.get("properties") or {}
+        values = {
+            COLUMNS[key.lower()]: "" if value is None else str(value)
+            for key, value in properties.items()
+            if key.lower() in COLUMNS
+        }
+        if feature.get("geometry"):
+            try:
+                point = _point(feature["geometry"])
+                if point is None:
+                    errors["geometry"] = ["Expected a Point or Polygon geometry."]
+                else:
+                    values["gps_lat"], values["gps_lng"] = repr(float(point[0])), repr(float(point[1]))
+            except (AttributeError, IndexError, TypeError, ValueError, ZeroDivisionError):
+                errors["geometry"] = ["Expected [longitude, latitude] coordinates."]
+        yield number, values, errors
+
+
+READERS = {"csv": read_csv, "geojson": read_geojson}
+
+
+# Validation
+
+def _coordinate(value, limit):
+    number = Decimal(value)
+    if not number.is_finite() or abs(number) > limit:
+        raise InvalidOperation
+    return number.quantize(COORDINATE_STEP)
+
+
+def clean(values, errors, cemetery_id=None):
+    """Plot field values of one record; problems are added to `errors`."""
+    fields = {}
+    raw_cemetery = values.get("cemetery_id", "").strip() or cemetery_id
+    try:
+        fields["cemetery_id"] = int(raw_cemetery)
+    except (TypeError, ValueError):
+        errors["cemetery_id"] = ["A valid cemetery id is required." if raw_cemetery else "This field is required."]
+
+    for name in LOCATION_FIELDS:
+        fields[name] = values.get(name, "").strip()
+        limit = Plot._meta.get_field(name).max_length
+        if len(fields[name]) > limit:
+            errors[name] = [f"Ensure this field has no more than {limit} characters."]
+    if not any(fields[name] for name in LOCATION_FIELDS):
+        errors.setdefault("non_field_errors", []).append("A plot needs a section, row or plot number.")
+
+    lat, lng = values.get("gps_lat", "").strip(), values.get("gps_lng", "").strip()
+    fields["gps_lat"] = fields["gps_lng"] = None
+    if bool(lat) != bool(lng):
+        errors.setdefault("non_field_errors", []).append("Give both gps_lat and gps_lng, or neither.")
+    elif lat:
+        for name, raw, limit in (("gps_lat", lat, 90), ("gps_lng", lng, 180)):
+            try:
+                fields[name] = _coordinate(raw, limit)
+            except (InvalidOperation, ValueError):
+                errors.setdefault(name, []).append(f"Expected a number between -{limit} and {limit}.")
+    fields["access_notes"] = values.get("access_notes", "").strip()
+    return fields
+
+
+# Writing
+
+def _chunk_written(cells):
+    bump_generation(Plot)
+    PLOT_GRID.invalidate()
+    clusters.invalidate(cells)
+
+
+class PlotImport:
+    """One import run; `run(records)` consumes the output of a reader."""
+
+    def __init__(self, cemetery_id=None, chunk_size=CHUNK_SIZE, max_errors=MAX_REPORTED_ERRORS):
+        self.cemetery_id = cemetery_id
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.cemeteries = set()
+        self.plots_before = 0
+        self.result = {"records": 0, "imported": 0, "created": 0, "rejected": 0, "errors": []}
+
+    def reject(self, record, errors):
+        self.result["rejected"] += 1
+        if len(self.result["errors"]) < self.max_errors:
+            self.result["errors"].append({"record": record, "errors": errors})
+
+    def write(self, chunk):
+        wanted = {fields["cemetery_id"] for _record, fields in chunk} - self.cemeteries
+        known = set(Cemetery.objects.filter(id__in=wanted).values_list("id", flat=True)) if wanted else set()
+        plots = {}
+        for record, fields in chunk:
+            if fields["cemetery_id"] not in self.cemeteries and fields["cemetery_id"] not in known:
+                self.reject(record, {"cemetery_id": ["Unknown cemetery."]})
+                continue
+            fields["geohash"] = point_hash(fields["gps_lat"], fields["gps_lng"])
+            # The last record for a location wins, as it would across chunks.
+            plots[tuple(fields[name] for name in ("cemetery_id", *LOCATION_FIELDS))] = Plot(**fields)
+            self.result["imported"] += 1
+        if not plots:
+            return
+
+        with transaction.atomic():
+            cells = {plot.geohash for plot in plots.values()} - {""}
+            if known:
+                # The first chunk for a cemetery may move its plots out of any cell it has.
+                existing = Plot.objects.filter(cemetery_id__in=known)
+                self.plots_before += existing.count()
+                cells |= clusters.tile_cells(existing)
+                self.cemeteries |= known
+            Plot.objects.bulk_create(
+                plots.values(), update_conflicts=True, unique_fields=UNIQUE_FIELDS, update_fields=UPDATE_FIELDS
+            )
+            transaction.on_commit(partial(_chunk_written, cells))
+
+    def run(self, records):
+        chunk = []
+        for record, values, errors in records:
+            self.result["records"] += 1
+            fields = clean(values, errors, self.cemetery_id)
+            if errors:
+                self.reject(record, errors)
+                continue
+            chunk.append((record, fields))
+            if len(chunk) >= self.chunk_size:
+                self.write(chunk)
+                chunk = []
+        if chunk:
+            self.write(chunk)
+        if self.cemeteries:
+            total = Plot.objects.filter(cemetery_id__in=self.cemeteries).count()
+            self.result["created"] = total - self.plots_before
+        # Unknown cemeteries are only found when a chunk is written.
+        self.result["errors"].sort(key=lambda rejected: rejected["record"])
+        return self.result
+
+
+def import_plots(stream, file_format, cemetery_id=None, chunk_size=CHUNK_SIZE, max_errors=MAX_REPORTED_ERRORS):
+    """
+    Import the plots in the text stream `stream` (a format in `FORMATS`).
+    `cemetery_id` applies to records without a cemetery of their own.
+    Returns counts of records read, imported, created (the rest updated an
+    existing plot or repeated a location) and rejected, with the first
+    `max_errors` rejections. Raises ValueError when the file as a whole
+    cannot be read.
+    """
+    if file_format not in READERS:
+        raise ValueError(f"Unknown format; expected one of {', '.join(FORMATS)}.")
+    try:
+        return PlotImport(cemetery_id, chunk_size, max_errors).run(READERS[file_format](stream))
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise ValueError(f"Could not read the file: {exc}")
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from core.api import views
+
+
+BENCHMARKS = [
+    ("memorials", "/api/memorials/", views.MemorialListView),
+    ("customers", "/api/customers/", views.CustomerListView),
+    ("cemeteries", "/api/cemeteries/", views.CemeteryListView),
+    ("scheduling", "/api/scheduling/services/", views.SchedulingServiceListView),
+]
+
+
+class Command(BaseCommand):
+    help = "Compare DRF serializers against the .values() fast path on the current database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per endpoint; the best run is reported.")
+
+    def time_view(self, view_class, url, repeat, fast_rows):
+        factory = APIRequestFactory()
+        saved = view_class.fast_rows
+        view_class.fast_rows = fast_rows
+        try:
+            view = view_class.as_view()
+            best = None
+            body = b""
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = view(factory.get(url))
+                body = JSONRenderer().render(response.data)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            return best, body
+        finally:
+            view_class.fast_rows = saved
+
+    def handle(self, *args, **options):
+        repeat = max(1, options["repeat"])
+        self.stdout.write(f"{'endpoint':<12} {'rows':>7} {'drf ms':>9} {'fast ms':>9} {'speedup':>8}  parity")
+        for name, url, view_class in BENCHMARKS:
+            slow, slow_body = self.time_view(view_class, url, repeat, None)
+            fast, fast_body = self.time_view(view_class, url, repeat, view_class.fast_rows)
+            rows = slow_body.count(b'{"id":')
+            speedup = slow / fast if fast else float("inf")
+            parity = "ok" if slow_body == fast_body else "MISMATCH"
+            self.stdout.write(
+                f"{name:<12} {rows:>7} {slow * 1000:>9.1f} {fast * 1000:>9.1f} {speedup:>7.1f}x  {parity}"
+            )
@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ingest import CHUNK_SIZE, FORMATS, format_for, import_plots
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update plots from a CSV or GeoJSON cemetery map. Rows are upserted on "
+        "cemetery/section/row/plot number, so re-importing a file is safe; invalid rows are "
+        "reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or GeoJSON file, or - for standard input.")
+        parser.add_argument("--format", choices=FORMATS, help="File format; by default taken from the extension.")
+        parser.add_argument("--cemetery", type=int, help="Cemetery id for rows without a cemetery column.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows validated and written per batch.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or format_for(path)
+        if file_format is None:
+            raise CommandError(f"Cannot tell the format of {path}; pass --format.")
+
+        try:
+            stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        except OSError as exc:
+            raise CommandError(f"Cannot open {path}: {exc.strerror}.")
+        try:
+            result = import_plots(
+                stream, file_format, cemetery_id=options["cemetery"], chunk_size=max(1, options["chunk_size"])
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for rejected in result["errors"]:
+            problems = "; ".join(f"{field}: {' '.join(messages)}" for field, messages in rejected["errors"].items())
+            self.stderr.write(f"Record {rejected['record']}: {problems}")
+        if result["rejected"] > len(result["errors"]):
+            self.stderr.write(f"... and {result['rejected'] - len(result['errors'])} more rejected record(s).")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result['imported']} of {result['records']} record(s): {result['created']} new plot(s); "
+                f"rejected {result['rejected']}."
+            )
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.sync import CHANGE_RETENTION, prune_changes
+
+
+class Command(BaseCommand):
+    help = (
+        f"Delete sync change log entries older than {CHANGE_RETENTION.days} days; clients with an "
+        "older cursor get a full snapshot instead."
+    )
+
+    def handle(self, *args, **options):
+        removed = prune_changes()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} change(s)."))
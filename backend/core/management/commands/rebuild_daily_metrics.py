@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.rollups import rebuild_daily_metrics
+
+
+class Command(BaseCommand):
+    help = "Recompute the DailyMetrics dashboard rollup from Service, Invoice and ServiceAssignment rows."
+
+    def handle(self, *args, **options):
+        days = rebuild_daily_metrics()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt daily metrics for {days} day(s)."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.denormalized import rebuild_last_service
+
+
+class Command(BaseCommand):
+    help = "Recompute Memorial.last_service, last_service_status and last_service_date from Service rows."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild_last_service()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt latest-service columns for {updated} memorial(s)."))
@@ -0,0 +1,25 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.rollups import rebuild_monthly_reports
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the monthly report tables from Customer, Service and Invoice rows, "
+        "including closed months that writes no longer refresh."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="First month to rebuild (YYYY-MM); defaults to all history.")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = datetime.datetime.strptime(options["since"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--since must look like YYYY-MM.")
+        months = rebuild_monthly_reports(since=since)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt monthly reports for {months} month(s)."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Recreate the full-text search documents of customers, memorials, cemeteries and services."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows read and written per batch.")
+
+    def handle(self, *args, **options):
+        written = rebuild_index(batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} search document(s)."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.denormalized import rebuild_current_price
+
+
+class Command(BaseCommand):
+    help = "Recompute Service.current_invoice and current_price from Invoice rows."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = rebuild_current_price()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt current-price columns for {updated} service(s)."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.denormalized import COUNTER_CACHES, counter_drift, counters_for, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the Customer, Cemetery and Employee counter caches with set-based SQL and report rows that drifted. "
+        "Pass --repair to write the recounted values."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repair", action="store_true", help="Update drifted rows with the recounted values.")
+        parser.add_argument("--show", type=int, default=10, help="Drifted rows to list per model.")
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in COUNTER_CACHES:
+            names = list(counters_for(model))
+            drifted = counter_drift(model)
+            count = drifted.count()
+            total += count
+            self.stdout.write(f"{model.__name__}: {count} drifted row(s)")
+            columns = [name for pair in ((n, f"fresh_{n}") for n in names) for name in pair]
+            for row in drifted.order_by("pk").values("pk", *columns)[: options["show"]]:
+                changes = ", ".join(f"{n} {row[n]} -> {row[f'fresh_{n}']}" for n in names if row[n] != row[f"fresh_{n}"])
+                self.stdout.write(f"  #{row['pk']}: {changes}")
+            if options["repair"] and count:
+                with transaction.atomic():
+                    updated = rebuild_counters(model)
+                self.stdout.write(self.style.SUCCESS(f"  repaired {updated} row(s)"))
+
+        if total and not options["repair"]:
+            self.stdout.write(self.style.WARNING("Run with --repair to fix the drifted rows."))
+        elif not total:
+            self.stdout.write(self.style.SUCCESS("Counter caches are consistent."))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_service_estimated_minutes_service_scheduled_start'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cemetery',
+            index=models.Index(fields=['name', 'id'], name='core_cemete_name_c2b39f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['full_name', 'id'], name='core_custom_full_na_459e3d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['full_name', 'id'], name='core_employ_full_na_2a8ec6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['scheduled_start', '-created_at', '-id'], name='core_servic_schedul_8741a8_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_last_service(apps, schema_editor):
+    Memorial = apps.get_model("core", "Memorial")
+    Service = apps.get_model("core", "Service")
+    latest = Service.objects.filter(memorial=models.OuterRef("pk")).order_by(
+        "-completed_date", "-created_at", "-id"
+    )
+    Memorial.objects.update(
+        last_service_id=models.Subquery(latest.values("id")[:1]),
+        last_service_status=models.Subquery(latest.values("status")[:1]),
+        last_service_date=models.Subquery(latest.values("completed_date")[:1]),
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memorial',
+            name='last_service',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.service'),
+        ),
+        migrations.AddField(
+            model_name='memorial',
+            name='last_service_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='memorial',
+            name='last_service_status',
+            field=models.CharField(blank=True, editable=False, max_length=30, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='memorial',
+            index=models.Index(fields=['last_service_status'], name='core_memori_last_se_ddbd19_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='memorial',
+            index=models.Index(fields=['last_service_date'], name='core_memori_last_se_1bad72_idx'),
+        ),
+        migrations.RunPython(backfill_last_service, migrations.RunPython.noop),
+    ]
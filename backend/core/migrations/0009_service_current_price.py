@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_current_price(apps, schema_editor):
+    Service = apps.get_model("core", "Service")
+    Invoice = apps.get_model("core", "Invoice")
+    current = Invoice.objects.filter(service=models.OuterRef("pk")).order_by(
+        "-issued_date", "-created_at", "-id"
+    )
+    Service.objects.update(
+        current_invoice_id=models.Subquery(current.values("id")[:1]),
+        current_price=models.Subquery(current.values("total_amount")[:1]),
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_memorial_last_service'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='current_invoice',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.invoice'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='current_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['service', '-issued_date', '-created_at', '-id'], name='core_invoic_service_462626_idx'),
+        ),
+        migrations.RunPython(backfill_current_price, migrations.RunPython.noop),
+    ]
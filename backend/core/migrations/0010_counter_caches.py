@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:42
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def grouped(qs, group, aggregate):
+    return models.Subquery(qs.order_by().values(group).annotate(value=aggregate).values("value")[:1])
+
+
+def backfill_counters(apps, schema_editor):
+    Customer = apps.get_model("core", "Customer")
+    Cemetery = apps.get_model("core", "Cemetery")
+    Memorial = apps.get_model("core", "Memorial")
+    Service = apps.get_model("core", "Service")
+    customer = models.OuterRef("pk")
+    Customer.objects.update(
+        memorials_count=Coalesce(grouped(Memorial.objects.filter(customer=customer), "customer", models.Count("pk")), 0),
+        last_contact=grouped(
+            Service.objects.filter(memorial__customer=customer), "memorial__customer", models.Max("completed_date")
+        ),
+    )
+    cemetery = models.OuterRef("pk")
+    active = Service.objects.filter(memorial__plot__cemetery=cemetery, status__in=["scheduled", "in_progress"])
+    Cemetery.objects.update(
+        memorials_count=Coalesce(
+            grouped(Memorial.objects.filter(plot__cemetery=cemetery), "plot__cemetery", models.Count("pk")), 0
+        ),
+        active_services=Coalesce(grouped(active, "memorial__plot__cemetery", models.Count("pk")), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_service_current_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cemetery',
+            name='active_services',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cemetery',
+            name='memorials_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='last_contact',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='memorials_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['last_contact'], name='core_custom_last_co_ec94b0_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
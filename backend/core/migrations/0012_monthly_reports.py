@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_daily_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('new_customers', models.PositiveIntegerField(default=0)),
+                ('services_created', models.PositiveIntegerField(default=0)),
+                ('services_completed', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MonthlyServiceRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('service_type', models.CharField(blank=True, max_length=30)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('invoice_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('month', 'service_type'), name='uniq_revenue_per_month_type')],
+            },
+        ),
+    ]
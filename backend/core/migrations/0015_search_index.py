@@ -0,0 +1,105 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:15
+
+from django.db import migrations, models
+
+
+SQLITE_INDEX = [
+    # External-content FTS5 table: the text lives in core_searchdocument only.
+    """
+    CREATE VIRTUAL TABLE core_searchdocument_fts USING fts5(
+        body, content='core_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER core_searchdocument_fts_insert AFTER INSERT ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(rowid, body) VALUES (new.id, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER core_searchdocument_fts_delete AFTER DELETE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, body) VALUES ('delete', old.id, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER core_searchdocument_fts_update AFTER UPDATE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, body) VALUES ('delete', old.id, old.body);
+        INSERT INTO core_searchdocument_fts(rowid, body) VALUES (new.id, new.body);
+    END
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_insert",
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_delete",
+    "DROP TRIGGER IF EXISTS core_searchdocument_fts_update",
+    "DROP TABLE IF EXISTS core_searchdocument_fts",
+]
+POSTGRES_INDEX = [
+    """
+    ALTER TABLE core_searchdocument ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED
+    """,
+    "CREATE INDEX core_searchdocument_search_vector ON core_searchdocument USING gin (search_vector)",
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS core_searchdocument_search_vector",
+    "ALTER TABLE core_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+# Frozen copy of core.search.SEARCH_MODELS.
+INDEXED_FIELDS = {
+    "customer": ("Customer", ("full_name", "email", "phone")),
+    "memorial": ("Memorial", ("inscription_text", "condition_summary", "notes")),
+    "cemetery": ("Cemetery", ("name", "city")),
+    "service": ("Service", ("internal_notes",)),
+}
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"sqlite": SQLITE_INDEX, "postgresql": POSTGRES_INDEX}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"sqlite": SQLITE_DROP, "postgresql": POSTGRES_DROP}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def backfill_documents(apps, schema_editor):
+    SearchDocument = apps.get_model("core", "SearchDocument")
+    for kind, (model_name, fields) in INDEXED_FIELDS.items():
+        model = apps.get_model("core", model_name)
+        documents = []
+        for object_id, *values in model.objects.values_list("id", *fields).iterator(chunk_size=2000):
+            body = "\n".join(value for value in values if value)
+            if body:
+                documents.append(SearchDocument(kind=kind, object_id=object_id, body=body))
+        SearchDocument.objects.bulk_create(documents, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_service_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('body', models.TextField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='uniq_search_document')],
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
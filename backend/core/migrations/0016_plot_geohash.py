@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:27
+
+from django.db import migrations, models
+
+from core.geohash import point_hash
+
+
+def backfill_geohash(apps, schema_editor):
+    Plot = apps.get_model("core", "Plot")
+    batch = []
+    located = Plot.objects.filter(gps_lat__isnull=False, gps_lng__isnull=False).only("gps_lat", "gps_lng")
+    for plot in located.iterator(chunk_size=2000):
+        plot.geohash = point_hash(plot.gps_lat, plot.gps_lng)
+        batch.append(plot)
+        if len(batch) >= 2000:
+            Plot.objects.bulk_update(batch, ["geohash"])
+            batch = []
+    Plot.objects.bulk_update(batch, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plot',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='plot',
+            index=models.Index(fields=['geohash', 'id'], name='core_plot_geohash_01e76f_idx'),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
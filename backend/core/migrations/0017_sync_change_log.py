@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_plot_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sequence', models.BigIntegerField(blank=True, editable=False, null=True)),
+            ],
+        ),
+        migrations.DeleteModel(
+            name='Tombstone',
+        ),
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='core_custom_updated_9a16a8_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='employee',
+            name='core_employ_updated_f98422_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='memorial',
+            name='core_memori_updated_a377dd_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='service',
+            name='core_servic_updated_30213b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='serviceassignment',
+            name='core_servic_updated_75671d_idx',
+        ),
+        migrations.AddIndex(
+            model_name='syncchange',
+            index=models.Index(fields=['sequence'], name='core_syncch_sequenc_460a9e_idx'),
+        ),
+    ]
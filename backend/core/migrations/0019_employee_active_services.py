@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:24
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_active_services(apps, schema_editor):
+    Employee = apps.get_model("core", "Employee")
+    ServiceAssignment = apps.get_model("core", "ServiceAssignment")
+    active = ServiceAssignment.objects.filter(
+        employee=models.OuterRef("pk"), service__status__in=["scheduled", "in_progress"]
+    )
+    Employee.objects.update(
+        active_services=Coalesce(
+            models.Subquery(active.order_by().values("employee").annotate(value=models.Count("pk")).values("value")[:1]),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_generation_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='active_services',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_active_services, migrations.RunPython.noop),
+    ]
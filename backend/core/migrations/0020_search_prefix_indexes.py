@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:10
+
+from django.db import migrations
+
+
+# Table -> columns searched by prefix from the list endpoints (core.api.filters.SearchFilter).
+PREFIX_COLUMNS = {
+    "core_customer": ("full_name", "email", "phone"),
+    "core_cemetery": ("name", "city"),
+    "core_employee": ("full_name", "email"),
+}
+
+
+def index_name(table, column):
+    return f"{table}_{column}_prefix"
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, columns in PREFIX_COLUMNS.items():
+        for column in columns:
+            # The expression each backend compiles `istartswith` to: `col LIKE 'x%'` on
+            # SQLite (case-insensitive for ASCII), `UPPER(col::text) LIKE UPPER('x%')` on PostgreSQL.
+            if vendor == "sqlite":
+                schema_editor.execute(f"CREATE INDEX {index_name(table, column)} ON {table} ({column} COLLATE NOCASE)")
+            elif vendor == "postgresql":
+                schema_editor.execute(
+                    f"CREATE INDEX {index_name(table, column)} ON {table} (UPPER({column}::text) text_pattern_ops)"
+                )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ("sqlite", "postgresql"):
+        return
+    for table, columns in PREFIX_COLUMNS.items():
+        for column in columns:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {index_name(table, column)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0019_employee_active_services"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
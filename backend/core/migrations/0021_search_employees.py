@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:05
+
+from django.db import migrations
+
+
+# List search goes through the full-text index now (core.api.filters.SearchFilter).
+PREFIX_INDEXES = (
+    "core_customer_full_name_prefix",
+    "core_customer_email_prefix",
+    "core_customer_phone_prefix",
+    "core_cemetery_name_prefix",
+    "core_cemetery_city_prefix",
+    "core_employee_full_name_prefix",
+    "core_employee_email_prefix",
+)
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        for name in PREFIX_INDEXES:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def index_employees(apps, schema_editor):
+    Employee = apps.get_model("core", "Employee")
+    SearchDocument = apps.get_model("core", "SearchDocument")
+    documents = []
+    for object_id, *values in Employee.objects.values_list("id", "full_name", "email").iterator(chunk_size=2000):
+        body = "\n".join(value for value in values if value)
+        if body:
+            documents.append(SearchDocument(kind="employee", object_id=object_id, body=body))
+    SearchDocument.objects.bulk_create(documents, batch_size=1000)
+
+
+def unindex_employees(apps, schema_editor):
+    apps.get_model("core", "SearchDocument").objects.filter(kind="employee").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0020_search_prefix_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_prefix_indexes, migrations.RunPython.noop),
+        migrations.RunPython(index_employees, unindex_employees),
+    ]
@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+from core.geohash import point_hash
+
 
 class TimestampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -11,11 +13,57 @@ class TimestampedModel(models.Model):
         abstract = True
 
 
+class TrackedModel(models.Model):
+    """
+    Remembers the field values loaded from the database, so write hooks can see
+    what changed, and keeps `denormalized_fields` out of full-row saves: those
+    columns are only written by core.denormalized, never from a stale instance.
+
+    Saves run in a transaction together with their post_save receivers, so a
+    row and the aggregates derived from it commit (or roll back) as one.
+    Deletes already do, as Django sends post_delete inside the delete transaction.
+    """
+
+    denormalized_fields = ()
+    _loaded_values = None
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def loaded_value(self, attname):
+        """Value of `attname` before this write, or None for new/unknown values."""
+        return (self._loaded_values or {}).get(attname)
+
+    def has_changed(self, *attnames):
+        """True unless every attname was loaded and still holds its loaded value."""
+        loaded = self._loaded_values
+        if loaded is None:
+            return True
+        return any(name not in loaded or loaded[name] != getattr(self, name) for name in attnames)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and self.denormalized_fields and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.denormalized_fields
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        # post_save receivers have seen the old values by now; later saves compare against this one.
+        self._loaded_values = {f.attname: getattr(self, f.attname) for f in self._meta.concrete_fields}
+
+
 # -----------------------
 # Core domain
 # -----------------------
 
-class Customer(TimestampedModel):
+class Customer(TrackedModel, TimestampedModel):
     full_name = models.CharField(max_length=255)
     email = models.EmailField(blank=True)
     phone = models.CharField(max_length=30, blank=True)
@@ -26,11 +74,25 @@ class Customer(TimestampedModel):
     postal_code = models.CharField(max_length=20, blank=True)
     notes = models.TextField(blank=True)
 
+    # Counter caches maintained by core.denormalized; check/repair with
+    # `manage.py verify_counter_caches`.
+    memorials_count = models.PositiveIntegerField(default=0, editable=False)
+    last_contact = models.DateField(null=True, blank=True, editable=False)
+
+    denormalized_fields = ("memorials_count", "last_contact")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["full_name", "id"]),
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["last_contact"]),
+        ]
+
     def __str__(self) -> str:
         return self.full_name
 
 
-class Cemetery(TimestampedModel):
+class Cemetery(TrackedModel, TimestampedModel):
     name = models.CharField(max_length=255)
     address = models.CharField(max_length=255, blank=True)
     city = models.CharField(max_length=100, blank=True)
@@ -40,11 +102,23 @@ class Cemetery(TimestampedModel):
     contact_email = models.EmailField(blank=True)
     notes = models.TextField(blank=True)
 
+    # Counter caches maintained by core.denormalized; check/repair with
+    # `manage.py verify_counter_caches`.
+    memorials_count = models.PositiveIntegerField(default=0, editable=False)
+    active_services = models.PositiveIntegerField(default=0, editable=False)
+
+    denormalized_fields = ("memorials_count", "active_services")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["name", "id"]),
+        ]
+
     def __str__(self) -> str:
         return self.name
 
 
-class Plot(TimestampedModel):
+class Plot(TrackedModel, TimestampedModel):
     cemetery = models.ForeignKey(Cemetery, on_delete=models.CASCADE, related_name="plots")
 
     # typical cemetery location fields
@@ -58,6 +132,10 @@ class Plot(TimestampedModel):
 
     access_notes = models.TextField(blank=True)
 
+    # Geohash of (gps_lat, gps_lng), blank without coordinates; kept in step by
+    # save() and indexed for the range scans in core.spatial.
+    geohash = models.CharField(max_length=12, blank=True, editable=False)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -65,6 +143,16 @@ class Plot(TimestampedModel):
                 name="uniq_plot_per_cemetery_location",
             )
         ]
+        indexes = [
+            models.Index(fields=["geohash", "id"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.geohash = point_hash(self.gps_lat, self.gps_lng)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"gps_lat", "gps_lng"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         parts = [p for p in [self.section, self.row, self.plot_number] if p]
@@ -72,7 +160,7 @@ class Plot(TimestampedModel):
         return f"{self.cemetery.name} - {loc}"
 
 
-class Memorial(TimestampedModel):
+class Memorial(TrackedModel, TimestampedModel):
     class Material(models.TextChoices):
         GRANITE = "granite", "Granite"
         MARBLE = "marble", "Marble"
@@ -90,6 +178,24 @@ class Memorial(TimestampedModel):
     install_date = models.DateField(null=True, blank=True)
     notes = models.TextField(blank=True)
 
+    # Denormalized copy of the latest service (by completed_date, then created_at).
+    # Maintained by core.denormalized on Service writes; rebuild with
+    # `manage.py rebuild_memorial_last_service`.
+    last_service = models.ForeignKey(
+        "Service", on_delete=models.SET_NULL, null=True, blank=True, related_name="+", editable=False
+    )
+    last_service_status = models.CharField(max_length=30, null=True, blank=True, editable=False)
+    last_service_date = models.DateField(null=True, blank=True, editable=False)
+
+    denormalized_fields = ("last_service", "last_service_status", "last_service_date")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["last_service_status"]),
+            models.Index(fields=["last_service_date"]),
+        ]
+
     def __str__(self) -> str:
         return f"Memorial #{self.id} ({self.customer.full_name})"
 
@@ -98,7 +204,7 @@ class Memorial(TimestampedModel):
 # Staff & assignments
 # -----------------------
 
-class Employee(TimestampedModel):
+class Employee(TrackedModel, TimestampedModel):
     class Role(models.TextChoices):
         ADMIN = "admin", "Admin"
         MANAGER = "manager", "Manager"
@@ -112,6 +218,17 @@ class Employee(TimestampedModel):
     is_active = models.BooleanField(default=True)
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="employee")
 
+    # Counter cache maintained by core.denormalized (assignments to scheduled or
+    # in-progress services); check/repair with `manage.py verify_counter_caches`.
+    active_services = models.PositiveIntegerField(default=0, editable=False)
+
+    denormalized_fields = ("active_services",)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["full_name", "id"]),
+        ]
+
     def __str__(self) -> str:
         return self.full_name
 
@@ -120,7 +237,7 @@ class Employee(TimestampedModel):
 # Services / work tracking
 # -----------------------
 
-class Service(TimestampedModel):
+class Service(TrackedModel, TimestampedModel):
     class ServiceType(models.TextChoices):
         CLEANING = "cleaning", "Cleaning"
         RESET = "reset", "Reset"
@@ -157,6 +274,25 @@ class Service(TimestampedModel):
 
     internal_notes = models.TextField(blank=True)
 
+    # Denormalized copy of the current invoice (by issued_date, then created_at).
+    # Maintained by core.denormalized on Invoice writes; rebuild with
+    # `manage.py rebuild_service_current_price`.
+    current_invoice = models.ForeignKey(
+        "Invoice", on_delete=models.SET_NULL, null=True, blank=True, related_name="+", editable=False
+    )
+    current_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+
+    denormalized_fields = ("current_invoice", "current_price")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["scheduled_start", "-created_at", "-id"]),
+            models.Index(fields=["status", "scheduled_start"]),
+            models.Index(fields=["service_type", "status"]),
+            models.Index(fields=["completed_date"]),
+            models.Index(fields=["created_at", "id"]),
+        ]
+
     def __str__(self) -> str:
         return f"Service #{self.id} - {self.get_service_type_display()} ({self.get_status_display()})"
 
@@ -175,7 +311,7 @@ class ServiceStatusHistory(models.Model):
         return f"Service #{self.service_id}: {self.old_status} -> {self.new_status}"
 
 
-class ServiceAssignment(TimestampedModel):
+class ServiceAssignment(TrackedModel, TimestampedModel):
     class AssignmentRole(models.TextChoices):
         LEAD = "lead", "Lead"
         HELPER = "helper", "Helper"
@@ -223,7 +359,7 @@ class Photo(TimestampedModel):
 # -----------------------
 
 
-class Invoice(TimestampedModel):
+class Invoice(TrackedModel, TimestampedModel):
     class Status(models.TextChoices):
         DRAFT = "draft", "Draft"
         SENT = "sent", "Sent"
@@ -249,6 +385,12 @@ class Invoice(TimestampedModel):
     stripe_checkout_session_id = models.CharField(max_length=255, blank=True)
     stripe_payment_intent_id = models.CharField(max_length=255, blank=True)
 
+    class Meta:
+        indexes = [
+            # Current-invoice lookup in core.denormalized.
+            models.Index(fields=["service", "-issued_date", "-created_at", "-id"]),
+        ]
+
     def __str__(self) -> str:
         return f"Invoice #{self.id} ({self.customer.full_name})"
 
@@ -321,3 +463,157 @@ class Payment(TimestampedModel):
 
     def __str__(self) -> str:
         return f"Payment #{self.id} for Invoice #{self.invoice_id} ({self.status})"
+
+
+# -----------------------
+# Reporting rollups
+# -----------------------
+
+class DailyMetrics(models.Model):
+    """
+    Per-day dashboard rollup, maintained by core.rollups on Service, Invoice and
+    ServiceAssignment writes; rebuild with `manage.py rebuild_daily_metrics`.
+
+    Totals are additive: summing a column over all days gives the all-time
+    figure. Services count towards the day they were created (completed ones
+    towards their completed_date), invoices towards their issued_date.
+    `scheduled_count` and `crew_count` describe the active services scheduled
+    on that day.
+    """
+    day = models.DateField(unique=True)
+
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    active_count = models.PositiveIntegerField(default=0)
+    scheduled_count = models.PositiveIntegerField(default=0)
+    crew_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Metrics for {self.day}"
+
+
+class MonthlyActivity(models.Model):
+    """
+    Per-month customer and service counts behind the reports API, maintained
+    by core.rollups. Only open months (the current one onwards) are refreshed
+    on writes; closed months stay frozen until `manage.py rebuild_monthly_reports`.
+    """
+    month = models.DateField(unique=True)  # first day of the month
+
+    new_customers = models.PositiveIntegerField(default=0)
+    services_created = models.PositiveIntegerField(default=0)
+    services_completed = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Activity for {self.month:%Y-%m}"
+
+
+class MonthlyServiceRevenue(models.Model):
+    """Invoiced revenue per month and service type; same refresh rules as `MonthlyActivity`."""
+    month = models.DateField()  # first day of the month
+    service_type = models.CharField(max_length=30, blank=True)  # blank: invoice without a service
+
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    invoice_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["month", "service_type"], name="uniq_revenue_per_month_type"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.service_type or 'unassigned'} revenue for {self.month:%Y-%m}"
+
+
+# -----------------------
+# Sync
+# -----------------------
+
+class SyncChange(models.Model):
+    """
+    A saved or deleted row of a synced model, for `GET /api/sync/` (core.sync).
+    Written by core.signals (and core.denormalized for its set-based updates)
+    in the same transaction as the change. `sequence` is stamped by the first
+    sync that can see the committed row, so it orders changes by when they
+    became visible, which is what clients resume from. Rows older than
+    `core.sync.CHANGE_RETENTION` are removed with `manage.py prune_sync_changes`.
+    """
+    model = models.CharField(max_length=100)  # model label, e.g. "core.service"
+    object_id = models.BigIntegerField()
+    changed_at = models.DateTimeField(default=timezone.now)
+    sequence = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["sequence"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.model} #{self.object_id} changed at {self.changed_at:%Y-%m-%d %H:%M}"
+
+
+class ServiceEvent(models.Model):
+    """
+    Scheduling board change pushed over `GET /api/events/services/` (core.events).
+    The id is the SSE event id clients resume from; only the latest
+    `core.events.EVENT_BUFFER_SIZE` events are kept.
+    """
+    kind = models.CharField(max_length=30)
+    service_id = models.BigIntegerField()  # not a foreign key: events outlive deleted services
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.kind} for Service #{self.service_id}"
+
+
+# -----------------------
+# Search
+# -----------------------
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of one customer, memorial, cemetery or service for
+    `GET /api/search/` (core.search), kept in sync by core.signals. The
+    full-text index over `body` is created by migration 0015 for the
+    database in use: an FTS5 table fed by triggers on SQLite, a generated
+    `tsvector` column with a GIN index on PostgreSQL. Rebuild with
+    `manage.py rebuild_search_index`.
+    """
+    kind = models.CharField(max_length=20)  # a key of core.search.SEARCH_MODELS
+    object_id = models.BigIntegerField()
+    body = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="uniq_search_document"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.object_id}"
+
+
+# -----------------------
+# Cache invalidation
+# -----------------------
+
+class Generation(models.Model):
+    """
+    A shared counter of core.generations: a model's generation, or a named
+    counter of the in-process indexes and map tiles, with the Unix time of
+    its last bump. Kept in the database so every worker sees the same
+    values whatever cache backend is configured.
+    """
+    name = models.CharField(max_length=200, primary_key=True)
+    value = models.BigIntegerField()
+    modified = models.FloatField()
+
+    def __str__(self) -> str:
+        return f"{self.name} = {self.value}"
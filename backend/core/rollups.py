@@ -0,0 +1,396 @@
+"""
+Rollup tables summarizing the customer, service and invoice tables.
+
+`refresh_daily_metrics(days)` recomputes a few `DailyMetrics` rows from the
+source tables and is called from `core.signals` after writes;
+`rebuild_daily_metrics()` recomputes every day with grouped queries and backs
+the `rebuild_daily_metrics` management command. As with core.denormalized,
+`QuerySet.update()` and `bulk_create()` skip the signals.
+
+The monthly report tables work the same way, except that only open months
+(the current one onwards) are refreshed on writes. Earlier months are closed:
+their rows are frozen, so reports over years of history only ever read
+precomputed rows, and backdated edits reach them only through
+`rebuild_monthly_reports`. A month is a much larger recount than a day, so
+`refresh_monthly_reports` defers it until the writing transaction commits
+and recounts each month once per transaction, however many rows it wrote.
+"""
+import datetime
+import threading
+from collections import defaultdict
+from decimal import Decimal
+from functools import partial
+
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, ExtractYear, TruncDate, TruncMonth
+from django.utils import timezone
+
+from core.generations import bump_generation
+from core.models import (
+    Customer,
+    DailyMetrics,
+    Invoice,
+    MonthlyActivity,
+    MonthlyServiceRevenue,
+    Service,
+    ServiceAssignment,
+)
+
+
+ACTIVE_STATUSES = (Service.Status.SCHEDULED, Service.Status.IN_PROGRESS)
+
+# Open months written by this thread's transaction and not recounted since it committed.
+_pending_months = threading.local()
+
+
+def local_day(value):
+    """Calendar day of `value` in the current time zone; dates pass through."""
+    if isinstance(value, datetime.datetime):
+        return timezone.localdate(value)
+    return value
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    end = timezone.make_aware(datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min))
+    return start, end
+
+
+def service_days(created_at, completed_date, scheduled_start, scheduled_date):
+    """Days whose metrics a service with these values contributes to."""
+    return {local_day(created_at), completed_date, local_day(scheduled_start), scheduled_date} - {None}
+
+
+def invoice_day(issued_date, created_at):
+    return issued_date or local_day(created_at)
+
+
+def day_metrics(day):
+    """Recount one `DailyMetrics` row from the source tables."""
+    start, end = day_bounds(day)
+    created = models.Q(created_at__gte=start, created_at__lt=end)
+    completed = models.Q(status=Service.Status.COMPLETED) & (
+        models.Q(completed_date=day) | (models.Q(completed_date__isnull=True) & created)
+    )
+    scheduled = models.Q(status__in=ACTIVE_STATUSES) & (
+        models.Q(scheduled_start__gte=start, scheduled_start__lt=end) | models.Q(scheduled_date=day)
+    )
+
+    metrics = Service.objects.filter(created | models.Q(completed_date=day) | scheduled).aggregate(
+        total_count=models.Count("pk", filter=created),
+        completed_count=models.Count("pk", filter=completed),
+        active_count=models.Count("pk", filter=created & models.Q(status__in=ACTIVE_STATUSES)),
+        scheduled_count=models.Count("pk", filter=scheduled),
+    )
+    metrics["revenue"] = Invoice.objects.filter(
+        models.Q(issued_date=day) | models.Q(issued_date__isnull=True, created_at__gte=start, created_at__lt=end)
+    ).aggregate(total=models.Sum("total_amount"))["total"] or Decimal("0")
+    metrics["crew_count"] = (
+        ServiceAssignment.objects.filter(service__in=Service.objects.filter(scheduled))
+        .values("employee_id")
+        .distinct()
+        .count()
+    )
+    return metrics
+
+
+def refresh_daily_metrics(days):
+    """
+    Recompute the `DailyMetrics` rows for `days`.
+
+    Each row is locked before it is recounted, so concurrent writers touching
+    the same day apply their refreshes one after another.
+    """
+    for day in sorted({day for day in days if day}):
+        with transaction.atomic():
+            DailyMetrics.objects.get_or_create(day=day)
+            DailyMetrics.objects.select_for_update().filter(day=day).exists()
+            DailyMetrics.objects.filter(day=day).update(**day_metrics(day), updated_at=timezone.now())
+
+
+def rebuild_daily_metrics():
+    """Recompute every `DailyMetrics` row; returns the number of days written."""
+    rows = defaultdict(dict)
+
+    created_day = TruncDate("created_at", tzinfo=timezone.get_current_timezone())
+    for row in (
+        Service.objects.order_by()
+        .values(day=created_day)
+        .annotate(
+            total_count=models.Count("pk"),
+            active_count=models.Count("pk", filter=models.Q(status__in=ACTIVE_STATUSES)),
+        )
+    ):
+        rows[row.pop("day")].update(row)
+
+    for row in (
+        Service.objects.filter(status=Service.Status.COMPLETED)
+        .order_by()
+        .values(day=Coalesce("completed_date", created_day))
+        .annotate(completed_count=models.Count("pk"))
+    ):
+        rows[row.pop("day")].update(row)
+
+    for row in (
+        Invoice.objects.order_by()
+        .values(day=Coalesce("issued_date", created_day))
+        .annotate(revenue=models.Sum("total_amount"))
+    ):
+        rows[row.pop("day")].update(row)
+
+    # Active services are a small slice of the table; bucket them in Python since
+    # one service can be scheduled on two days (scheduled_start vs scheduled_date).
+    scheduled = defaultdict(set)
+    for service_id, scheduled_start, scheduled_date in Service.objects.filter(
+        status__in=ACTIVE_STATUSES
+    ).values_list("id", "scheduled_start", "scheduled_date"):
+        for day in {local_day(scheduled_start), scheduled_date} - {None}:
+            scheduled[day].add(service_id)
+    employees = defaultdict(set)
+    for service_id, employee_id in ServiceAssignment.objects.filter(
+        service__status__in=ACTIVE_STATUSES
+    ).values_list("service_id", "employee_id"):
+        employees[service_id].add(employee_id)
+    for day, service_ids in scheduled.items():
+        rows[day]["scheduled_count"] = len(service_ids)
+        rows[day]["crew_count"] = len(set().union(*(employees[service_id] for service_id in service_ids)))
+
+    with transaction.atomic():
+        DailyMetrics.objects.all().delete()
+        DailyMetrics.objects.bulk_create(
+            [DailyMetrics(day=day, **values) for day, values in sorted(rows.items()) if day is not None]
+        )
+    bump_generation(DailyMetrics)
+    return len(rows)
+
+
+def scheduled_days(service_ids):
+    """Days on which the given services are scheduled, for crew recounts."""
+    days = set()
+    for scheduled_start, scheduled_date in Service.objects.filter(pk__in=service_ids).values_list(
+        "scheduled_start", "scheduled_date"
+    ):
+        days.update({local_day(scheduled_start), scheduled_date} - {None})
+    return days
+
+
+def month_of(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    years, index = divmod(month.month - 1 + count, 12)
+    return datetime.date(month.year + years, index + 1, 1)
+
+
+def current_month():
+    return month_of(timezone.localdate())
+
+
+def month_metrics(month):
+    """Recount one month: the `MonthlyActivity` values and the `MonthlyServiceRevenue` rows."""
+    end = add_months(month, 1)
+    start_at, _ = day_bounds(month)
+    end_at, _ = day_bounds(end)
+    created = models.Q(created_at__gte=start_at, created_at__lt=end_at)
+    completed_in_month = models.Q(completed_date__gte=month, completed_date__lt=end)
+    completed = models.Q(status=Service.Status.COMPLETED) & (
+        completed_in_month | (models.Q(completed_date__isnull=True) & created)
+    )
+
+    activity = Service.objects.filter(created | completed_in_month).aggregate(
+        services_created=models.Count("pk", filter=created),
+        services_completed=models.Count("pk", filter=completed),
+    )
+    activity["new_customers"] = Customer.objects.filter(created).count()
+    revenue = list(
+        Invoice.objects.filter(
+            models.Q(issued_date__gte=month, issued_date__lt=end) | (models.Q(issued_date__isnull=True) & created)
+        )
+        .order_by()
+        .values(service_type=Coalesce("service__service_type", models.Value("")))
+        .annotate(revenue=models.Sum("total_amount"), invoice_count=models.Count("pk"))
+    )
+    return activity, revenue
+
+
+def store_month(month, activity, revenue):
+    MonthlyActivity.objects.update_or_create(month=month, defaults=activity)
+    MonthlyServiceRevenue.objects.filter(month=month).delete()
+    MonthlyServiceRevenue.objects.bulk_create([MonthlyServiceRevenue(month=month, **row) for row in revenue])
+
+
+def refresh_monthly_reports(days=None):
+    """
+    Recompute the open months among those containing `days` (the current month
+    when `days` is None) once the current transaction commits. Days in closed
+    months are ignored.
+    """
+    first_open = current_month()
+    months = {first_open} if days is None else {month_of(day) for day in days if day}
+    months = {month for month in months if month >= first_open}
+    if not months:
+        return
+    pending = _pending_months.__dict__.setdefault("months", set())
+    pending |= months
+    transaction.on_commit(partial(_recount_pending, months))
+
+
+def _recount_pending(months):
+    # Each write registers its months; the first callback after the commit recounts them, the rest find them done.
+    pending = _pending_months.__dict__.setdefault("months", set())
+    for month in sorted(months & pending):
+        pending.discard(month)
+        recount_month(month)
+
+
+def recount_month(month):
+    """
+    Recompute one month's report rows. The month row is locked while it is
+    recounted, so concurrent recounts apply one after another and the last one
+    sees every committed write.
+    """
+    with transaction.atomic():
+        MonthlyActivity.objects.get_or_create(month=month)
+        MonthlyActivity.objects.select_for_update().filter(month=month).exists()
+        store_month(month, *month_metrics(month))
+
+
+def rebuild_monthly_reports(since=None):
+    """
+    Recompute every month from `since` (a month start; all history when None),
+    closed ones included. Returns the number of months written.
+    """
+    tz = timezone.get_current_timezone()
+    created_month = TruncMonth("created_at", tzinfo=tz, output_field=models.DateField())
+
+    def dated_month(field):
+        return TruncMonth(Coalesce(field, TruncDate("created_at", tzinfo=tz)), output_field=models.DateField())
+
+    activity = defaultdict(lambda: {"new_customers": 0, "services_created": 0, "services_completed": 0})
+    revenue = defaultdict(list)
+    for month, count in Customer.objects.order_by().values_list(created_month).annotate(models.Count("pk")):
+        activity[month]["new_customers"] = count
+    for month, count in Service.objects.order_by().values_list(created_month).annotate(models.Count("pk")):
+        activity[month]["services_created"] = count
+    for month, count in (
+        Service.objects.filter(status=Service.Status.COMPLETED)
+        .order_by()
+        .values_list(dated_month("completed_date"))
+        .annotate(models.Count("pk"))
+    ):
+        activity[month]["services_completed"] = count
+    for row in (
+        Invoice.objects.order_by()
+        .values(month=dated_month("issued_date"), service_type=Coalesce("service__service_type", models.Value("")))
+        .annotate(revenue=models.Sum("total_amount"), invoice_count=models.Count("pk"))
+    ):
+        revenue[row.pop("month")].append(row)
+
+    months = sorted(month for month in set(activity) | set(revenue) if since is None or month >= since)
+    with transaction.atomic():
+        stale = MonthlyActivity.objects.all()
+        stale_revenue = MonthlyServiceRevenue.objects.all()
+        if since is not None:
+            stale, stale_revenue = stale.filter(month__gte=since), stale_revenue.filter(month__gte=since)
+        stale.delete()
+        stale_revenue.delete()
+        MonthlyActivity.objects.bulk_create([MonthlyActivity(month=month, **activity[month]) for month in months])
+        MonthlyServiceRevenue.objects.bulk_create(
+            [MonthlyServiceRevenue(month=month, **row) for month in months for row in revenue[month]]
+        )
+    bump_generation(MonthlyActivity)
+    bump_generation(MonthlyServiceRevenue)
+    return len(months)
+
+
+# -- Report queries: read the monthly tables only ---------------------------
+
+
+def _rate(part, whole):
+    return round(part / whole * 100, 1) if whole else 0.0
+
+
+def revenue_by_service_type(year=None):
+    labels = dict(Service.ServiceType.choices)
+    rows = MonthlyServiceRevenue.objects.annotate(year=ExtractYear("month"))
+    if year is not None:
+        rows = rows.filter(month__gte=datetime.date(year, 1, 1), month__lt=datetime.date(year + 1, 1, 1))
+    totals = defaultdict(dict)
+    for row_year, service_type, amount in (
+        rows.order_by().values_list("year", "service_type").annotate(models.Sum("revenue")).order_by("year", "service_type")
+    ):
+        totals[row_year][service_type] = amount
+
+    years = []
+    for row_year in sorted(totals, reverse=True):
+        total = sum(totals[row_year].values(), Decimal("0"))
+        years.append({
+            "year": row_year,
+            "revenue": float(total),
+            "service_types": [
+                {
+                    "service_type": service_type or None,
+                    "label": labels.get(service_type, "Unassigned"),
+                    "revenue": float(amount),
+                    "share": _rate(amount, total),
+                }
+                for service_type, amount in sorted(totals[row_year].items(), key=lambda item: -item[1])
+            ],
+        })
+    return {"years": years}
+
+
+def lifetime_value():
+    revenue = MonthlyServiceRevenue.objects.aggregate(total=models.Sum("revenue"))["total"] or Decimal("0")
+    customers = MonthlyActivity.objects.aggregate(total=models.Sum("new_customers"))["total"] or 0
+    return {
+        "customers": customers,
+        "revenue": float(revenue),
+        "average_lifetime_value": round(float(revenue) / customers, 2) if customers else 0.0,
+    }
+
+
+def month_range(year=None, months=12):
+    """The months of `year`, or the last `months` months up to the current one."""
+    if year is not None:
+        return [datetime.date(year, index, 1) for index in range(1, 13)]
+    last = current_month()
+    return [add_months(last, offset) for offset in range(1 - months, 1)]
+
+
+def new_customers_by_month(year=None):
+    months = month_range(year)
+    counts = dict(
+        MonthlyActivity.objects.filter(month__gte=months[0], month__lte=months[-1]).values_list("month", "new_customers")
+    )
+    return {"months": [{"month": f"{month:%Y-%m}", "count": counts.get(month, 0)} for month in months]}
+
+
+def completion_rate(year=None):
+    """
+    Completed vs. created services, all time or for `year`. Monthly figures are
+    counts only: services complete in a later month than they were created in,
+    so a per-month ratio would mix different services.
+    """
+    months = month_range(year)
+    activity = MonthlyActivity.objects.all()
+    if year is not None:
+        activity = activity.filter(month__gte=months[0], month__lte=months[-1])
+    overall = activity.aggregate(created=models.Sum("services_created"), completed=models.Sum("services_completed"))
+    created, completed = overall["created"] or 0, overall["completed"] or 0
+    rows = {
+        month: (month_created, month_completed)
+        for month, month_created, month_completed in MonthlyActivity.objects.filter(
+            month__gte=months[0], month__lte=months[-1]
+        ).values_list("month", "services_created", "services_completed")
+    }
+    return {
+        "total": created,
+        "completed": completed,
+        "rate": _rate(completed, created),
+        "months": [
+            {"month": f"{month:%Y-%m}", "total": rows.get(month, (0, 0))[0], "completed": rows.get(month, (0, 0))[1]}
+            for month in months
+        ],
+    }
@@ -0,0 +1,198 @@
+"""
+Daily route ordering for technicians (`GET /api/technicians/<id>/route/`).
+
+A technician's stops for a day are the open services assigned to them and
+scheduled that day, located by their memorial's plot. The travel cost
+between plots is the great-circle distance, computed for every pair at
+once as a NumPy matrix and cached per set of plots and coordinates, so
+re-planning the same day (or any day over the same plots) skips it.
+
+The route is an open path: the day starts at whichever stop the order puts
+first. Nearest neighbour is run from every stop simultaneously, one
+vectorized step per stop, and the shortest result and the scheduled order
+are each improved with 2-opt until no segment reversal shortens them;
+the better of the two is the suggested order, so it is never longer than
+the scheduled one. The open path is solved as a closed tour with one extra
+node at zero distance from every stop, which lets the endpoints move too.
+"""
+import hashlib
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Q
+
+from core.denormalized import ACTIVE_SERVICE_STATUSES
+from core.geohash import EARTH_RADIUS_M
+from core.models import Service
+from core.rollups import day_bounds
+
+
+MATRIX_PREFIX = "core:routes:matrix:"
+MATRIX_TIMEOUT = 24 * 60 * 60
+# Improvements smaller than this many metres do not count, so 2-opt cannot cycle on rounding.
+MIN_GAIN_M = 1e-6
+
+
+def distance_matrix(lats, lngs):
+    """Haversine distance in metres between every pair of points, as an (n, n) array."""
+    lat, lng = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lngs, dtype=float))
+    half_dlat = (lat[:, None] - lat[None, :]) / 2
+    half_dlng = (lng[:, None] - lng[None, :]) / 2
+    cos_lat = np.cos(lat)
+    a = np.sin(half_dlat) ** 2 + cos_lat[:, None] * cos_lat[None, :] * np.sin(half_dlng) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def plot_matrix(points):
+    """
+    `(plot ids, matrix)` for `{plot_id: (lat, lng)}`, rows in plot id order;
+    cached under the plot ids and coordinates.
+    """
+    plot_ids = sorted(points)
+    digest = hashlib.sha1(repr([(plot_id, *points[plot_id]) for plot_id in plot_ids]).encode()).hexdigest()
+    key = f"{MATRIX_PREFIX}{digest}"
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = distance_matrix([points[plot_id][0] for plot_id in plot_ids], [points[plot_id][1] for plot_id in plot_ids])
+        cache.set(key, matrix, timeout=MATRIX_TIMEOUT)
+    return plot_ids, matrix
+
+
+def path_length(order, matrix):
+    order = np.asarray(order)
+    return float(matrix[order[:-1], order[1:]].sum()) if len(order) > 1 else 0.0
+
+
+def nearest_neighbour(matrix):
+    """The shortest of the nearest-neighbour paths started from each node, all grown in step."""
+    n = len(matrix)
+    starts = np.arange(n)
+    paths = np.empty((n, n), dtype=np.intp)
+    paths[:, 0] = starts
+    visited = np.zeros((n, n), dtype=bool)
+    visited[starts, starts] = True
+    for step in range(1, n):
+        distances = np.where(visited, np.inf, matrix[paths[:, step - 1]])
+        following = distances.argmin(axis=1)
+        paths[:, step] = following
+        visited[starts, following] = True
+    lengths = matrix[paths[:, :-1], paths[:, 1:]].sum(axis=1)
+    return paths[lengths.argmin()]
+
+
+def two_opt(order, matrix):
+    """
+    `order` improved by 2-opt: repeatedly reverse the segment whose reversal
+    shortens the open path most, until none does.
+    """
+    n = len(order)
+    if n < 3:
+        return np.asarray(order)
+    # Node n is the free endpoint: zero distance to everything closes the path into a tour.
+    closed = np.zeros((n + 1, n + 1))
+    closed[:n, :n] = matrix
+    tour = np.append(np.asarray(order, dtype=np.intp), n)
+    size = n + 1
+    first, last = np.triu_indices(size, 2)
+    # Reversing everything between the first and last edge of a tour changes nothing.
+    keep = ~((first == 0) & (last == size - 1))
+    first, last = first[keep], last[keep]
+    for _round in range(size * size):
+        following = np.roll(tour, -1)
+        a, b, c, d = tour[first], following[first], tour[last], following[last]
+        gain = closed[a, b] + closed[c, d] - closed[a, c] - closed[b, d]
+        best = gain.argmax()
+        if gain[best] <= MIN_GAIN_M:
+            break
+        start, end = first[best] + 1, last[best] + 1
+        tour[start:end] = tour[start:end][::-1]
+    # Open the tour at the free endpoint.
+    free = int(np.flatnonzero(tour == n)[0])
+    return np.concatenate([tour[free + 1:], tour[:free]])
+
+
+def best_order(matrix, scheduled):
+    """The shorter of 2-opt from nearest neighbour and 2-opt from the `scheduled` order."""
+    if len(scheduled) < 3:
+        return np.asarray(scheduled)
+    candidates = [two_opt(nearest_neighbour(matrix), matrix), two_opt(scheduled, matrix)]
+    return min(candidates, key=lambda order: path_length(order, matrix))
+
+
+def day_services(technician_id, day):
+    """Open services assigned to the technician on `day`, in scheduled order."""
+    start, end = day_bounds(day)
+    return (
+        Service.objects.filter(
+            Q(scheduled_start__gte=start, scheduled_start__lt=end) | Q(scheduled_start__isnull=True, scheduled_date=day),
+            assignments__employee_id=technician_id,
+            status__in=ACTIVE_SERVICE_STATUSES,
+        )
+        .distinct()
+        .order_by("scheduled_start", "id")
+        .values(
+            "id",
+            "status",
+            "service_type",
+            "scheduled_start",
+            "estimated_minutes",
+            "memorial_id",
+            "memorial__customer__full_name",
+            "memorial__plot_id",
+            "memorial__plot__cemetery__name",
+            "memorial__plot__gps_lat",
+            "memorial__plot__gps_lng",
+        )
+    )
+
+
+def plan_route(technician_id, day):
+    """
+    The technician's stops on `day` in suggested order, with the distance of
+    each leg, the travel distance in scheduled and suggested order, and the
+    services that could not be placed for lack of plot coordinates.
+    """
+    stops, unlocated = [], []
+    for row in day_services(technician_id, day):
+        lat, lng = row.pop("memorial__plot__gps_lat"), row.pop("memorial__plot__gps_lng")
+        stop = {
+            "service_id": row["id"],
+            "status": row["status"],
+            "service_type": row["service_type"],
+            "scheduled_start": row["scheduled_start"],
+            "estimated_minutes": row["estimated_minutes"],
+            "memorial_id": row["memorial_id"],
+            "memorial_name": row["memorial__customer__full_name"],
+            "cemetery_name": row["memorial__plot__cemetery__name"],
+            "plot_id": row["memorial__plot_id"],
+            "gps_lat": lat,
+            "gps_lng": lng,
+        }
+        (unlocated if lat is None or lng is None else stops).append(stop)
+
+    scheduled_m = optimized_m = 0.0
+    if stops:
+        # Several services at one plot share a row of the matrix.
+        points = {stop["plot_id"]: (float(stop["gps_lat"]), float(stop["gps_lng"])) for stop in stops}
+        plot_ids, plot_distances = plot_matrix(points)
+        rows = np.searchsorted(plot_ids, [stop["plot_id"] for stop in stops])
+        matrix = plot_distances[np.ix_(rows, rows)]
+        scheduled = np.arange(len(stops))
+        order = best_order(matrix, scheduled)
+        scheduled_m, optimized_m = path_length(scheduled, matrix), path_length(order, matrix)
+        previous = None
+        for position, index in enumerate(order, start=1):
+            stop = stops[index]
+            stop["order"] = position
+            stop["scheduled_order"] = int(index) + 1
+            stop["leg_m"] = None if previous is None else round(float(matrix[previous, index]), 1)
+            previous = index
+        stops = [stops[index] for index in order]
+
+    return {
+        "stops": stops,
+        "unlocated": unlocated,
+        "scheduled_distance_m": round(scheduled_m, 1),
+        "optimized_distance_m": round(optimized_m, 1),
+        "saved_m": round(scheduled_m - optimized_m, 1),
+    }
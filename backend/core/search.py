@@ -0,0 +1,201 @@
+"""
+Full-text search over customers, memorials, cemeteries, services and staff.
+
+Each indexed row has one `SearchDocument` holding its searchable fields
+joined into `body`; core.signals rewrites it when one of those fields
+changes and deletes it with the row. The database indexes `body` itself
+(see migration 0015): FTS5 on SQLite, ranked with `bm25()` and excerpted
+with `snippet()`; a `tsvector` column with a GIN index on PostgreSQL,
+ranked with `ts_rank_cd()` and excerpted with `ts_headline()`. Other
+backends fall back to an unranked `icontains` scan.
+
+Every word of the query must match, as a prefix, so results narrow as the
+user types. `matching_ids()` answers the same word-prefix match for one
+kind as an id subquery, which the list endpoints filter on
+(`core.api.filters.SearchFilter`).
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from core.models import Cemetery, Customer, Employee, Memorial, SearchDocument, Service
+
+
+# Kind -> (model, indexed fields, label paths: title, subtitle).
+SEARCH_MODELS = {
+    "customer": (Customer, ("full_name", "email", "phone"), ("full_name", "email")),
+    "memorial": (
+        Memorial,
+        ("inscription_text", "condition_summary", "notes"),
+        ("customer__full_name", "plot__cemetery__name"),
+    ),
+    "cemetery": (Cemetery, ("name", "city"), ("name", "city")),
+    "service": (Service, ("internal_notes",), ("memorial__customer__full_name", "service_type")),
+    "employee": (Employee, ("full_name", "email"), ("full_name", "email")),
+}
+KINDS = {model: kind for kind, (model, _fields, _labels) in SEARCH_MODELS.items()}
+
+FTS_TABLE = "core_searchdocument_fts"
+MAX_TERMS = 8
+SNIPPET_WORDS = 12
+# Highlight markers; control characters never occur in the indexed text.
+START, STOP = "\x02", "\x03"
+
+
+def document_body(values):
+    return "\n".join(str(value) for value in values if value)
+
+
+def index_object(instance):
+    """Write (or drop, when all its fields are blank) the document of `instance`."""
+    kind = KINDS[type(instance)]
+    _model, fields, _labels = SEARCH_MODELS[kind]
+    body = document_body(getattr(instance, name) for name in fields)
+    if body:
+        SearchDocument.objects.update_or_create(kind=kind, object_id=instance.pk, defaults={"body": body})
+    else:
+        remove_object(type(instance), instance.pk)
+
+
+def remove_object(model, object_id):
+    SearchDocument.objects.filter(kind=KINDS[model], object_id=object_id).delete()
+
+
+def rebuild_index(batch_size=2000):
+    """Recreate every document from the source tables; returns the number written."""
+    SearchDocument.objects.all().delete()
+    written = 0
+    for kind, (model, fields, _labels) in SEARCH_MODELS.items():
+        batch = []
+        for object_id, *values in model.objects.order_by().values_list("id", *fields).iterator(chunk_size=batch_size):
+            body = document_body(values)
+            if body:
+                batch.append(SearchDocument(kind=kind, object_id=object_id, body=body))
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+        written += len(batch)
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return written
+
+
+def query_terms(text):
+    """Words of the query, lowercased; anything else (operators, quotes) is dropped."""
+    return re.findall(r"\w+", text.lower())[:MAX_TERMS]
+
+
+def _kind_clause(kinds, column):
+    if not kinds:
+        return "", []
+    return f" AND {column} IN ({', '.join(['%s'] * len(kinds))})", list(kinds)
+
+
+def _sqlite_matches(terms, kinds, limit):
+    match = " ".join(f'"{term}"*' for term in terms)
+    kind_sql, kind_params = _kind_clause(kinds, "d.kind")
+    sql = (
+        f"SELECT d.kind, d.object_id, snippet({FTS_TABLE}, 0, %s, %s, '…', %s), bm25({FTS_TABLE}) AS score "
+        f"FROM {FTS_TABLE} JOIN core_searchdocument d ON d.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s{kind_sql} ORDER BY score LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [START, STOP, SNIPPET_WORDS, match, *kind_params, limit])
+        # bm25() is lower for better matches; flip it so higher is better on every backend.
+        return [(kind, object_id, snippet, -score) for kind, object_id, snippet, score in cursor.fetchall()]
+
+
+def _postgres_matches(terms, kinds, limit):
+    query = " & ".join(f"{term}:*" for term in terms)
+    options = f"StartSel={START}, StopSel={STOP}, MaxWords={SNIPPET_WORDS}, MinWords=4, MaxFragments=1"
+    kind_sql, kind_params = _kind_clause(kinds, "kind")
+    sql = (
+        "SELECT kind, object_id, ts_headline('simple', body, query, %s), ts_rank_cd(search_vector, query) AS score "
+        "FROM core_searchdocument, to_tsquery('simple', %s) query "
+        f"WHERE search_vector @@ query{kind_sql} ORDER BY score DESC LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [options, query, *kind_params, limit])
+        return cursor.fetchall()
+
+
+def _scan_matches(terms, kinds, limit):
+    qs = SearchDocument.objects.order_by("id")
+    for term in terms:
+        qs = qs.filter(body__icontains=term)
+    if kinds:
+        qs = qs.filter(kind__in=kinds)
+    return [(kind, object_id, body[:200], 0.0) for kind, object_id, body in qs.values_list("kind", "object_id", "body")[:limit]]
+
+
+def matching_ids(term, kind):
+    """
+    Ids of the `kind` rows with a word starting with `term` (one of
+    `query_terms()`), as a subquery for `__in` lookups.
+    """
+    if connection.vendor == "sqlite":
+        return RawSQL(
+            # CROSS JOIN keeps SQLite from driving the join from every document of the kind.
+            f"SELECT d.object_id FROM {FTS_TABLE} CROSS JOIN core_searchdocument d ON d.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND d.kind = %s",
+            [f'"{term}"*', kind],
+        )
+    if connection.vendor == "postgresql":
+        return RawSQL(
+            "SELECT object_id FROM core_searchdocument WHERE search_vector @@ to_tsquery('simple', %s) AND kind = %s",
+            [f"{term}:*", kind],
+        )
+    return SearchDocument.objects.filter(kind=kind, body__icontains=term).values("object_id")
+
+
+def snippet_segments(snippet):
+    """Split a marked-up snippet into `{"text", "match"}` runs, so clients never render raw markup."""
+    segments, match = [], False
+    for part in re.split(f"([{START}{STOP}])", snippet):
+        if part in (START, STOP):
+            match = part == START
+        elif part:
+            segments.append({"text": part, "match": match})
+    return segments
+
+
+def labels(hits):
+    """`(kind, object_id) -> (title, subtitle)` for the hits, one query per kind."""
+    by_kind = {}
+    for kind, object_id, _snippet, _score in hits:
+        by_kind.setdefault(kind, []).append(object_id)
+    found = {}
+    for kind, ids in by_kind.items():
+        model, _fields, (title, subtitle) = SEARCH_MODELS[kind]
+        for object_id, title_value, subtitle_value in model.objects.filter(id__in=ids).values_list("id", title, subtitle):
+            found[kind, object_id] = (title_value, subtitle_value)
+    return found
+
+
+def search(text, kinds=None, limit=20):
+    """Best matches for `text`, optionally restricted to `kinds`, best first."""
+    terms = query_terms(text)
+    if not terms:
+        return []
+    matcher = {"sqlite": _sqlite_matches, "postgresql": _postgres_matches}.get(connection.vendor, _scan_matches)
+    hits = matcher(terms, kinds, limit)
+    found = labels(hits)
+
+    results = []
+    for kind, object_id, snippet, score in hits:
+        if (kind, object_id) not in found:
+            continue
+        title, subtitle = found[kind, object_id]
+        results.append({
+            "kind": kind,
+            "id": object_id,
+            "title": title,
+            "subtitle": subtitle or "",
+            "snippet": snippet_segments(snippet),
+            "score": round(float(score), 4),
+        })
+    return results
@@ -0,0 +1,257 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core import autocomplete, clusters, spatial
+from core.denormalized import (
+    plot_cemeteries,
+    refresh_counters,
+    refresh_current_price,
+    refresh_last_service,
+    refresh_memorial_counters,
+    service_employees,
+)
+from core.events import publish
+from core.generations import bump_generation
+from core.search import KINDS as SEARCH_KINDS, SEARCH_MODELS, index_object, remove_object
+from core.sync import is_synced, record_change
+from core.models import (
+    Cemetery,
+    Customer,
+    Employee,
+    Invoice,
+    Memorial,
+    Plot,
+    Service,
+    ServiceAssignment,
+    ServiceEvent,
+    SyncChange,
+)
+from core.rollups import (
+    invoice_day,
+    local_day,
+    refresh_daily_metrics,
+    refresh_monthly_reports,
+    scheduled_days,
+    service_days,
+)
+
+
+SERVICE_METRIC_FIELDS = ("created_at", "completed_date", "scheduled_start", "scheduled_date")
+AUTOCOMPLETE_MODELS = (Customer, Cemetery, Plot, Memorial, Employee)
+MAP_MODELS = (Plot, Memorial, Service)
+# Append-only logs that no cached response is derived from.
+UNVERSIONED_MODELS = (ServiceEvent, SyncChange)
+
+
+def _service_metric_days(instance, previous=True):
+    days = service_days(*(getattr(instance, name) for name in SERVICE_METRIC_FIELDS))
+    if previous:
+        days |= service_days(*(instance.loaded_value(name) for name in SERVICE_METRIC_FIELDS))
+    return days
+
+
+@receiver(post_save, sender=Service, dispatch_uid="service_saved_refresh_memorial")
+def service_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.has_changed("memorial_id", "status", "completed_date"):
+        memorial_ids = [instance.memorial_id, instance.loaded_value("memorial_id")]
+        refresh_last_service(memorial_ids)
+        refresh_memorial_counters(memorial_ids)
+    if not created and instance.has_changed("status"):
+        refresh_counters(Employee, service_employees([instance.pk]))
+    if created or instance.has_changed("status", *SERVICE_METRIC_FIELDS):
+        days = _service_metric_days(instance, previous=not created)
+        refresh_daily_metrics(days)
+        refresh_monthly_reports(days)
+    if not created and instance.has_changed("service_type"):
+        # Moves this service's invoices between revenue buckets; only the open month is refreshed.
+        refresh_monthly_reports()
+
+
+@receiver(post_delete, sender=Service, dispatch_uid="service_deleted_refresh_memorial")
+def service_deleted(sender, instance, **kwargs):
+    refresh_last_service([instance.memorial_id])
+    refresh_memorial_counters([instance.memorial_id])
+    days = _service_metric_days(instance, previous=False)
+    refresh_daily_metrics(days)
+    # Its invoices were unlinked and now count as unassigned revenue in the open month too.
+    refresh_monthly_reports(days | {timezone.localdate()})
+
+
+@receiver(post_save, sender=ServiceAssignment, dispatch_uid="assignment_saved_refresh_metrics")
+@receiver(post_delete, sender=ServiceAssignment, dispatch_uid="assignment_deleted_refresh_metrics")
+def assignment_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_daily_metrics(scheduled_days([instance.service_id]))
+
+
+@receiver(post_save, sender=ServiceAssignment, dispatch_uid="assignment_saved_refresh_counters")
+def assignment_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.has_changed("employee_id", "service_id"):
+        refresh_counters(Employee, [instance.employee_id, instance.loaded_value("employee_id")])
+
+
+@receiver(post_delete, sender=ServiceAssignment, dispatch_uid="assignment_deleted_refresh_counters")
+def assignment_deleted(sender, instance, **kwargs):
+    refresh_counters(Employee, [instance.employee_id])
+
+
+@receiver(post_save, sender=Memorial, dispatch_uid="memorial_saved_refresh_counters")
+def memorial_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.has_changed("customer_id", "plot_id"):
+        refresh_counters(Customer, [instance.customer_id, instance.loaded_value("customer_id")])
+        refresh_counters(Cemetery, plot_cemeteries([instance.plot_id, instance.loaded_value("plot_id")]))
+
+
+@receiver(post_delete, sender=Memorial, dispatch_uid="memorial_deleted_refresh_counters")
+def memorial_deleted(sender, instance, **kwargs):
+    refresh_counters(Customer, [instance.customer_id])
+    refresh_counters(Cemetery, plot_cemeteries([instance.plot_id]))
+
+
+@receiver(post_save, sender=Plot, dispatch_uid="plot_saved_refresh_counters")
+def plot_saved(sender, instance, created=False, raw=False, **kwargs):
+    # A new plot has no memorials yet, and PROTECT keeps plots with memorials from being deleted.
+    if raw or created:
+        return
+    if instance.has_changed("cemetery_id"):
+        refresh_counters(Cemetery, [instance.cemetery_id, instance.loaded_value("cemetery_id")])
+
+
+@receiver(post_save, sender=Invoice, dispatch_uid="invoice_saved_refresh_service")
+def invoice_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_current_price([instance.service_id, instance.loaded_value("service_id")], invoice=instance, created=created)
+    if created or instance.has_changed("total_amount", "issued_date", "service_id"):
+        days = {
+            invoice_day(instance.issued_date, instance.created_at),
+            invoice_day(instance.loaded_value("issued_date"), instance.created_at),
+        }
+        refresh_daily_metrics(days)
+        refresh_monthly_reports(days)
+
+
+@receiver(post_delete, sender=Invoice, dispatch_uid="invoice_deleted_refresh_service")
+def invoice_deleted(sender, instance, **kwargs):
+    refresh_current_price([instance.service_id])
+    days = {invoice_day(instance.issued_date, instance.created_at)}
+    refresh_daily_metrics(days)
+    refresh_monthly_reports(days)
+
+
+@receiver(post_save, sender=Customer, dispatch_uid="customer_saved_refresh_reports")
+def customer_saved(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        refresh_monthly_reports({local_day(instance.created_at)})
+
+
+@receiver(post_delete, sender=Customer, dispatch_uid="customer_deleted_refresh_reports")
+def customer_deleted(sender, instance, **kwargs):
+    refresh_monthly_reports({local_day(instance.created_at)})
+
+
+@receiver(post_save, dispatch_uid="core_model_saved_bump_generation")
+@receiver(post_delete, dispatch_uid="core_model_deleted_bump_generation")
+def model_written(sender, **kwargs):
+    # auth is included for the usernames shown in the employee lists.
+    if sender._meta.app_label not in ("core", "auth") or sender in UNVERSIONED_MODELS:
+        return
+    bump_generation(sender)
+
+
+@receiver(post_save, dispatch_uid="synced_model_saved_log_change")
+@receiver(post_delete, dispatch_uid="synced_model_deleted_log_change")
+def synced_model_written(sender, instance, raw=False, **kwargs):
+    if not raw and is_synced(sender):
+        record_change(sender, instance.pk)
+
+
+@receiver(post_save, sender=Service, dispatch_uid="service_saved_publish_event")
+def service_saved_event(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        publish("service.created", instance.pk)
+    elif instance.has_changed("status"):
+        publish("service.status", instance.pk)
+    else:
+        publish("service.updated", instance.pk)
+
+
+@receiver(post_delete, sender=Service, dispatch_uid="service_deleted_publish_event")
+def service_deleted_event(sender, instance, **kwargs):
+    publish("service.deleted", instance.pk)
+
+
+@receiver(post_save, sender=ServiceAssignment, dispatch_uid="assignment_saved_publish_event")
+@receiver(post_delete, sender=ServiceAssignment, dispatch_uid="assignment_deleted_publish_event")
+def assignment_changed_event(sender, instance, raw=False, **kwargs):
+    if not raw:
+        publish("service.assigned", instance.service_id)
+
+
+@receiver(post_save, sender=Invoice, dispatch_uid="invoice_saved_publish_event")
+def invoice_saved_event(sender, instance, raw=False, **kwargs):
+    # The board shows the current price, which core.denormalized updates without a Service save.
+    if not raw and instance.has_changed("total_amount", "service_id"):
+        publish("service.updated", instance.service_id)
+        if instance.has_changed("service_id"):
+            publish("service.updated", instance.loaded_value("service_id"))
+
+
+@receiver(post_save, dispatch_uid="searchable_model_saved_reindex")
+def searchable_model_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw or sender not in SEARCH_KINDS:
+        return
+    _model, fields, _labels = SEARCH_MODELS[SEARCH_KINDS[sender]]
+    if created or instance.has_changed(*fields):
+        index_object(instance)
+
+
+@receiver(post_delete, dispatch_uid="searchable_model_deleted_unindex")
+def searchable_model_deleted(sender, instance, **kwargs):
+    if sender in SEARCH_KINDS:
+        remove_object(sender, instance.pk)
+
+
+@receiver(post_save, dispatch_uid="autocomplete_model_saved_refresh")
+def autocomplete_model_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and sender in AUTOCOMPLETE_MODELS:
+        autocomplete.object_saved(instance, created)
+
+
+@receiver(post_delete, dispatch_uid="autocomplete_model_deleted_refresh")
+def autocomplete_model_deleted(sender, instance, **kwargs):
+    if sender in AUTOCOMPLETE_MODELS:
+        autocomplete.object_deleted(instance)
+
+
+@receiver(post_save, sender=Plot, dispatch_uid="plot_saved_refresh_grid")
+def plot_saved_grid(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        spatial.plot_saved(instance, created)
+
+
+@receiver(post_delete, sender=Plot, dispatch_uid="plot_deleted_refresh_grid")
+def plot_deleted_grid(sender, instance, **kwargs):
+    spatial.plot_deleted(instance)
+
+
+@receiver(post_save, dispatch_uid="map_model_saved_invalidate_tiles")
+def map_model_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and sender in MAP_MODELS:
+        clusters.object_saved(instance, created)
+
+
+@receiver(post_delete, dispatch_uid="map_model_deleted_invalidate_tiles")
+def map_model_deleted(sender, instance, **kwargs):
+    if sender in MAP_MODELS:
+        clusters.object_deleted(instance)
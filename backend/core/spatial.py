@@ -0,0 +1,114 @@
+"""
+Radius and bounding-box lookups over `Plot` coordinates
+(`GET /api/plots/nearby/`).
+
+Every located plot stores the geohash of its coordinates (core.geohash,
+kept in step by `Plot.save()`). A query box is covered by at most
+`MAX_CELLS` geohash cells, each one prefix range; rows in those ranges are
+the coarse candidates, and an exact box or haversine check on their
+coordinates is the refine step.
+
+The ranges are read from `PLOT_GRID`, an in-process copy of
+`(geohash, lat, lng)` per plot (a `core.indexes.SortedIndex`, refreshed
+from core.signals), so lookups do not query the database. Above
+`MAX_POINTS` located plots the grid is not kept and the same ranges become
+`geohash` range scans on the indexed column, which works on any backend,
+SQLite without extensions included.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Q
+
+from core.geohash import RANGE_END, covering, haversine_m, point_hash, radius_box, split_box
+from core.indexes import SortedIndex
+from core.models import Plot
+
+
+MAX_POINTS = 200_000
+MAX_CELLS = 16
+
+
+class PlotGrid(SortedIndex):
+    """Located plots by geohash; entries are `(geohash, lat, lng)`."""
+
+    def __init__(self):
+        super().__init__("spatial:plots", MAX_POINTS)
+
+    def queryset(self):
+        return Plot.objects.filter(gps_lat__isnull=False, gps_lng__isnull=False)
+
+    def rows(self, qs):
+        for object_id, geohash, lat, lng in qs.values_list("id", "geohash", "gps_lat", "gps_lng").iterator(
+            chunk_size=2000
+        ):
+            yield object_id, (geohash or point_hash(lat, lng), float(lat), float(lng))
+
+    def keys(self, entry):
+        return (entry[0],)
+
+    def points(self, prefixes):
+        """`(id, lat, lng)` of the plots in the cells `prefixes`."""
+        with self.lock:
+            found = []
+            for prefix in prefixes:
+                start, end = self.span(prefix)
+                for object_id in self.ids[start:end]:
+                    _geohash, lat, lng = self.entries[object_id]
+                    found.append((object_id, lat, lng))
+            return found
+
+
+PLOT_GRID = PlotGrid()
+
+
+def _database_points(prefixes):
+    match = Q()
+    for prefix in prefixes:
+        match |= Q(geohash__gte=prefix, geohash__lt=prefix + RANGE_END)
+    rows = Plot.objects.filter(match).values_list("id", "gps_lat", "gps_lng")
+    return [(object_id, float(lat), float(lng)) for object_id, lat, lng in rows]
+
+
+def points_in_box(south, west, north, east):
+    """`(id, lat, lng)` of every located plot inside the box (west > east crosses the antimeridian)."""
+    PLOT_GRID.ensure_current()
+    found = []
+    for box in split_box(south, west, north, east):
+        prefixes = covering(*box, max_cells=MAX_CELLS)
+        candidates = _database_points(prefixes) if PLOT_GRID.overflow else PLOT_GRID.points(prefixes)
+        b_south, b_west, b_north, b_east = box
+        found += [
+            (object_id, lat, lng) for object_id, lat, lng in candidates
+            if b_south <= lat <= b_north and b_west <= lng <= b_east
+        ]
+    return found
+
+
+def within(south, west, north, east, limit):
+    """Ids of up to `limit` plots inside the box, by id, and the total number inside it."""
+    ids = sorted(object_id for object_id, _lat, _lng in points_in_box(south, west, north, east))
+    return ids[:limit], len(ids)
+
+
+def nearby(lat, lng, radius_m, limit, exclude=None):
+    """`[(id, distance_m), ...]` of up to `limit` plots within `radius_m`, nearest first, and the total."""
+    found = []
+    for object_id, plot_lat, plot_lng in points_in_box(*radius_box(lat, lng, radius_m)):
+        if object_id == exclude:
+            continue
+        distance = haversine_m(lat, lng, plot_lat, plot_lng)
+        if distance <= radius_m:
+            found.append((object_id, distance))
+    found.sort(key=lambda item: (item[1], item[0]))
+    return found[:limit], len(found)
+
+
+def plot_saved(instance, created):
+    """Schedule the grid update for a saved plot; see core.signals."""
+    if created or instance.has_changed("gps_lat", "gps_lng"):
+        transaction.on_commit(partial(PLOT_GRID.refresh, [instance.pk]))
+
+
+def plot_deleted(instance):
+    transaction.on_commit(partial(PLOT_GRID.refresh, [instance.pk]))
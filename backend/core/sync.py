@@ -0,0 +1,237 @@
+"""
+Delta sync for clients that keep a local mirror of the scheduling data.
+
+Every save or delete of a synced model writes a `SyncChange` row in the
+same transaction (core.signals; core.denormalized does the same for its
+set-based updates). `changes_since(cursor)` returns the current rows of
+every object changed after the cursor, the ids of those that no longer
+exist, and a new cursor to pass next time.
+
+Change ids are handed out when a transaction inserts the row, not when it
+commits, so they cannot be the cursor: a long transaction can commit an id
+below one a client has already synced past. Instead each sync first stamps
+the committed changes that have no `sequence` yet with the next sequence
+numbers, one sync at a time (an advisory lock on PostgreSQL, SQLite's
+single writer otherwise), and the cursor is the highest sequence stamped.
+A change therefore always gets a sequence above every cursor handed out
+before it became visible, however long its transaction ran.
+
+Rows are read after stamping, so a change can show up in one sync and
+again in the next; clients apply changes as idempotent upserts.
+
+A missing cursor, or one from before the oldest change kept (see
+`prune_changes`), gets a full snapshot (`"full": true`): the client
+replaces its mirror instead of merging. The snapshot comes in pages of
+`SNAPSHOT_PAGE_SIZE` rows, walking `SYNC_MODELS` in order and each model by
+id (`core.api.pagination.Keyset`); `"next"` is the token for the following
+page and is null on the last one. Every page carries the cursor stamped when
+the snapshot started, and the client syncs from that cursor once it has all
+the pages: rows changed while it was paging have higher sequences, so the
+first delta brings them (and any deletions) up to date.
+
+Reads write: `changes_since` stamps pending changes before reading, so a
+sync request needs a writable connection and cannot be served by a read
+replica. Stamping only numbers changes that are already committed, so it is
+safe to repeat; snapshot pages after the first do not stamp at all.
+"""
+import datetime
+
+from django.db import connection, transaction
+from django.db.models import F, Max, Min, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+
+from core.api.pagination import Keyset
+from core.models import Customer, Employee, Memorial, Service, ServiceAssignment, SyncChange
+
+
+CHANGE_RETENTION = datetime.timedelta(days=30)
+# Ids per `id__in` query when loading changed rows.
+LOAD_BATCH_SIZE = 500
+# Rows per full snapshot page, across all models.
+SNAPSHOT_PAGE_SIZE = 1000
+SNAPSHOT_KEYSET = Keyset("id")
+# pg_advisory_xact_lock key serializing the stamping of new changes.
+STAMP_LOCK_ID = 0x73796E63
+
+# Response key -> (model, fields). Related rows are referenced by id; clients join locally.
+SYNC_MODELS = {
+    "services": (
+        Service,
+        (
+            "id",
+            "memorial_id",
+            "service_type",
+            "status",
+            "scheduled_start",
+            "scheduled_date",
+            "estimated_minutes",
+            "completed_date",
+            "current_price",
+            "internal_notes",
+            "created_at",
+            "updated_at",
+        ),
+    ),
+    "memorials": (
+        Memorial,
+        (
+            "id",
+            "customer_id",
+            "plot_id",
+            "material",
+            "inscription_text",
+            "last_service_status",
+            "last_service_date",
+            "updated_at",
+        ),
+    ),
+    "customers": (
+        Customer,
+        ("id", "full_name", "email", "phone", "memorials_count", "last_contact", "updated_at"),
+    ),
+    "employees": (
+        Employee,
+        ("id", "full_name", "email", "phone", "role", "is_active", "updated_at"),
+    ),
+    "assignments": (
+        ServiceAssignment,
+        ("id", "service_id", "employee_id", "role", "updated_at"),
+    ),
+}
+SYNCED_LABELS = {model._meta.label_lower: name for name, (model, _fields) in SYNC_MODELS.items()}
+
+
+def is_synced(model):
+    return model._meta.label_lower in SYNCED_LABELS
+
+
+def _batches(ids, size=LOAD_BATCH_SIZE):
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def stamp_changes():
+    """
+    Give committed changes without a sequence the next sequence numbers, in
+    id order; returns the highest sequence stamped so far (0 if none).
+    """
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [STAMP_LOCK_ID])
+        pending = SyncChange.objects.filter(sequence__isnull=True)
+        top = SyncChange.objects.filter(sequence__isnull=False).order_by("-sequence").values("sequence")[:1]
+        first = pending.order_by("id").values("id")[:1]
+        # One statement, so SQLite takes its write lock before reading the current top.
+        pending.update(sequence=Coalesce(Subquery(top), Value(0)) + F("id") - Subquery(first) + 1)
+        return SyncChange.objects.aggregate(top=Max("sequence"))["top"] or 0
+
+
+def changes_since(cursor=None):
+    """
+    Changed and deleted rows since `cursor` (a sequence returned by an earlier
+    sync, or None for a full snapshot), as `{"cursor", "full", "changes", "deleted"}`.
+    """
+    top = stamp_changes()
+    oldest = SyncChange.objects.aggregate(oldest=Min("sequence"))["oldest"]
+    full = cursor is None or cursor > top or (oldest is not None and cursor < oldest)
+
+    if full:
+        return snapshot_page(top)
+
+    changes = {name: [] for name in SYNC_MODELS}
+    deleted = {name: [] for name in SYNC_MODELS}
+    changed = {name: set() for name in SYNC_MODELS}
+    for label, object_id in (
+        SyncChange.objects.filter(sequence__gt=cursor, sequence__lte=top, model__in=SYNCED_LABELS)
+        .values_list("model", "object_id")
+        .distinct()
+    ):
+        changed[SYNCED_LABELS[label]].add(object_id)
+
+    for name, (model, fields) in SYNC_MODELS.items():
+        for ids in _batches(changed[name]):
+            rows = list(model.objects.filter(id__in=ids).order_by("id").values(*fields))
+            changes[name].extend(rows)
+            found = {row["id"] for row in rows}
+            deleted[name].extend(object_id for object_id in ids if object_id not in found)
+    return {"cursor": top, "full": False, "changes": changes, "deleted": deleted, "next": None}
+
+
+def _page_token(top, name, row=None):
+    position = SNAPSHOT_KEYSET.encode_cursor(row, "n") if row is not None else ""
+    return f"{top}.{name}.{position}"
+
+
+def _decode_page_token(token):
+    try:
+        top, name, position = token.split(".")
+        top = int(top)
+    except ValueError:
+        raise NotFound("Invalid cursor.")
+    if name not in SYNC_MODELS or top < 0:
+        raise NotFound("Invalid cursor.")
+    values = SNAPSHOT_KEYSET.decode_cursor(position)[1] if position else None
+    return top, name, values
+
+
+def snapshot_page(top, token=None, limit=None):
+    """
+    One page of the full snapshot as of cursor `top`: the first page, or the
+    one `token` (a previous page's `"next"`) points at. Pages after the first
+    take `top` from the token.
+    """
+    names = list(SYNC_MODELS)
+    start, values = names[0], None
+    if token is not None:
+        top, start, values = _decode_page_token(token)
+
+    changes = {name: [] for name in SYNC_MODELS}
+    next_token = None
+    remaining = limit or SNAPSHOT_PAGE_SIZE
+    for index in range(names.index(start), len(names)):
+        name = names[index]
+        model, fields = SYNC_MODELS[name]
+        qs = model.objects.order_by(*SNAPSHOT_KEYSET.ordering())
+        if values is not None:
+            qs = qs.filter(SNAPSHOT_KEYSET.seek(values))
+            values = None
+        rows = list(qs.values(*fields)[: remaining + 1])
+        if len(rows) > remaining:
+            changes[name] = rows[:remaining]
+            next_token = _page_token(top, name, changes[name][-1])
+            break
+        changes[name] = rows
+        remaining -= len(rows)
+        if not remaining and index + 1 < len(names):
+            next_token = _page_token(top, names[index + 1])
+            break
+    deleted = {name: [] for name in SYNC_MODELS}
+    return {"cursor": top, "full": True, "changes": changes, "deleted": deleted, "next": next_token}
+
+
+def record_change(model, object_id):
+    SyncChange.objects.create(model=model._meta.label_lower, object_id=object_id)
+
+
+def record_changes(model, object_ids):
+    """`record_change` for many rows of `model`, e.g. after a set-based `.update()`."""
+    if is_synced(model) and object_ids:
+        label = model._meta.label_lower
+        SyncChange.objects.bulk_create(SyncChange(model=label, object_id=object_id) for object_id in object_ids)
+
+
+def prune_changes(older_than=CHANGE_RETENTION):
+    """
+    Delete changes past the retention; returns the number removed. The newest
+    expired change is kept as the boundary: cursors below it get a full snapshot.
+    """
+    expired = SyncChange.objects.filter(changed_at__lt=timezone.now() - older_than, sequence__isnull=False)
+    boundary = expired.aggregate(boundary=Max("sequence"))["boundary"]
+    if boundary is None:
+        return 0
+    deleted, _ = SyncChange.objects.filter(sequence__lt=boundary).delete()
+    return deleted
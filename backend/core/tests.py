@@ -1,3 +1,1623 @@
+import datetime
+import io
+import json
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core import analytics, autocomplete, clusters, events, ingest, rollups, routes, spatial, sync
+from core.api import batch, views
+from core.api.caching import single_flight
+from core.api.fastrows import DashboardServiceRows
+from core.api.pagination import Keyset
+from core.api.serializers import DashboardServiceSerializer
+from core.denormalized import (
+    COUNTER_CACHES,
+    counter_drift,
+    rebuild_counters,
+    rebuild_current_price,
+    rebuild_last_service,
+)
+from core.generations import generation, versions
+from core.geohash import point_hash
+from core.models import (
+    Cemetery,
+    Customer,
+    DailyMetrics,
+    Employee,
+    Invoice,
+    InvoiceItem,
+    Memorial,
+    MonthlyActivity,
+    MonthlyServiceRevenue,
+    Payment,
+    Photo,
+    Plot,
+    Service,
+    ServiceAssignment,
+    ServiceEvent,
+    ServiceStatusHistory,
+    SyncChange,
+)
+
+
+def create_sample_data():
+    now = timezone.now().replace(microsecond=123456)
+    tech_user = User.objects.create_user(username="tech", password="x")
+    tech = Employee.objects.create(user=tech_user, full_name="Tess Tech", role=Employee.Role.TECH)
+    helper_user = User.objects.create_user(username="helper", password="x")
+    helper = Employee.objects.create(user=helper_user, full_name="Hal Helper", role=Employee.Role.TECH)
+
+    oak = Cemetery.objects.create(name="Oak Hill", city="Springfield")
+    Cemetery.objects.create(name="Empty Acres")
+    for i, name in enumerate(["Ada Lovelace", "Ada Lovelace", "Émile Zola", "Bob"]):
+        customer = Customer.objects.create(full_name=name, email=f"c{i}@example.com")
+        if name == "Bob":
+            continue
+        plot = Plot.objects.create(
+            cemetery=oak,
+            section=str(i),
+            gps_lat=Decimal("40.7") if i % 2 else None,
+            gps_lng=Decimal("-74.123456") if i % 2 else None,
+        )
+        memorial = Memorial.objects.create(customer=customer, plot=plot)
+        completed = Service.objects.create(
+            memorial=memorial,
+            status=Service.Status.COMPLETED,
+            completed_date=datetime.date(2025, 3, i + 1),
+        )
+        Invoice.objects.create(customer=customer, service=completed, total_amount=Decimal("125.50"))
+        active = Service.objects.create(
+            memorial=memorial,
+            status=Service.Status.IN_PROGRESS if i else Service.Status.SCHEDULED,
+            scheduled_start=now + datetime.timedelta(hours=i) if i != 2 else None,
+            estimated_minutes=90,
+        )
+        ServiceAssignment.objects.create(service=active, employee=tech if i else helper)
+        ServiceAssignment.objects.create(service=active, employee=helper if i else tech)
+        Service.objects.create(memorial=memorial, status=Service.Status.DRAFT)
+
+
+class FastRowsParityTests(TestCase):
+    """The `.values()` fast path must render byte-identical JSON to the DRF serializers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def assert_parity(self, url, view_class):
+        fast = self.client.get(url)
+        cache.clear()
+        with mock.patch.object(view_class, "fast_rows", None):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertTrue(fast.json())
+        self.assertEqual(fast.content, slow.content)
+
+    def test_memorial_list(self):
+        self.assert_parity("/api/memorials/", views.MemorialListView)
+
+    def test_customer_list(self):
+        self.assert_parity("/api/customers/", views.CustomerListView)
+        self.assert_parity("/api/manage/customers/", views.CustomerManageListCreateView)
+
+    def test_cemetery_list(self):
+        self.assert_parity("/api/cemeteries/", views.CemeteryListView)
+
+    def test_scheduling_service_list(self):
+        self.assert_parity("/api/scheduling/services/", views.SchedulingServiceListView)
+
+    def test_dashboard_services(self):
+        qs = Service.objects.order_by("id")
+        rows = DashboardServiceRows()
+        self.assertEqual(
+            JSONRenderer().render(rows.build_many(rows.values(qs))),
+            JSONRenderer().render(DashboardServiceSerializer(qs, many=True).data),
+        )
+
+    def test_streamed_and_paginated_output_match(self):
+        full = self.client.get("/api/scheduling/services/")
+        streamed = self.client.get("/api/scheduling/services/", {"stream": "1"})
+        self.assertEqual(b"".join(streamed.streaming_content), full.content)
+
+        first = self.client.get("/api/scheduling/services/", {"limit": 2}).json()
+        second = self.client.get("/api/scheduling/services/", {"limit": 2, "cursor": first["next"]}).json()
+        self.assertEqual(first["results"] + second["results"], full.json()[:4])
+
+
+class PaginationTests(TestCase):
+    """Keyset pages (`core.api.pagination`) walk the list both ways and reject foreign cursors."""
+
+    url = "/api/scheduling/services/"
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def page(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, rows):
+        return [row["id"] for row in rows]
+
+    def test_walk_forward_and_back(self):
+        full = self.ids(self.client.get(self.url).json())
+        # Single-row pages cross the NULL scheduled_start rows sorted last.
+        pages = [self.page(limit=1)]
+        while pages[-1]["next"]:
+            pages.append(self.page(limit=1, cursor=pages[-1]["next"]))
+        self.assertEqual([self.ids(page["results"]) for page in pages], [[row_id] for row_id in full])
+        self.assertIsNone(pages[0]["prev"])
+
+        back = [pages[-1]]
+        while back[-1]["prev"]:
+            back.append(self.page(limit=1, cursor=back[-1]["prev"]))
+        self.assertEqual([self.ids(page["results"]) for page in reversed(back)], [[row_id] for row_id in full])
+
+    def test_prev_round_trip(self):
+        first = self.page(limit=2)
+        second = self.page(limit=2, cursor=first["next"])
+        again = self.page(limit=2, cursor=second["prev"])
+        self.assertEqual(again["results"], first["results"])
+        self.assertIsNone(again["prev"])
+        self.assertEqual(self.page(limit=2, cursor=again["next"])["results"], second["results"])
+
+    def test_cursor_from_another_ordering(self):
+        cursor = self.page(limit=2)["next"]
+        response = self.client.get(self.url, {"limit": 2, "cursor": cursor, "ordering": "created_at"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_malformed_cursor(self):
+        for cursor in ("not-a-cursor!", "e30", "eyJrIjoxfQ"):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(self.url, {"cursor": cursor}).status_code, 404)
+
+    def test_limit_is_clamped(self):
+        with mock.patch.object(Keyset, "max_limit", 3):
+            self.assertEqual(len(self.page(limit=1000)["results"]), 3)
+        self.assertEqual(len(self.page(limit=0)["results"]), 1)
+        listed = Service.objects.exclude(status=Service.Status.COMPLETED).count()
+        self.assertEqual(len(self.page(limit="many")["results"]), min(listed, Keyset.default_limit))
+
+
+class FieldSelectionTests(TestCase):
+    """`?fields=` trims the output, and the queries behind it, without changing the values."""
+
+    lists = {
+        "/api/scheduling/services/": views.SchedulingServiceListView,
+        "/api/memorials/": views.MemorialListView,
+        "/api/customers/": views.CustomerListView,
+        "/api/cemeteries/": views.CemeteryListView,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def get(self, url, **params):
+        cache.clear()
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_unknown_field(self):
+        for url, view_class in self.lists.items():
+            for fast_rows in (view_class.fast_rows, None):
+                with self.subTest(url=url, fast_rows=fast_rows), mock.patch.object(view_class, "fast_rows", fast_rows):
+                    response = self.client.get(url, {"fields": "id,nope"})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn("nope", response.json()["fields"][0])
+
+    def test_pruned_queryset_matches_full_serializer(self):
+        for url, view_class in self.lists.items():
+            with mock.patch.object(view_class, "fast_rows", None):
+                full = self.get(url)
+                names = list(view_class.serializer_class().fields)
+                for fields in [[name] for name in names] + [names[:3], names[-2:]]:
+                    with self.subTest(url=url, fields=fields):
+                        expected = [{name: row[name] for name in fields} for row in full]
+                        self.assertEqual(self.get(url, fields=",".join(fields)), expected)
+
+    def test_scheduling_queries_without_technician(self):
+        url = "/api/scheduling/services/"
+        # Creates the generation rows.
+        self.get(url)
+        # The generation lookup, then the services; the assignments only for technician columns.
+        with self.assertNumQueries(2):
+            self.get(url, fields="id,status,memorial_name,cemetery_name")
+        with self.assertNumQueries(3):
+            self.get(url, fields="id,technician_name")
+        with mock.patch.object(views.SchedulingServiceListView, "fast_rows", None), self.assertNumQueries(2):
+            self.get(url, fields="id,status,memorial_name,cemetery_name")
+
+
+class ListSearchTests(TestCase):
+    """`?q=` on the list endpoints matches word prefixes through the full-text index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+        memorial = Memorial.objects.get(customer__full_name="Émile Zola")
+        memorial.inscription_text = "Beloved father and author"
+        memorial.save()
+
+    def names(self, path):
+        response = APIClient().get(path)
+        self.assertEqual(response.status_code, 200)
+        return sorted(row.get("full_name") or row.get("name") or row["customer"] for row in response.json())
+
+    def test_prefix_match(self):
+        self.assertEqual(self.names("/api/customers/?q=ADA"), ["Ada Lovelace", "Ada Lovelace"])
+        self.assertEqual(self.names("/api/customers/?q=c3@"), ["Bob"])
+        self.assertEqual(self.names("/api/cemeteries/?q=spring"), ["Oak Hill"])
+        self.assertEqual(self.names("/api/manage/employees/?q=hal"), ["Hal Helper"])
+
+    def test_surname_finds_the_customer(self):
+        self.assertEqual(self.names("/api/customers/?q=lovelace"), ["Ada Lovelace", "Ada Lovelace"])
+        self.assertEqual(self.names("/api/customers/?q=zol"), ["Émile Zola"])
+        self.assertEqual(self.names("/api/memorials/?q=love"), ["Ada Lovelace", "Ada Lovelace"])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.names("/api/memorials/?q=ada oak"), ["Ada Lovelace", "Ada Lovelace"])
+        self.assertEqual(self.names("/api/memorials/?q=ada empty"), [])
+
+    def test_related_and_own_documents(self):
+        self.assertEqual(self.names("/api/memorials/?q=beloved"), ["Émile Zola"])
+        client = APIClient()
+        services = client.get("/api/scheduling/services/").json()
+        expected = [row["id"] for row in services if row["memorial_name"] == "Ada Lovelace"]
+        found = [row["id"] for row in client.get("/api/scheduling/services/?q=hill lovelace").json()]
+        self.assertEqual(found, expected)
+        self.assertTrue(found)
+        self.assertEqual(self.names("/api/customers/?q=@@"), [])
+
+    def test_renames_reach_related_lists(self):
+        Customer.objects.filter(full_name="Bob").update(full_name="Robert")
+        customer = Customer.objects.get(full_name="Émile Zola")
+        customer.full_name = "Emily Zane"
+        customer.save()
+        self.assertEqual(self.names("/api/memorials/?q=zane"), ["Emily Zane"])
+        self.assertEqual(self.names("/api/memorials/?q=zola"), [])
+
+
+class MemorialDetailTests(TestCase):
+    """`GET /api/memorials/<id>/` must not issue a query per child row."""
+
+    # Including the read of the generations behind the ETag.
+    QUERIES = 9
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+        cls.memorial = Memorial.objects.order_by("id").first()
+        cls.tech = Employee.objects.get(full_name="Tess Tech")
+        # Start the generation counters, as the first request after a deploy would.
+        versions(*views.MemorialDetailView.cache_models)
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def add_children(self, count):
+        for i in range(count):
+            service = Service.objects.create(memorial=self.memorial, status=Service.Status.SCHEDULED)
+            ServiceAssignment.objects.create(service=service, employee=self.tech)
+            ServiceStatusHistory.objects.create(
+                service=service, old_status="draft", new_status="scheduled", changed_by=self.tech
+            )
+            invoice = Invoice.objects.create(customer=self.memorial.customer, service=service, total_amount=Decimal("80"))
+            InvoiceItem.objects.create(invoice=invoice, description="Cleaning", unit_price=Decimal("80"))
+            Payment.objects.create(invoice=invoice, amount=Decimal("80"))
+            Photo.objects.create(memorial=self.memorial, service=service, image_url=f"https://example.com/{i}.jpg")
+
+    def get_detail(self):
+        cache.clear()
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(f"/api/memorials/{self.memorial.id}/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_does_not_grow_with_children(self):
+        self.add_children(1)
+        data = self.get_detail()
+        self.assertEqual(len(data["photos"]), 1)
+
+        self.add_children(5)
+        data = self.get_detail()
+        self.assertEqual(data["customer"]["full_name"], "Ada Lovelace")
+        self.assertEqual(data["plot"]["cemetery"]["name"], "Oak Hill")
+        self.assertEqual(len(data["services"]), 9)
+        self.assertEqual(len(data["photos"]), 6)
+        newest = data["services"][0]
+        self.assertEqual(newest["assignments"][0]["employee_name"], "Tess Tech")
+        self.assertEqual(newest["status_history"][0]["changed_by_name"], "Tess Tech")
+        self.assertEqual(len(newest["invoices"][0]["items"]), 1)
+        self.assertEqual(len(newest["invoices"][0]["payments"]), 1)
+
+    def test_unknown_memorial(self):
+        self.assertEqual(self.client.get("/api/memorials/999999/").status_code, 404)
+
+
+class SyncTests(TestCase):
+    """`GET /api/sync/` returns every change committed after the cursor, including deletions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def sync(self, cursor=None):
+        response = self.client.get("/api/sync/", {} if cursor is None else {"since": cursor})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_full_snapshot_then_deltas(self):
+        first = self.sync()
+        self.assertTrue(first["full"])
+        self.assertEqual(len(first["changes"]["services"]), Service.objects.count())
+
+        unchanged = self.sync(first["cursor"])
+        self.assertFalse(unchanged["full"])
+        self.assertEqual(unchanged["changes"]["services"], [])
+
+        service = Service.objects.filter(status=Service.Status.DRAFT).order_by("id").first()
+        tech = Employee.objects.get(full_name="Tess Tech")
+        response = self.client.post(
+            f"/api/manager/services/{service.id}/assign/",
+            {"technician_id": tech.id, "scheduled_start": "2030-05-01T09:00:00Z", "estimated_minutes": 30},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        second = self.sync(first["cursor"])
+        self.assertFalse(second["full"])
+        self.assertEqual([(row["id"], row["status"]) for row in second["changes"]["services"]], [(service.id, "scheduled")])
+        self.assertEqual([row["service_id"] for row in second["changes"]["assignments"]], [service.id])
+        self.assertGreater(second["cursor"], first["cursor"])
+
+    def test_deletions_are_reported(self):
+        cursor = self.sync()["cursor"]
+        assignment = ServiceAssignment.objects.order_by("id").first()
+        assignment_id = assignment.id
+        assignment.delete()
+        data = self.sync(cursor)
+        self.assertEqual(data["deleted"]["assignments"], [assignment_id])
+        self.assertEqual(data["changes"]["assignments"], [])
+
+    def test_set_based_updates_are_synced(self):
+        cursor = self.sync()["cursor"]
+        invoice = Invoice.objects.order_by("id").first()
+        invoice.total_amount = Decimal("99.00")
+        invoice.save()
+        data = self.sync(cursor)
+        self.assertEqual([row["current_price"] for row in data["changes"]["services"]], [99.0])
+
+    def test_change_committed_late_is_not_skipped(self):
+        cursor = self.sync()["cursor"]
+        first, last = Customer.objects.order_by("id")[:2]
+        late = SyncChange.objects.create(model="core.customer", object_id=first.id)
+        early = SyncChange.objects.create(model="core.customer", object_id=last.id)
+        # A sync ran while the transaction that wrote `late` was still open.
+        SyncChange.objects.filter(id=early.id).update(sequence=cursor + 1)
+        data = self.sync(cursor + 1)
+        self.assertEqual([row["id"] for row in data["changes"]["customers"]], [first.id])
+        self.assertGreater(SyncChange.objects.get(id=late.id).sequence, cursor + 1)
+
+    def test_expired_cursor_gets_full_snapshot(self):
+        cursor = self.sync()["cursor"]
+        Customer.objects.create(full_name="New")
+        self.sync(cursor)
+        SyncChange.objects.update(changed_at=timezone.now() - sync.CHANGE_RETENTION * 2)
+        self.assertGreater(sync.prune_changes(), 0)
+        self.assertTrue(self.sync(cursor)["full"])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/sync/", {"since": "yesterday"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/sync/", {"page": "yesterday"}).status_code, 404)
+        self.assertEqual(self.client.get("/api/sync/", {"page": "1.plots."}).status_code, 404)
+
+    def test_snapshot_arrives_in_pages(self):
+        memorial = Memorial.objects.order_by("id").first()
+        Service.objects.bulk_create(Service(memorial=memorial, status=Service.Status.DRAFT) for _ in range(20))
+        expected = {name: list(model.objects.order_by("id").values_list("id", flat=True))
+                    for name, (model, _fields) in sync.SYNC_MODELS.items()}
+
+        with mock.patch("core.sync.SNAPSHOT_PAGE_SIZE", 7):
+            page = self.sync()
+            pages = [page]
+            while page["next"]:
+                # Writes while paging are picked up by the first delta after the snapshot.
+                if len(pages) == 2:
+                    renamed = Customer.objects.order_by("id").first()
+                    renamed.full_name = "Ada King"
+                    renamed.save()
+                response = self.client.get("/api/sync/", {"page": page["next"]})
+                self.assertEqual(response.status_code, 200)
+                page = response.json()
+                pages.append(page)
+
+        self.assertGreater(len(pages), 5)
+        self.assertTrue(all(page["full"] and page["cursor"] == pages[0]["cursor"] for page in pages))
+        self.assertTrue(all(sum(map(len, page["changes"].values())) <= 7 for page in pages))
+        received = {name: [row["id"] for page in pages for row in page["changes"][name]] for name in expected}
+        self.assertEqual(received, expected)
+
+        delta = self.sync(pages[0]["cursor"])
+        self.assertFalse(delta["full"])
+        self.assertEqual([row["full_name"] for row in delta["changes"]["customers"]], ["Ada King"])
+
+
+class ConditionalGetTests(TestCase):
+    """ETag/Last-Modified round trips: 304 while nothing changed, a fresh 200 after a write."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def rename_customer(self, name):
+        customer = Customer.objects.order_by("id").first()
+        # Generations are bumped once the write commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/manage/customers/{customer.id}/", {"full_name": name}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_round_trip(self):
+        first = self.client.get("/api/customers/")
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        self.assertEqual(self.client.get("/api/customers/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.rename_customer("Ada King")
+        after = self.client.get("/api/customers/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after["ETag"], etag)
+        self.assertIn("Ada King", [row["full_name"] for row in after.json()])
+
+    def test_if_modified_since_round_trip(self):
+        with mock.patch("core.api.caching.versions", return_value=("1", 1_000_000_000.4)):
+            first = self.client.get("/api/customers/")
+            since = first["Last-Modified"]
+            self.assertEqual(since, http_date(1_000_000_001))
+            self.assertEqual(self.client.get("/api/customers/", HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+        with mock.patch("core.api.caching.versions", return_value=("2", 1_000_000_001.2)):
+            self.assertEqual(self.client.get("/api/customers/", HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+    def test_no_last_modified_while_its_second_is_open(self):
+        # Another write could still land in the same second, which If-Modified-Since could not tell apart.
+        with mock.patch("core.api.caching.versions", return_value=("1", time.time())):
+            response = self.client.get("/api/customers/")
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("Last-Modified", response)
+            self.assertEqual(self.client.get("/api/customers/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+    def test_etag_wins_over_if_modified_since(self):
+        stale_etag = self.client.get("/api/customers/")["ETag"]
+        self.rename_customer("Ada King")
+        response = self.client.get(
+            "/api/customers/", HTTP_IF_NONE_MATCH=stale_etag, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class ResponseCacheTests(TestCase):
+    """Cached responses are keyed by generations that every worker shares."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def rename_tech(self, name):
+        tech = Employee.objects.get(full_name="Tess Tech")
+        tech.full_name = name
+        tech.save()
+
+    def test_hit_then_miss_after_write(self):
+        first = self.client.get("/api/technicians/")
+        self.assertEqual(first["X-Cache"], "MISS")
+        second = self.client.get("/api/technicians/")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(self.client.get("/api/technicians/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rename_tech("Nia New")
+        after = self.client.get("/api/technicians/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after["X-Cache"], "MISS")
+        self.assertIn("Nia New", [row["full_name"] for row in after.json()])
+
+    def test_generations_outlive_the_local_cache(self):
+        # A worker with an empty cache of its own still sees the same generations.
+        etag = self.client.get("/api/technicians/")["ETag"]
+        cache.clear()
+        self.assertEqual(self.client.get("/api/technicians/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_bump_waits_for_commit(self):
+        before = generation(Employee)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.rename_tech("Nia New")
+            self.assertEqual(generation(Employee), before)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(generation(Employee), before + 1)
+
+
+class CoalescingTests(TestCase):
+    """Coalesced views recompute a miss once and serve the previous response meanwhile."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def test_single_flight_shares_one_computation(self):
+        calls = []
+        started, release = threading.Event(), threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "result"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(single_flight("key", compute, 5)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(single_flight("key", compute, 5)))
+        follower.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [("result", False), ("result", True)])
+
+    def test_stale_response_while_another_request_recomputes(self):
+        first = self.client.get("/api/dashboard/summary/")
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/api/dashboard/summary/")["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.filter(status=Service.Status.DRAFT).order_by("id").first().delete()
+        with mock.patch("core.api.caching.single_flight", side_effect=TimeoutError):
+            stale = self.client.get("/api/dashboard/summary/")
+        self.assertEqual(stale["X-Cache"], "STALE")
+        self.assertEqual(stale.content, first.content)
+        self.assertNotIn("ETag", stale)
+
+        fresh = self.client.get("/api/dashboard/summary/")
+        self.assertEqual(fresh["X-Cache"], "MISS")
+        self.assertNotEqual(fresh["ETag"], first["ETag"])
+
+
+class ServiceEventTests(TestCase):
+    """The SSE feed replays from `Last-Event-ID` and delivers events that commit out of order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.service = Service.objects.filter(status=Service.Status.DRAFT).order_by("id").first()
+
+    def set_status(self, status):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.status = status
+            self.service.save()
+        return ServiceEvent.objects.order_by("-id").first()
+
+    def read(self, **headers):
+        with mock.patch.object(views.ServiceEventStreamView, "wsgi_stream_seconds", 0):
+            response = self.client.get("/api/events/services/", **headers)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return b"".join(response.streaming_content).decode()
+
+    def test_replay_after_last_event_id(self):
+        first = self.set_status(Service.Status.SCHEDULED)
+        second = self.set_status(Service.Status.IN_PROGRESS)
+        body = self.read(HTTP_LAST_EVENT_ID=str(first.id))
+        self.assertNotIn(f"id: {first.id}\n", body)
+        self.assertIn(f"id: {second.id}\nevent: service.status\n", body)
+        # Recent events just behind the cursor are sent again as late events, without ids.
+        self.assertNotIn("id: ", self.read(HTTP_LAST_EVENT_ID=str(second.id)))
+
+    def test_pruned_history_resets(self):
+        first = self.set_status(Service.Status.SCHEDULED)
+        self.set_status(Service.Status.IN_PROGRESS)
+        last = self.set_status(Service.Status.COMPLETED)
+        ServiceEvent.objects.filter(id__lt=last.id).delete()
+        body = self.read(HTTP_LAST_EVENT_ID=str(first.id))
+        self.assertIn(f"id: {last.id}\nevent: reset\n", body)
+        self.assertIn(f"id: {last.id}\nevent: service.status\n", body)
+
+    def test_event_committed_out_of_order(self):
+        cursor = events.EventCursor(events.latest_id())
+        early = self.set_status(Service.Status.SCHEDULED)
+        self.set_status(Service.Status.IN_PROGRESS)
+        # `early` was inserted first but becomes visible only after the later event went out.
+        early_id, fields = early.id, {"kind": early.kind, "service_id": early.service_id, "payload": early.payload}
+        early.delete()
+        self.assertEqual(len(cursor.poll()), 1)
+        self.assertIn(early_id, cursor.gaps)
+
+        ServiceEvent.objects.create(id=early_id, **fields)
+        late = cursor.poll()
+        self.assertEqual(len(late), 1)
+        self.assertTrue(late[0].startswith("event: service.status\n"))
+        # The service's current row, not the one stored with the earlier event.
+        self.assertIn('"status":"in_progress"', late[0])
+        self.assertEqual(cursor.poll(), [])
+
+
+class DashboardCrewTests(TestCase):
+    """`crews_active` counts technicians on any scheduled or in-progress service."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assert_crews(self, expected):
+        recount = (
+            ServiceAssignment.objects.filter(service__status__in=[Service.Status.SCHEDULED, Service.Status.IN_PROGRESS])
+            .values("employee_id")
+            .distinct()
+            .count()
+        )
+        self.assertEqual(recount, expected)
+        cache.clear()
+        summary = self.client.get("/api/dashboard/summary/").json()["summary"]
+        self.assertEqual(summary["crews_active"], expected)
+
+    def test_crews_follow_assignments_and_status(self):
+        self.assert_crews(2)
+        active = list(Service.objects.filter(status__in=[Service.Status.SCHEDULED, Service.Status.IN_PROGRESS]))
+        for service in active:
+            service.status = Service.Status.COMPLETED
+            service.save()
+            self.assert_crews(0 if service is active[-1] else 2)
+
+        helper = Employee.objects.get(full_name="Hal Helper")
+
+        draft = Service.objects.filter(status=Service.Status.DRAFT).order_by("id").first()
+        response = self.client.post(
+            f"/api/manager/services/{draft.id}/assign/",
+            {"technician_id": helper.id, "scheduled_start": "2030-05-01T09:00:00Z", "estimated_minutes": 30},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_crews(1)
+
+        draft.delete()
+        self.assert_crews(0)
+        self.assertEqual(counter_drift(Employee).count(), 0)
+
+
+class DenormalizedTests(TestCase):
+    """Columns refreshed on write must match what the `rebuild_*` functions recompute."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+        cls.memorial = Memorial.objects.order_by("id").first()
+        cls.tech = Employee.objects.get(full_name="Tess Tech")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assert_in_step(self):
+        for model in COUNTER_CACHES:
+            self.assertFalse(counter_drift(model).exists(), model.__name__)
+        self.assertEqual(rebuild_last_service(), 0)
+        self.assertEqual(rebuild_current_price(), 0)
+
+    def test_api_writes_keep_denormalized_columns_in_step(self):
+        self.assert_in_step()
+
+        response = self.client.post(
+            "/api/scheduling/services/create/",
+            {"memorial_id": self.memorial.id, "initial_price": "90.00"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        service = Service.objects.get(pk=response.json()["service"]["id"])
+        self.assertEqual(service.current_price, Decimal("90.00"))
+        self.assert_in_step()
+
+        response = self.client.post(
+            f"/api/manager/services/{service.id}/assign/",
+            {
+                "technician_id": self.tech.id,
+                "scheduled_start": (timezone.now() + datetime.timedelta(days=1)).isoformat(),
+                "estimated_minutes": 60,
+                "price": "110.00",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        service.refresh_from_db()
+        self.assertEqual(service.current_price, Decimal("110.00"))
+        self.assert_in_step()
+
+        service.status = Service.Status.COMPLETED
+        service.completed_date = timezone.localdate()
+        service.save()
+        self.memorial.refresh_from_db()
+        self.assertEqual(self.memorial.last_service_id, service.id)
+        self.assert_in_step()
+
+        other = Customer.objects.get(full_name="Bob")
+        self.memorial.customer = other
+        self.memorial.save()
+        self.assert_in_step()
+
+        Invoice.objects.filter(service=service).delete()
+        self.assert_in_step()
+        service.delete()
+        self.assert_in_step()
+
+    def test_rebuild_repairs_bulk_updates(self):
+        # `QuerySet.update()` skips the signals; the drift check finds the rows and the rebuild repairs them.
+        Customer.objects.update(memorials_count=99)
+        Employee.objects.update(active_services=0)
+        self.assertEqual(counter_drift(Customer).count(), Customer.objects.count())
+        self.assertEqual(rebuild_counters(Customer), Customer.objects.count())
+        self.assertEqual(rebuild_counters(Employee), 2)
+        Memorial.objects.update(last_service=None, last_service_status=None)
+        self.assertEqual(rebuild_last_service(), Memorial.objects.count())
+        self.assert_in_step()
+
+    def test_current_price_follows_invoices(self):
+        service = Service.objects.create(memorial=self.memorial, status=Service.Status.DRAFT)
+
+        def price():
+            service.refresh_from_db()
+            self.assert_in_step()
+            return service.current_price
+
+        self.assertIsNone(price())
+        older = Invoice.objects.create(
+            customer=self.memorial.customer, service=service, total_amount=Decimal("40.00"),
+            issued_date=datetime.date(2025, 1, 1),
+        )
+        self.assertEqual(price(), Decimal("40.00"))
+        newer = Invoice.objects.create(
+            customer=self.memorial.customer, service=service, total_amount=Decimal("55.00"),
+            issued_date=datetime.date(2025, 2, 1),
+        )
+        self.assertEqual(price(), Decimal("55.00"))
+
+        older.total_amount = Decimal("45.00")
+        older.save()
+        self.assertEqual(price(), Decimal("55.00"))
+        newer.total_amount = Decimal("60.00")
+        newer.save()
+        self.assertEqual(price(), Decimal("60.00"))
+        older.issued_date = datetime.date(2025, 3, 1)
+        older.save()
+        self.assertEqual(price(), Decimal("45.00"))
+
+        older.delete()
+        self.assertEqual(price(), Decimal("60.00"))
+        newer.delete()
+        self.assertIsNone(price())
+
+    def test_counters_follow_signals(self):
+        bob = Customer.objects.get(full_name="Bob")
+        oak = Cemetery.objects.get(name="Oak Hill")
+        empty = Cemetery.objects.get(name="Empty Acres")
+
+        def counts():
+            self.assert_in_step()
+            for row in (bob, oak, empty, self.tech):
+                row.refresh_from_db()
+            return bob.memorials_count, oak.memorials_count, oak.active_services, self.tech.active_services
+
+        bob_count, oak_count, oak_active, tech_active = counts()
+        memorial = Memorial.objects.create(customer=bob, plot=Plot.objects.create(cemetery=oak, section="B"))
+        self.assertEqual(counts(), (bob_count + 1, oak_count + 1, oak_active, tech_active))
+
+        service = Service.objects.create(memorial=memorial, status=Service.Status.SCHEDULED)
+        assignment = ServiceAssignment.objects.create(service=service, employee=self.tech)
+        self.assertEqual(counts(), (bob_count + 1, oak_count + 1, oak_active + 1, tech_active + 1))
+
+        service.status = Service.Status.COMPLETED
+        service.completed_date = timezone.localdate()
+        service.save()
+        self.assertEqual(counts(), (bob_count + 1, oak_count + 1, oak_active, tech_active))
+        self.assertEqual(bob.last_contact, timezone.localdate())
+
+        service.status = Service.Status.IN_PROGRESS
+        service.save()
+        self.assertEqual(counts(), (bob_count + 1, oak_count + 1, oak_active + 1, tech_active + 1))
+        assignment.delete()
+        self.assertEqual(counts(), (bob_count + 1, oak_count + 1, oak_active + 1, tech_active))
+
+        memorial.plot = Plot.objects.create(cemetery=empty, section="B")
+        memorial.save()
+        self.assertEqual(counts(), (bob_count + 1, oak_count, oak_active, tech_active))
+        self.assertEqual((empty.memorials_count, empty.active_services), (1, 1))
+
+        service.delete()
+        memorial.delete()
+        self.assertEqual(counts(), (bob_count, oak_count, oak_active, tech_active))
+        self.assertEqual((empty.memorials_count, empty.active_services), (0, 0))
+
+    def test_verify_counter_caches_command(self):
+        out = io.StringIO()
+        call_command("verify_counter_caches", stdout=out)
+        self.assertIn("Counter caches are consistent.", out.getvalue())
+
+        bob = Customer.objects.get(full_name="Bob")
+        Customer.objects.filter(pk=bob.pk).update(memorials_count=7)
+        out = io.StringIO()
+        call_command("verify_counter_caches", stdout=out)
+        self.assertIn("Customer: 1 drifted row(s)", out.getvalue())
+        self.assertIn(f"#{bob.pk}: memorials_count 7 -> 0", out.getvalue())
+        self.assertIn("--repair", out.getvalue())
+        self.assertTrue(counter_drift(Customer).exists())
+
+        out = io.StringIO()
+        call_command("verify_counter_caches", "--repair", stdout=out)
+        self.assertIn("repaired 1 row(s)", out.getvalue())
+        self.assert_in_step()
+
+
+class SearchTests(TestCase):
+    """`GET /api/search/` over the full-text index kept by core.signals."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+        memorial = Memorial.objects.get(customer__full_name="Émile Zola")
+        memorial.inscription_text = "Beloved father and author"
+        memorial.save()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, query):
+        response = self.client.get(f"/api/search/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_every_word_matches_as_a_prefix(self):
+        results = self.search("q=ada lov")
+        self.assertEqual([(row["kind"], row["title"]) for row in results], [("customer", "Ada Lovelace")] * 2)
+        self.assertEqual(self.search("q=ada zola"), [])
+
+    def test_accents_are_ignored_and_matches_marked(self):
+        results = self.search("q=emile&kind=customer")
+        self.assertEqual([row["title"] for row in results], ["Émile Zola"])
+        self.assertIn({"text": "Émile", "match": True}, results[0]["snippet"])
+
+    def test_kinds_narrow_the_results(self):
+        self.assertEqual({row["kind"] for row in self.search("q=oak")}, {"cemetery"})
+        results = self.search("q=belov&kind=memorial")
+        self.assertEqual([(row["title"], row["subtitle"]) for row in results], [("Émile Zola", "Oak Hill")])
+        self.assertEqual(self.search("q=belov&kind=customer"), [])
+
+    def test_writes_update_the_index(self):
+        customer = Customer.objects.get(full_name="Bob")
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.full_name = "Grace Hopper"
+            customer.save()
+        self.assertEqual([row["id"] for row in self.search("q=hopper")], [customer.id])
+        self.assertEqual(self.search("q=bob"), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Cemetery.objects.filter(name="Empty Acres").delete()
+        self.assertEqual(self.search("q=acres"), [])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get("/api/search/?q=a").status_code, 400)
+        response = self.client.get("/api/search/?q=ada&kind=plot")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("kind", response.json())
+
+
+class AutocompleteTests(TestCase):
+    """The in-process prefix indexes (`core.autocomplete`) are patched on commit, not rebuilt."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+
+    def setUp(self):
+        # The indexes are per process; rebuild them from this test's rows.
+        for index in autocomplete.INDEXES.values():
+            index.stale = True
+            index.ensure_current()
+
+    def titles(self, text, kind):
+        return [row["title"] for row in autocomplete.autocomplete(text, kinds=[kind])]
+
+    def test_writes_patch_the_index(self):
+        oak = Cemetery.objects.get(name="Oak Hill")
+        build = mock.patch.object(
+            autocomplete.PrefixIndex, "build", autospec=True, side_effect=autocomplete.PrefixIndex.build
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            customer = Customer.objects.create(full_name="Zelda Quill")
+            Memorial.objects.create(customer=customer, plot=Plot.objects.create(cemetery=oak, section="Z"))
+        self.assertEqual(self.titles("quil", "customer"), ["Zelda Quill"])
+        self.assertEqual(self.titles("zel oak", "memorial"), ["Zelda Quill"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.full_name = "Zelda Marsh"
+            customer.save()
+        self.assertEqual(self.titles("quil", "customer"), [])
+        self.assertEqual(self.titles("zelda mar", "customer"), ["Zelda Marsh"])
+        self.assertEqual(self.titles("zel oak", "memorial"), ["Zelda Marsh"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            oak.name = "Cedar Hill"
+            oak.save()
+        self.assertEqual(self.titles("zel oak", "memorial"), [])
+        self.assertEqual(self.titles("zel ced", "memorial"), ["Zelda Marsh"])
+        self.assertEqual(self.titles("ced", "cemetery"), ["Cedar Hill"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Memorial.objects.filter(customer=customer).delete()
+            customer.delete()
+        self.assertEqual(self.titles("zel", "customer"), [])
+        self.assertEqual(self.titles("zel", "memorial"), [])
+
+        tech = Employee.objects.get(full_name="Tess Tech")
+        self.assertEqual(self.titles("tes", "technician"), ["Tess Tech"])
+        with self.captureOnCommitCallbacks(execute=True):
+            tech.is_active = False
+            tech.save()
+        self.assertEqual(self.titles("tes", "technician"), [])
+
+        # Every write above was patched in; none forced a rebuild.
+        self.assertEqual(build.call_count, 0)
+
+    def test_uncommitted_write_is_not_indexed(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            Customer.objects.create(full_name="Zelda Quill")
+        self.assertEqual(self.titles("quil", "customer"), [])
+
+
+class PlotNearbyTests(TestCase):
+    """Radius and bounding-box lookups of `GET /api/plots/nearby/`."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cemetery = Cemetery.objects.create(name="Grid Park")
+        customer = Customer.objects.create(full_name="Nearby Customer")
+        # 0.001 degrees of latitude is about 111 m.
+        cls.plots = [
+            Plot.objects.create(cemetery=cemetery, section=str(i), gps_lat=Decimal(lat), gps_lng=Decimal("20.000000"))
+            for i, lat in enumerate(["10.000000", "10.001000", "10.003000", "10.010000"])
+        ]
+        Plot.objects.create(cemetery=cemetery, section="unlocated")
+        memorial = Memorial.objects.create(customer=customer, plot=cls.plots[1])
+        cls.service = Service.objects.create(memorial=memorial, status=Service.Status.SCHEDULED)
+        Service.objects.create(memorial=memorial, status=Service.Status.COMPLETED)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        # The grid is per process; rebuild it from this test's rows.
+        spatial.PLOT_GRID.stale = True
+
+    def nearby(self, query):
+        response = self.client.get(f"/api/plots/nearby/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_radius_nearest_first(self):
+        data = self.nearby("lat=10&lng=20&radius_m=400")
+        self.assertEqual(data["count"], 3)
+        self.assertEqual([row["id"] for row in data["results"]], [plot.id for plot in self.plots[:3]])
+        self.assertEqual([round(row["distance_m"]) for row in data["results"]], [0, 111, 334])
+        self.assertEqual([row["id"] for row in data["results"][1]["open_services"]], [self.service.id])
+
+    def test_plot_id_excludes_the_plot_itself(self):
+        data = self.nearby(f"plot_id={self.plots[1].id}&radius_m=250")
+        self.assertEqual([row["id"] for row in data["results"]], [self.plots[0].id, self.plots[2].id])
+
+    def test_bbox_by_id_with_limit(self):
+        data = self.nearby("bbox=9.9995,19.999,10.0035,20.001&limit=2")
+        self.assertEqual(data["count"], 3)
+        self.assertEqual([row["id"] for row in data["results"]], [plot.id for plot in self.plots[:2]])
+        self.assertIsNone(data["results"][0]["distance_m"])
+
+    def test_database_fallback_matches_grid(self):
+        queries = ("lat=10&lng=20&radius_m=2000", "bbox=9.9,19.9,10.1,20.1")
+        expected = [self.nearby(query) for query in queries]
+        cache.clear()
+        with mock.patch.object(spatial.PLOT_GRID, "max_entries", 0):
+            spatial.PLOT_GRID.stale = True
+            self.assertEqual([self.nearby(query) for query in queries], expected)
+        self.assertEqual(expected[0]["count"], 4)
+
+    def test_invalid_parameters(self):
+        for query in ("lat=10&lng=20&radius_m=0", "lat=91&lng=20", "lng=20", "bbox=10,20,9,21", "bbox=1,2,3"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/api/plots/nearby/?{query}").status_code, 400)
+        unlocated = Plot.objects.get(section="unlocated")
+        self.assertEqual(self.client.get(f"/api/plots/nearby/?plot_id={unlocated.id}").status_code, 400)
+
+
+class MapClusterTests(TestCase):
+    """`GET /api/map/clusters/` tiles are recomputed only where a write touched them."""
+
+    # Two viewports far apart, each within a few tiles at zoom 12.
+    springfield = "39.79,-89.66,39.81,-89.64"
+    salem = "44.93,-123.04,44.95,-123.02"
+
+    @classmethod
+    def setUpTestData(cls):
+        cemetery = Cemetery.objects.create(name="Two Towns")
+        customer = Customer.objects.create(full_name="Map Customer")
+        cls.plot = Plot.objects.create(
+            cemetery=cemetery, section="A", gps_lat=Decimal("39.800000"), gps_lng=Decimal("-89.650000")
+        )
+        Plot.objects.create(cemetery=cemetery, section="B", gps_lat=Decimal("44.940000"), gps_lng=Decimal("-123.030000"))
+        cls.memorial = Memorial.objects.create(customer=customer, plot=cls.plot)
+        Service.objects.create(memorial=cls.memorial, status=Service.Status.SCHEDULED)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def viewport(self, bbox):
+        response = self.client.get("/api/map/clusters/", {"bbox": bbox, "zoom": 12})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["clusters"]
+
+    def counts(self, bbox):
+        return [(cluster["count"], cluster["services"]) for cluster in self.viewport(bbox)]
+
+    def test_plot_edit_invalidates_only_its_tiles(self):
+        self.assertEqual(self.counts(self.springfield), [(1, {"scheduled": 1})])
+        self.assertEqual(self.counts(self.salem), [(1, {})])
+
+        with mock.patch("core.clusters.compute_tiles", wraps=clusters.compute_tiles) as compute:
+            self.viewport(self.springfield)
+            self.viewport(self.salem)
+            self.assertEqual(compute.call_count, 0)
+
+            # Moving the plot touches the tiles it left and the ones it moved into.
+            with self.captureOnCommitCallbacks(execute=True):
+                self.plot.gps_lat, self.plot.gps_lng = Decimal("44.941000"), Decimal("-123.031000")
+                self.plot.save()
+            self.assertEqual(self.counts(self.springfield), [])
+            self.assertEqual(self.counts(self.salem), [(2, {"scheduled": 1})])
+            self.assertEqual(compute.call_count, 2)
+
+            compute.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                Service.objects.create(memorial=self.memorial, status=Service.Status.DRAFT)
+            self.viewport(self.springfield)
+            self.assertEqual(compute.call_count, 0)
+            self.assertEqual(self.counts(self.salem), [(2, {"scheduled": 1, "draft": 1})])
+            self.assertEqual(compute.call_count, 1)
+
+    def test_unrelated_edit_keeps_tiles(self):
+        self.viewport(self.springfield)
+        with mock.patch("core.clusters.compute_tiles", wraps=clusters.compute_tiles) as compute:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.plot.section = "A2"
+                self.plot.save()
+            self.viewport(self.springfield)
+        self.assertEqual(compute.call_count, 0)
+
+
+class PlotImportTests(TestCase):
+    """`POST /api/plots/import/` upserts on the plot location and reports bad rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cemetery = Cemetery.objects.create(name="Import Park")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def upload(self, name, text, **data):
+        file = SimpleUploadedFile(name, text.encode())
+        return self.client.post("/api/plots/import/", {"file": file, **data}, format="multipart")
+
+    def csv(self, *rows):
+        return "\n".join(["cemetery,section,row,plot,lat,lng,notes", *rows]) + "\n"
+
+    def test_reimport_updates_in_place(self):
+        text = self.csv(
+            f"{self.cemetery.id},A,1,1,40.1,-74.1,",
+            f"{self.cemetery.id},A,1,2,40.2,-74.2,gate",
+            f"{self.cemetery.id},A,1,3,,,",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.upload("map.csv", text).json()
+        self.assertEqual((first["records"], first["imported"], first["created"], first["rejected"]), (3, 3, 3, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self.upload("map.csv", text).json()
+        self.assertEqual((second["imported"], second["created"]), (3, 0))
+        self.assertEqual(Plot.objects.filter(cemetery=self.cemetery).count(), 3)
+
+        moved = self.upload("map.csv", self.csv(f"{self.cemetery.id},A,1,3,40.3,-74.3,moved")).json()
+        self.assertEqual((moved["imported"], moved["created"]), (1, 0))
+        plot = Plot.objects.get(cemetery=self.cemetery, plot_number="3")
+        self.assertEqual((plot.gps_lat, plot.gps_lng, plot.access_notes), (Decimal("40.3"), Decimal("-74.3"), "moved"))
+        self.assertEqual(plot.geohash, point_hash(plot.gps_lat, plot.gps_lng))
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        result = self.upload(
+            "map.csv",
+            self.csv(
+                f"{self.cemetery.id},B,1,1,40.1,-74.1,",
+                f"{self.cemetery.id},B,1,2,91,-74.1,",
+                f"{self.cemetery.id},,,,40.1,-74.1,",
+                f"{self.cemetery.id},B,1,3,40.1,,",
+                "999999,B,1,4,,,",
+                f"{self.cemetery.id},B,1",
+                "",
+                f"{self.cemetery.id},B,1,5,,,",
+            ),
+        ).json()
+        self.assertEqual((result["records"], result["imported"], result["created"], result["rejected"]), (7, 2, 2, 5))
+        errors = {rejected["record"]: sorted(rejected["errors"]) for rejected in result["errors"]}
+        self.assertEqual(
+            errors,
+            {
+                3: ["gps_lat"],
+                4: ["non_field_errors"],
+                5: ["non_field_errors"],
+                6: ["cemetery_id"],
+                7: ["non_field_errors"],
+            },
+        )
+        self.assertEqual(
+            sorted(Plot.objects.filter(cemetery=self.cemetery).values_list("plot_number", flat=True)), ["1", "5"]
+        )
+
+    def test_geojson_with_default_cemetery(self):
+        features = [
+            {"type": "Feature", "properties": {"section": "G", "plot": "1"},
+             "geometry": {"type": "Point", "coordinates": [-74.0, 40.0]}},
+            {"type": "Feature", "properties": {"section": "G", "plot": "2"},
+             "geometry": {"type": "Polygon", "coordinates": [[[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]]]}},
+            {"type": "Feature", "properties": {"section": "G", "plot": "3"}, "geometry": {"type": "LineString"}},
+        ]
+        text = json.dumps({"type": "FeatureCollection", "features": features})
+        result = self.upload("map.geojson", text, cemetery_id=self.cemetery.id).json()
+        self.assertEqual((result["imported"], result["created"], result["rejected"]), (2, 2, 1))
+        self.assertEqual(result["errors"], [{"record": 3, "errors": {"geometry": ["Expected a Point or Polygon geometry."]}}])
+        plot = Plot.objects.get(cemetery=self.cemetery, plot_number="2")
+        self.assertEqual((plot.gps_lat, plot.gps_lng), (Decimal("1"), Decimal("1")))
+
+    def test_chunks_match_one_pass(self):
+        text = self.csv(*(f"{self.cemetery.id},C,{i % 3},{i % 5},40.{i},-74.{i}," for i in range(1, 12)))
+        one_pass = ingest.import_plots(io.StringIO(text), "csv", chunk_size=100)
+        plots = list(Plot.objects.filter(cemetery=self.cemetery).order_by("id").values_list("row", "plot_number", "gps_lat"))
+        Plot.objects.filter(cemetery=self.cemetery).delete()
+        chunked = ingest.import_plots(io.StringIO(text), "csv", chunk_size=2)
+        self.assertEqual(chunked, one_pass)
+        self.assertEqual(
+            sorted(Plot.objects.filter(cemetery=self.cemetery).values_list("row", "plot_number", "gps_lat")),
+            sorted(plots),
+        )
+
+    def test_unreadable_files(self):
+        self.assertEqual(self.upload("map.csv", "name,lat\nx,1\n").status_code, 400)
+        self.assertEqual(self.upload("map.geojson", '{"type": "Feature"}').status_code, 400)
+        self.assertEqual(self.upload("map.txt", self.csv()).status_code, 400)
+
+
+class TechnicianRouteTests(TestCase):
+    """`GET /api/technicians/<id>/route/` orders a day's stops to shorten travel."""
+
+    day = datetime.date(2030, 1, 15)
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="router", password="x")
+        cls.tech = Employee.objects.create(user=user, full_name="Rita Route", role=Employee.Role.TECH)
+        other_user = User.objects.create_user(username="office", password="x")
+        cls.manager = Employee.objects.create(user=other_user, full_name="Otto Office", role=Employee.Role.MANAGER)
+        cemetery = Cemetery.objects.create(name="Line Park")
+        customer = Customer.objects.create(full_name="Route Customer")
+
+        def service(section, hour, lat="10.000000", lng=None, status=Service.Status.SCHEDULED, day=cls.day):
+            plot = Plot.objects.create(
+                cemetery=cemetery, section=section, gps_lat=Decimal(lat) if lng else None, gps_lng=lng and Decimal(lng)
+            )
+            start = timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour)))
+            created = Service.objects.create(
+                memorial=Memorial.objects.create(customer=customer, plot=plot), status=status, scheduled_start=start
+            )
+            ServiceAssignment.objects.create(service=created, employee=cls.tech)
+            return created
+
+        # Four stops on one line of latitude, about 1.1 km apart, scheduled out of order.
+        cls.stops = {lng: service(lng, hour, lng=lng) for hour, lng in enumerate(["20.00", "20.03", "20.01", "20.02"], 8)}
+        cls.unlocated = service("none", 12)
+        service("done", 13, lng="20.05", status=Service.Status.COMPLETED)
+        service("tomorrow", 8, lng="20.05", day=cls.day + datetime.timedelta(days=1))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def route(self, technician_id, query=""):
+        return self.client.get(f"/api/technicians/{technician_id}/route/{query}")
+
+    def test_suggested_order_shortens_the_day(self):
+        data = self.route(self.tech.id, f"?date={self.day}").json()
+        order = [stop["service_id"] for stop in data["stops"]]
+        line = [self.stops[lng].id for lng in ("20.00", "20.01", "20.02", "20.03")]
+        self.assertIn(order, (line, line[::-1]))
+        self.assertEqual([stop["order"] for stop in data["stops"]], [1, 2, 3, 4])
+        self.assertEqual(sorted(stop["scheduled_order"] for stop in data["stops"]), [1, 2, 3, 4])
+        self.assertIsNone(data["stops"][0]["leg_m"])
+        legs = [stop["leg_m"] for stop in data["stops"][1:]]
+        self.assertAlmostEqual(sum(legs), data["optimized_distance_m"], delta=0.5)
+        # Scheduled: 0 -> 3 -> 1 -> 2 covers six gaps; the line covers three.
+        self.assertAlmostEqual(data["scheduled_distance_m"], 2 * data["optimized_distance_m"], delta=1)
+        self.assertAlmostEqual(data["saved_m"], data["scheduled_distance_m"] - data["optimized_distance_m"], delta=0.2)
+        self.assertEqual([stop["service_id"] for stop in data["unlocated"]], [self.unlocated.id])
+
+    def test_best_order_never_longer_than_scheduled(self):
+        rng = np.random.default_rng(7)
+        for n in (3, 5, 8, 12):
+            matrix = routes.distance_matrix(rng.uniform(40, 40.05, n), rng.uniform(-74.05, -74, n))
+            scheduled = np.arange(n)
+            order = routes.best_order(matrix, scheduled)
+            self.assertEqual(sorted(order), list(range(n)))
+            self.assertLessEqual(routes.path_length(order, matrix), routes.path_length(scheduled, matrix) + 1e-6)
+
+    def test_empty_day(self):
+        data = self.route(self.tech.id, "?date=2030-02-01").json()
+        self.assertEqual((data["stops"], data["unlocated"], data["optimized_distance_m"]), ([], [], 0.0))
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.route(self.tech.id, "?date=15/01/2030").status_code, 400)
+        self.assertEqual(self.route(self.tech.id, "?date=2030-02-30").status_code, 400)
+        self.assertEqual(self.route(self.manager.id).status_code, 404)
+        self.assertEqual(self.route(999999).status_code, 404)
+
+
+class RollupTests(TestCase):
+    """Incrementally maintained rollup rows must match a full rebuild."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+        cls.memorial = Memorial.objects.order_by("id").first()
+
+    def setUp(self):
+        rollups.rebuild_daily_metrics()
+        rollups.rebuild_monthly_reports()
+
+    def daily_rows(self):
+        # Rows recounted down to zero stay behind incrementally but are never rebuilt.
+        counts = ("total_count", "completed_count", "active_count", "scheduled_count", "crew_count", "revenue")
+        return {
+            row[0]: row[1:]
+            for row in DailyMetrics.objects.values_list("day", *counts)
+            if any(row[1:])
+        }
+
+    def monthly_rows(self):
+        open_months = {"month__gte": rollups.current_month()}
+        activity = {
+            row[0]: row[1:]
+            for row in MonthlyActivity.objects.filter(**open_months).values_list(
+                "month", "new_customers", "services_created", "services_completed"
+            )
+            if any(row[1:])
+        }
+        revenue = set(
+            MonthlyServiceRevenue.objects.filter(**open_months).values_list(
+                "month", "service_type", "revenue", "invoice_count"
+            )
+        )
+        return activity, revenue
+
+    def assert_matches_rebuild(self):
+        daily, monthly = self.daily_rows(), self.monthly_rows()
+        rollups.rebuild_daily_metrics()
+        rollups.rebuild_monthly_reports()
+        self.assertEqual(daily, self.daily_rows())
+        self.assertEqual(monthly, self.monthly_rows())
+
+    def test_incremental_rollups_match_rebuild(self):
+        today = timezone.localdate()
+        client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                "/api/scheduling/services/create/",
+                {"memorial_id": self.memorial.id, "service_type": Service.ServiceType.CLEANING},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 201)
+            Customer.objects.create(full_name="New Customer")
+        self.assert_matches_rebuild()
+
+        created = Service.objects.get(pk=response.json()["service"]["id"])
+        with self.captureOnCommitCallbacks(execute=True):
+            created.status = Service.Status.SCHEDULED
+            created.scheduled_date = today + datetime.timedelta(days=3)
+            created.save()
+            ServiceAssignment.objects.create(service=created, employee=Employee.objects.order_by("id").first())
+        self.assert_matches_rebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created.status = Service.Status.COMPLETED
+            created.completed_date = today
+            created.save()
+            Invoice.objects.create(
+                customer=self.memorial.customer, service=created, total_amount=Decimal("80.00"), issued_date=today
+            )
+        self.assert_matches_rebuild()
+
+        active = Service.objects.filter(scheduled_start__isnull=False).order_by("id").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            active.scheduled_start += datetime.timedelta(days=2)
+            active.save()
+            created.completed_date = rollups.add_months(today, 1)
+            created.save()
+        self.assert_matches_rebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.filter(service=created).delete()
+            created.delete()
+            active.delete()
+        self.assert_matches_rebuild()
+
+    def reports(self, client):
+        paths = ("revenue-by-service-type/", "revenue-by-service-type/?year=2025", "lifetime-value/",
+                 "new-customers/", "completion-rate/", "completion-rate/?year=2025")
+        return {path: client.get(f"/api/reports/{path}").json() for path in paths}
+
+    def test_reports_match_rebuild(self):
+        client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            customer = Customer.objects.create(full_name="New Customer")
+            service = Service.objects.create(
+                memorial=self.memorial,
+                service_type=Service.ServiceType.REPAIR,
+                status=Service.Status.COMPLETED,
+                completed_date=timezone.localdate(),
+            )
+            Invoice.objects.create(customer=customer, service=service, total_amount=Decimal("40.00"))
+        reports = self.reports(client)
+        rollups.rebuild_monthly_reports()
+        self.assertEqual(reports, self.reports(client))
+
+        # The sample invoices have no issue date, so they count in the month they were created.
+        years = reports["revenue-by-service-type/"]["years"]
+        self.assertEqual([row["year"] for row in years], [timezone.localdate().year])
+        self.assertEqual(years[0]["revenue"], 416.5)
+        self.assertEqual(reports["revenue-by-service-type/?year=2025"]["years"], [])
+        self.assertEqual(reports["lifetime-value/"]["customers"], 5)
+        self.assertEqual(reports["completion-rate/?year=2025"]["completed"], 3)
+        self.assertEqual(reports["new-customers/"]["months"][-1]["count"], 5)
+
+    def test_report_rejects_bad_year(self):
+        response = APIClient().get("/api/reports/completion-rate/?year=25")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("year", response.json())
+
+    def test_month_recounted_once_per_transaction(self):
+        with mock.patch("core.rollups.month_metrics", wraps=rollups.month_metrics) as month_metrics:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for _ in range(5):
+                        Service.objects.create(memorial=self.memorial, status=Service.Status.DRAFT)
+                    self.assertEqual(month_metrics.call_count, 0)
+        self.assertEqual(month_metrics.call_count, 1)
+
+
+class BatchTests(TestCase):
+    """`POST /api/batch/`: per-item statuses, the sub-request cap and the time limit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_sample_data()
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def batch(self, requests):
+        return self.client.post("/api/batch/", {"requests": requests}, format="json")
+
+    def statuses(self, requests):
+        response = self.batch(requests)
+        self.assertEqual(response.status_code, 200)
+        return [item["status"] for item in response.json()["responses"]]
+
+    def test_matches_direct_requests(self):
+        response = self.batch([{"id": "techs", "path": "/api/technicians/"}, "/api/cemeteries/"])
+        self.assertEqual(response.status_code, 200)
+        techs, cemeteries = response.json()["responses"]
+        self.assertEqual(techs["id"], "techs")
+        self.assertEqual(cemeteries["id"], 1)
+        self.assertEqual(techs["body"], self.client.get("/api/technicians/").json())
+        self.assertEqual(cemeteries["body"], self.client.get("/api/cemeteries/").json())
+        self.assertEqual(
+            self.statuses([{"path": "/api/technicians/", "if_none_match": techs["etag"]}]), [304]
+        )
+
+    def test_per_item_errors(self):
+        statuses = self.statuses([
+            "/api/customers/",
+            "/api/no-such-route/",
+            "/admin/",
+            "/api/customers/?fields=nope",
+            "/api/memorials/999999/",
+        ])
+        self.assertEqual(statuses, [200, 404, 400, 400, 404])
+
+    def test_excluded_routes(self):
+        self.assertEqual(self.statuses(["/api/batch/", "/api/events/services/", "/api/technicians/"]), [400, 400, 200])
+
+    def test_sub_request_cap(self):
+        self.assertEqual(self.statuses(["/api/technicians/"] * views.BatchView.max_requests), [200] * 20)
+        response = self.batch(["/api/technicians/"] * (views.BatchView.max_requests + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("requests", response.json())
+
+    def test_malformed_payload(self):
+        self.assertEqual(self.batch([]).status_code, 400)
+        self.assertEqual(self.batch([{"id": "no-path"}]).status_code, 400)
+        response = self.client.post("/api/batch/", "not json", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_time_limit(self):
+        call = batch.call
+
+        def slow_call(view, sub, match):
+            if sub.path == "/api/cemeteries/":
+                time.sleep(0.5)
+            return call(view, sub, match)
+
+        with mock.patch.object(views.BatchView, "time_limit", 0.2), mock.patch("core.api.batch.call", slow_call):
+            statuses = self.statuses(["/api/technicians/", "/api/cemeteries/", "/api/customers/"])
+        self.assertEqual(statuses, [200, 504, 504])
+
+
+class CustomerValueTests(TestCase):
+    """`core.analytics` against a small fixture with hand-computed figures."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cemetery = Cemetery.objects.create(name="Oak Hill")
+        cls.ann = Customer.objects.create(full_name="Ann")
+        cls.ben = Customer.objects.create(full_name="Ben")
+        cls.cat = Customer.objects.create(full_name="Cat")
+        completed = {
+            cls.ann: [datetime.date(2025, 1, 10), datetime.date(2025, 1, 20), datetime.date(2025, 3, 1)],
+            cls.ben: [datetime.date(2025, 2, 5), datetime.date(2025, 2, 25)],
+        }
+        for customer, days in completed.items():
+            memorial = Memorial.objects.create(customer=customer, plot=Plot.objects.create(cemetery=cemetery, section=customer.full_name))
+            for day in days:
+                Service.objects.create(memorial=memorial, status=Service.Status.COMPLETED, completed_date=day)
+            Service.objects.create(memorial=memorial, status=Service.Status.SCHEDULED)
+
+        paid = Invoice.objects.create(customer=cls.ann, total_amount=Decimal("100.00"))
+        Payment.objects.create(invoice=paid, amount=Decimal("100.00"), status=Payment.Status.SUCCEEDED)
+        unpaid = Invoice.objects.create(customer=cls.ann, total_amount=Decimal("50.25"))
+        Payment.objects.create(invoice=unpaid, amount=Decimal("50.25"), status=Payment.Status.FAILED)
+        Invoice.objects.create(customer=cls.ben, total_amount=Decimal("30.00"))
+
+    def test_summary(self):
+        summary = analytics.compute_customer_value().summary()
+        cohorts = summary.pop("cohorts")
+        self.assertEqual(summary, {
+            "customers": 3,
+            "customers_with_revenue": 2,
+            "total_invoiced": 180.25,
+            "total_paid": 100.0,
+            "median_lifetime_value": 30.0,
+            "repeat_customers": 2,
+            "average_services": 2.5,
+            # Ann: 10 and 40 days, Ben: 20 days.
+            "average_repeat_interval_days": 23.3,
+        })
+        self.assertEqual(cohorts, [
+            {"cohort": "2025-01", "size": 1, "retention": [100.0, 0.0, 100.0] + [0.0] * 9},
+            {"cohort": "2025-02", "size": 1, "retention": [100.0] + [0.0] * 11},
+        ])
+
+    def test_rows(self):
+        rows = analytics.compute_customer_value().rows([self.cat.id, 999999, self.ann.id, self.ben.id, self.ann.id])
+        self.assertEqual(rows, [
+            {
+                "customer_id": self.ann.id,
+                "lifetime_value": 150.25,
+                "paid": 100.0,
+                "services": 3,
+                "first_service": "2025-01-10",
+                "last_service": "2025-03-01",
+                "average_repeat_interval_days": 25.0,
+            },
+            {
+                "customer_id": self.ben.id,
+                "lifetime_value": 30.0,
+                "paid": 0.0,
+                "services": 2,
+                "first_service": "2025-02-05",
+                "last_service": "2025-02-25",
+                "average_repeat_interval_days": 20.0,
+            },
+            {
+                "customer_id": self.cat.id,
+                "lifetime_value": 0.0,
+                "paid": 0.0,
+                "services": 0,
+                "first_service": None,
+                "last_service": None,
+                "average_repeat_interval_days": None,
+            },
+        ])
+
+    def test_retention_cohorts(self):
+        positions = np.array([0, 0, 1, 1, 1, 2])
+        days = np.array(
+            ["2025-01-31", "2025-02-01", "2025-01-15", "2025-01-16", "2026-01-15", "2025-02-10"],
+            dtype="datetime64[D]",
+        )
+        # Customer 1 comes back twelve months later, past the three-month window.
+        self.assertEqual(analytics.retention_cohorts(positions, days, months=3), [
+            {"cohort": "2025-01", "size": 2, "retention": [100.0, 50.0, 0.0]},
+            {"cohort": "2025-02", "size": 1, "retention": [100.0, 0.0, 0.0]},
+        ])
+        self.assertEqual(analytics.retention_cohorts(np.array([], dtype=np.int64), days[:0]), [])
 
-# Create your tests here.
+    def test_average_matches_lifetime_value_report(self):
+        rollups.rebuild_monthly_reports()
+        summary = APIClient().get("/api/analytics/customer-value/").json()
+        report = APIClient().get("/api/reports/lifetime-value/").json()
+        self.assertEqual(report["customers"], summary["customers"])
+        self.assertEqual(report["revenue"], summary["total_invoiced"])
+        self.assertEqual(report["average_lifetime_value"], round(summary["total_invoiced"] / summary["customers"], 2))
@@ -1,4 +1,4 @@
-const { useEffect, useMemo, useState } = React;
+const { useCallback, useEffect, useMemo, useState } = React;
 
 const ROLE_CONFIGS = {
   admin: {
@@ -146,6 +146,55 @@ function parseCoordinate(rawValue, kind) {
   return { ok: true, value: Number(value.toFixed(6)) };
 }
 
+// GETs issued by useApi in the same tick go out as one POST /api/batch/.
+const API_PATH = new URL(API_BASE, window.location.href).pathname.replace(/\/+$/, '');
+const BATCH_MAX = 20;
+let batchQueue = [];
+
+async function fetchOne(path) {
+  const res = await fetch(`${API_BASE}/${path}`, { credentials: 'include' });
+  return { ok: res.ok, status: res.status, body: res.ok ? await res.json() : null };
+}
+
+async function sendBatch(items) {
+  if (items.length === 1) {
+    fetchOne(items[0].path).then(items[0].resolve, items[0].reject);
+    return;
+  }
+  try {
+    const res = await fetch(`${API_BASE}/batch/`, {
+      method: 'POST',
+      credentials: 'include',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ requests: items.map((item) => `${API_PATH}/${item.path}`) })
+    });
+    if (!res.ok) throw new Error(`API error: ${res.status}`);
+    const { responses } = await res.json();
+    items.forEach((item, index) => {
+      const { status, body } = responses[index];
+      item.resolve({ ok: status >= 200 && status < 300, status, body });
+    });
+  } catch (err) {
+    // Fall back to separate requests, e.g. against a backend without the batch route.
+    items.forEach((item) => fetchOne(item.path).then(item.resolve, item.reject));
+  }
+}
+
+function flushBatch() {
+  const queue = batchQueue;
+  batchQueue = [];
+  for (let i = 0; i < queue.length; i += BATCH_MAX) {
+    sendBatch(queue.slice(i, i + BATCH_MAX));
+  }
+}
+
+function batchedGet(path) {
+  return new Promise((resolve, reject) => {
+    batchQueue.push({ path, resolve, reject });
+    if (batchQueue.length === 1) setTimeout(flushBatch, 0);
+  });
+}
+
 function useApi(path, defaultValue, enabled = true, options = {}) {
   const refreshEvent = options.refreshEvent || '';
   const [state, setState] = useState({ loading: true, error: null, data: defaultValue });
@@ -158,10 +207,9 @@ function useApi(path, defaultValue, enabled = true, options = {}) {
     async function load() {
       try {
         const cleanPath = path.startsWith('/') ? path.slice(1) : path;
-        const res = await fetch(`${API_BASE}/${cleanPath}`, { credentials: 'include' });
+        const res = await batchedGet(cleanPath);
         if (!res.ok) throw new Error(`API error: ${res.status}`);
-        const json = await res.json();
-        if (!cancelled) setState({ loading: false, error: null, data: json });
+        if (!cancelled) setState({ loading: false, error: null, data: res.body });
       } catch (err) {
         if (!cancelled) setState({ loading: false, error: err.message || 'Request failed', data: defaultValue });
       }
@@ -182,6 +230,109 @@ function useApi(path, defaultValue, enabled = true, options = {}) {
   return state;
 }
 
+const PAGE_SIZE = 50;
+
+// Incrementally loads a keyset-paginated list endpoint (`?limit=` + `next` cursor).
+function usePagedApi(path, options = {}) {
+  const refreshEvent = options.refreshEvent || '';
+  const [state, setState] = useState({ loading: true, loadingMore: false, error: null, data: [], next: null });
+  const [reloadToken, setReloadToken] = useState(0);
+
+  const fetchPage = useCallback(async (cursor) => {
+    const cleanPath = path.startsWith('/') ? path.slice(1) : path;
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (cursor) params.set('cursor', cursor);
+    const separator = cleanPath.includes('?') ? '&' : '?';
+    const res = await fetch(`${API_BASE}/${cleanPath}${separator}${params}`, { credentials: 'include' });
+    if (!res.ok) throw new Error(`API error: ${res.status}`);
+    return res.json();
+  }, [path]);
+
+  useEffect(() => {
+    let cancelled = false;
+    setState((prev) => ({ ...prev, loading: true, error: null }));
+    fetchPage(null)
+      .then((json) => {
+        if (!cancelled) setState({ loading: false, loadingMore: false, error: null, data: json.results || [], next: json.next });
+      })
+      .catch((err) => {
+        if (!cancelled) setState({ loading: false, loadingMore: false, error: err.message || 'Request failed', data: [], next: null });
+      });
+    return () => { cancelled = true; };
+  }, [fetchPage, reloadToken]);
+
+  useEffect(() => {
+    if (!refreshEvent) return undefined;
+    function handleRefresh() {
+      setReloadToken((value) => value + 1);
+    }
+    window.addEventListener(refreshEvent, handleRefresh);
+    return () => window.removeEventListener(refreshEvent, handleRefresh);
+  }, [refreshEvent]);
+
+  async function loadMore() {
+    if (!state.next || state.loadingMore) return;
+    setState((prev) => ({ ...prev, loadingMore: true }));
+    try {
+      const json = await fetchPage(state.next);
+      setState((prev) => ({
+        ...prev,
+        loadingMore: false,
+        data: [...prev.data, ...(json.results || [])],
+        next: json.next
+      }));
+    } catch (err) {
+      setState((prev) => ({ ...prev, loadingMore: false, error: err.message || 'Request failed' }));
+    }
+  }
+
+  return { ...state, hasMore: Boolean(state.next), loadMore };
+}
+
+function useDebouncedValue(value, delayMs = 250) {
+  const [debounced, setDebounced] = useState(value);
+  useEffect(() => {
+    const timer = setTimeout(() => setDebounced(value), delayMs);
+    return () => clearTimeout(timer);
+  }, [value, delayMs]);
+  return debounced;
+}
+
+// Builds a list path with server-side filters (`q`, `status`, ...), skipping empty values.
+function withQuery(path, params) {
+  const search = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    const text = String(value ?? '').trim();
+    if (text) search.set(key, text);
+  });
+  const query = search.toString();
+  return query ? `${path}?${query}` : path;
+}
+
+function ListSearch({ id, label, value, onChange, placeholder }) {
+  return (
+    <div className="card memorial-filter-card">
+      <label htmlFor={id}>{label}</label>
+      <input
+        id={id}
+        type="text"
+        value={value}
+        onChange={(event) => onChange(event.target.value)}
+        placeholder={placeholder}
+      />
+    </div>
+  );
+}
+
+function LoadMoreButton({ state }) {
+  if (state.loading || !state.hasMore) return null;
+  return (
+    <button className="ghost-btn" type="button" onClick={state.loadMore} disabled={state.loadingMore}>
+      {state.loadingMore ? 'Loading...' : 'Load more'}
+    </button>
+  );
+}
+
 function useDashboardData(enabled) {
   const { loading, error, data } = useApi(
     '/dashboard/summary/',
@@ -440,7 +591,11 @@ function DashboardPage() {
 }
 
 function MemorialsPage() {
-  const { loading, error, data } = useApi('/memorials/', []);
+  const [query, setQuery] = useState('');
+  const [statusFilter, setStatusFilter] = useState('');
+  const debouncedQuery = useDebouncedValue(query);
+  const memorialState = usePagedApi(withQuery('/memorials/', { q: debouncedQuery, status: statusFilter }));
+  const { loading, error, data } = memorialState;
 
   return (
     <>
@@ -449,6 +604,29 @@ function MemorialsPage() {
 
       {error && <div className="card warn">Backend error: {error}</div>}
 
+      <ListSearch
+        id="memorial-filter"
+        label="Search Memorial Records"
+        value={query}
+        onChange={setQuery}
+        placeholder="Search by customer, cemetery, or inscription"
+      />
+      <div className="card memorial-filter-card">
+        <label htmlFor="memorial-status-filter">Last Service Status</label>
+        <select
+          id="memorial-status-filter"
+          value={statusFilter}
+          onChange={(event) => setStatusFilter(event.target.value)}
+        >
+          <option value="">Any status</option>
+          <option value="draft">Draft</option>
+          <option value="scheduled">Scheduled</option>
+          <option value="in_progress">In progress</option>
+          <option value="completed">Completed</option>
+          <option value="canceled">Canceled</option>
+        </select>
+      </div>
+
       <div className="card">
         <table>
           <thead>
@@ -476,19 +654,57 @@ function MemorialsPage() {
             ))}
           </tbody>
         </table>
+        <LoadMoreButton state={memorialState} />
       </div>
     </>
   );
 }
 
+const BOARD_STATUSES = ['draft', 'scheduled', 'in_progress'];
+const SERVICE_EVENT_KINDS = ['service.created', 'service.assigned', 'service.status', 'service.updated', 'service.deleted'];
+
+// Applies pushed scheduling board rows from the SSE feed; EventSource reconnects
+// with Last-Event-ID on its own, and a `reset` event asks for a full reload.
+function useServiceEvents(setServices, reloadEvent) {
+  useEffect(() => {
+    if (typeof window.EventSource !== 'function') return undefined;
+    const source = new EventSource(`${API_BASE}/events/services/`, { withCredentials: true });
+
+    function handleEvent(event) {
+      let message;
+      try {
+        message = JSON.parse(event.data);
+      } catch (err) {
+        return;
+      }
+      const row = message.service;
+      setServices((prev) => {
+        if (!row || !BOARD_STATUSES.includes(row.status)) {
+          return prev.filter((item) => item.id !== message.service_id);
+        }
+        const index = prev.findIndex((item) => item.id === row.id);
+        if (index === -1) return [...prev, row];
+        return prev.map((item) => (item.id === row.id ? row : item));
+      });
+    }
+    function handleReset() {
+      window.dispatchEvent(new Event(reloadEvent));
+    }
+
+    SERVICE_EVENT_KINDS.forEach((kind) => source.addEventListener(kind, handleEvent));
+    source.addEventListener('reset', handleReset);
+    return () => source.close();
+  }, [setServices, reloadEvent]);
+}
+
 function SchedulingPage() {
-  const servicesState = useApi('/scheduling/services/', []);
+  const servicesState = useApi('/scheduling/services/', [], true, { refreshEvent: 'hs:services-reset' });
   const techState = useApi('/technicians/', []);
-  const memorialState = useApi('/memorials/', []);
 
   const [services, setServices] = useState([]);
   const [selectedServiceId, setSelectedServiceId] = useState('');
   const [technicianId, setTechnicianId] = useState('');
+  const [technicianLabel, setTechnicianLabel] = useState('');
   const [scheduledStart, setScheduledStart] = useState('');
   const [estimatedMinutes, setEstimatedMinutes] = useState('90');
   const [price, setPrice] = useState('');
@@ -505,6 +721,8 @@ function SchedulingPage() {
     setServices(Array.isArray(servicesState.data) ? servicesState.data : []);
   }, [servicesState.data]);
 
+  useServiceEvents(setServices, 'hs:services-reset');
+
   useEffect(() => {
     try {
       localStorage.setItem(SCHEDULING_DATE_KEY, calendarDate);
@@ -525,6 +743,7 @@ function SchedulingPage() {
     const preferred = services.find((s) => s.status === 'draft') || services[0];
     setSelectedServiceId(String(preferred.id));
     setTechnicianId(preferred.technician_id ? String(preferred.technician_id) : '');
+    setTechnicianLabel(preferred.technician_name || '');
     setScheduledStart(toDatetimeLocalInput(preferred.scheduled_start));
     setEstimatedMinutes(preferred.estimated_minutes ? String(preferred.estimated_minutes) : '90');
     setPrice(preferred.price != null ? String(preferred.price) : '');
@@ -550,6 +769,7 @@ function SchedulingPage() {
     if (!svc) return;
     setSelectedServiceId(String(svc.id));
     setTechnicianId(svc.technician_id ? String(svc.technician_id) : '');
+    setTechnicianLabel(svc.technician_name || '');
     setScheduledStart(toDatetimeLocalInput(svc.scheduled_start));
     setEstimatedMinutes(svc.estimated_minutes ? String(svc.estimated_minutes) : '90');
     setPrice(svc.price != null ? String(svc.price) : '');
@@ -696,9 +916,9 @@ function SchedulingPage() {
       <h1 className="page-title">Scheduling</h1>
       <p className="page-subtitle">Assign technicians, set GPS coordinates, and schedule restoration jobs.</p>
 
-      {(servicesState.error || techState.error || memorialState.error) && (
+      {(servicesState.error || techState.error) && (
         <div className="card warn">
-          Backend error: {servicesState.error || techState.error || memorialState.error}
+          Backend error: {servicesState.error || techState.error}
         </div>
       )}
 
@@ -756,18 +976,11 @@ function SchedulingPage() {
           <h3>Create Job</h3>
           <form className="form" onSubmit={handleCreateJob}>
             <label>Memorial</label>
-            <select
-              value={createMemorialId}
-              onChange={(event) => setCreateMemorialId(event.target.value)}
-              required
-            >
-              <option value="">Select memorial</option>
-              {(memorialState.data || []).map((m) => (
-                <option key={m.id} value={m.id}>
-                  #{m.id} · {m.customer || 'Customer'} · {m.cemetery || 'Cemetery'}
-                </option>
-              ))}
-            </select>
+            <Typeahead
+              kind="memorial"
+              placeholder="Type a customer or cemetery name"
+              onSelect={(result) => setCreateMemorialId(result ? String(result.id) : '')}
+            />
 
             <label>Service Type</label>
             <select
@@ -791,7 +1004,7 @@ function SchedulingPage() {
 
             {createState.error && <div className="form-error">{createState.error}</div>}
             {createState.success && <div className="card form-success"><strong>{createState.success}</strong></div>}
-            <button className="primary-btn" type="submit" disabled={createState.loading || memorialState.loading}>
+            <button className="primary-btn" type="submit" disabled={createState.loading}>
               {createState.loading ? 'Creating...' : 'Create Job'}
             </button>
           </form>
@@ -815,16 +1028,12 @@ function SchedulingPage() {
             </select>
 
             <label>Technician</label>
-            <select
-              value={technicianId}
-              onChange={(event) => setTechnicianId(event.target.value)}
-              required
-            >
-              <option value="">Select technician</option>
-              {(techState.data || []).map((tech) => (
-                <option key={tech.id} value={tech.id}>{tech.full_name}</option>
-              ))}
-            </select>
+            <Typeahead
+              kind="technician"
+              label={technicianLabel}
+              placeholder="Type a technician name"
+              onSelect={(result) => setTechnicianId(result ? String(result.id) : '')}
+            />
 
             <label>Start Time</label>
             <input
@@ -1091,7 +1300,9 @@ function UsersAdminPage() {
 }
 
 function CustomersPage() {
-  const customerState = useApi('/manage/customers/', []);
+  const [query, setQuery] = useState('');
+  const debouncedQuery = useDebouncedValue(query);
+  const customerState = usePagedApi(withQuery('/manage/customers/', { q: debouncedQuery }));
   const [customers, setCustomers] = useState([]);
   const [editingId, setEditingId] = useState(null);
   const [form, setForm] = useState({ full_name: '', email: '', phone: '' });
@@ -1101,6 +1312,16 @@ function CustomersPage() {
     setCustomers(Array.isArray(customerState.data) ? customerState.data : []);
   }, [customerState.data]);
 
+  const customerIds = customers.slice(0, 500).map((c) => c.id).join(',');
+  const valueState = useApi(`/analytics/customer-value/?customer_id=${customerIds}`, null, Boolean(customerIds));
+  const lifetimeValues = useMemo(() => {
+    const values = {};
+    (valueState.data?.customers_detail || []).forEach((row) => {
+      values[row.customer_id] = row.lifetime_value;
+    });
+    return values;
+  }, [valueState.data]);
+
   function startCreate() {
     setEditingId(null);
     setForm({ full_name: '', email: '', phone: '' });
@@ -1194,24 +1415,32 @@ function CustomersPage() {
 
         <div className="card">
           <h3>Customer List</h3>
+          <input
+            type="text"
+            value={query}
+            onChange={(event) => setQuery(event.target.value)}
+            placeholder="Search by name, email, or phone"
+          />
           <div className="table-scroll">
             <table>
               <thead>
                 <tr>
                   <th>Customer</th>
                   <th>Memorials</th>
+                  <th>Lifetime Value</th>
                   <th>Email</th>
                   <th>Phone</th>
                   <th>Actions</th>
                 </tr>
               </thead>
               <tbody>
-                {customerState.loading && <tr><td colSpan="5" className="meta">Loading...</td></tr>}
-                {!customerState.loading && customers.length === 0 && <tr><td colSpan="5" className="meta">No customers yet.</td></tr>}
+                {customerState.loading && <tr><td colSpan="6" className="meta">Loading...</td></tr>}
+                {!customerState.loading && customers.length === 0 && <tr><td colSpan="6" className="meta">No customers yet.</td></tr>}
                 {!customerState.loading && customers.map((c) => (
                   <tr key={c.id}>
                     <td>{c.full_name}</td>
                     <td>{c.memorials_count || 0}</td>
+                    <td>{c.id in lifetimeValues ? formatCurrency(lifetimeValues[c.id]) : '—'}</td>
                     <td>{c.email || '—'}</td>
                     <td>{c.phone || '—'}</td>
                     <td style={{ display: 'flex', gap: '6px' }}>
@@ -1223,6 +1452,7 @@ function CustomersPage() {
               </tbody>
             </table>
           </div>
+          <LoadMoreButton state={customerState} />
         </div>
       </section>
     </>
@@ -1230,7 +1460,10 @@ function CustomersPage() {
 }
 
 function CemeteriesPage() {
-  const { loading, error, data } = useApi('/cemeteries/', []);
+  const [query, setQuery] = useState('');
+  const debouncedQuery = useDebouncedValue(query);
+  const cemeteryState = usePagedApi(withQuery('/cemeteries/', { q: debouncedQuery }));
+  const { loading, error, data } = cemeteryState;
 
   return (
     <>
@@ -1239,6 +1472,14 @@ function CemeteriesPage() {
 
       {error && <div className="card warn">Backend error: {error}</div>}
 
+      <ListSearch
+        id="cemetery-filter"
+        label="Search Cemeteries"
+        value={query}
+        onChange={setQuery}
+        placeholder="Search by name or city"
+      />
+
       <div className="card">
         <table>
           <thead>
@@ -1262,6 +1503,7 @@ function CemeteriesPage() {
             ))}
           </tbody>
         </table>
+        <LoadMoreButton state={cemeteryState} />
       </div>
     </>
   );
@@ -1277,12 +1519,106 @@ function ArchivePage() {
   );
 }
 
+function formatMonthLabel(value) {
+  const [year, month] = String(value).split('-').map(Number);
+  if (!year || !month) return value;
+  return new Date(year, month - 1, 1).toLocaleDateString('en-US', { month: 'short', year: 'numeric' });
+}
+
 function ReportsPage() {
+  const currentYear = new Date().getFullYear();
+  const [year, setYear] = useState(currentYear);
+  const revenueState = useApi(`/reports/revenue-by-service-type/?year=${year}`, { years: [] });
+  const ltvState = useApi('/reports/lifetime-value/', null);
+  const customersState = useApi('/reports/new-customers/', { months: [] });
+  const completionState = useApi(`/reports/completion-rate/?year=${year}`, null);
+
+  const revenueYear = (revenueState.data.years || [])[0] || null;
+  const customerMonths = customersState.data.months || [];
+  const currentMonth = customerMonths[customerMonths.length - 1];
+  const error = revenueState.error || ltvState.error || customersState.error || completionState.error;
+
+  const reportCards = [
+    {
+      title: `Revenue by Service Type (${year})`,
+      value: revenueYear && revenueYear.service_types.length
+        ? revenueYear.service_types.slice(0, 2).map((row) => `${row.label} ${formatPercent(row.share)}`).join(' / ')
+        : 'No invoiced revenue'
+    },
+    {
+      title: 'Average Lifetime Value',
+      value: ltvState.data ? formatCurrency(ltvState.data.average_lifetime_value) : '—'
+    },
+    {
+      title: 'New Customers by Month',
+      value: currentMonth ? `${currentMonth.count} in current month` : '—'
+    },
+    {
+      title: `Completion Rate (${year})`,
+      value: completionState.data ? formatPercent(completionState.data.rate) : '—'
+    }
+  ];
+
   return (
     <>
       <h1 className="page-title">Reports</h1>
       <p className="page-subtitle">Operational and revenue insights.</p>
-      <div className="card"><p className="meta">Hook up reporting endpoints to show charts.</p></div>
+
+      {error && <div className="card warn">Backend error: {error}</div>}
+
+      <div className="card-header">
+        <span className="meta">Reporting year</span>
+        <select value={year} onChange={(event) => setYear(Number(event.target.value))}>
+          {[0, 1, 2, 3, 4].map((offset) => (
+            <option key={offset} value={currentYear - offset}>{currentYear - offset}</option>
+          ))}
+        </select>
+      </div>
+
+      <div className="grid-equal">
+        {reportCards.map((card) => (
+          <div className="card report-card" key={card.title}>
+            <h3>{card.title}</h3>
+            <p>{card.value}</p>
+          </div>
+        ))}
+      </div>
+
+      <div className="grid-2">
+        <div className="card">
+          <h3>Revenue by Service Type</h3>
+          {revenueState.loading && <p className="meta">Loading from backend...</p>}
+          {!revenueState.loading && !revenueYear && <p className="meta">No invoices issued in {year}.</p>}
+          {revenueYear && (
+            <ul className="service-list">
+              {revenueYear.service_types.map((row) => (
+                <li key={row.service_type || 'unassigned'}>
+                  <strong>{row.label}</strong>
+                  <span>{formatCurrency(row.revenue)} · {formatPercent(row.share)}</span>
+                </li>
+              ))}
+              <li>
+                <strong>Total</strong>
+                <span>{formatCurrency(revenueYear.revenue)}</span>
+              </li>
+            </ul>
+          )}
+        </div>
+        <div className="card">
+          <h3>New Customers by Month</h3>
+          {customersState.loading && <p className="meta">Loading from backend...</p>}
+          {!customersState.loading && (
+            <ul className="service-list">
+              {customerMonths.slice().reverse().map((row) => (
+                <li key={row.month}>
+                  <strong>{formatMonthLabel(row.month)}</strong>
+                  <span>{row.count} new customer{row.count === 1 ? '' : 's'}</span>
+                </li>
+              ))}
+            </ul>
+          )}
+        </div>
+      </div>
     </>
   );
 }
@@ -1557,6 +1893,139 @@ function CustomerSettingsPage() {
   );
 }
 
+// Page each kind of /api/search/ result opens.
+const SEARCH_KIND_PAGES = {
+  customer: { page: 'customers', label: 'Customer' },
+  memorial: { page: 'memorials', label: 'Memorial' },
+  cemetery: { page: 'cemeteries', label: 'Cemetery' },
+  service: { page: 'scheduling', label: 'Service' },
+  employee: { page: 'users', label: 'Staff' }
+};
+const SEARCH_DEBOUNCE_MS = 250;
+const AUTOCOMPLETE_DEBOUNCE_MS = 120;
+
+function GlobalSearch({ basePath }) {
+  const [query, setQuery] = useState('');
+  const [results, setResults] = useState([]);
+
+  useEffect(() => {
+    const text = query.trim();
+    if (text.length < 2) {
+      setResults([]);
+      return undefined;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const res = await fetch(`${API_BASE}/search/?${new URLSearchParams({ q: text })}`, { credentials: 'include' });
+        const json = res.ok ? await res.json() : { results: [] };
+        if (!cancelled) setResults(json.results || []);
+      } catch (err) {
+        if (!cancelled) setResults([]);
+      }
+    }, SEARCH_DEBOUNCE_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [query]);
+
+  return (
+    <div className="search">
+      <input
+        type="text"
+        placeholder="Search memorials, customers, cemeteries, GPS..."
+        value={query}
+        onChange={(event) => setQuery(event.target.value)}
+      />
+      {results.length > 0 && (
+        <ul className="search-results">
+          {results.map((result) => {
+            const target = SEARCH_KIND_PAGES[result.kind];
+            return (
+              <li key={`${result.kind}-${result.id}`}>
+                <a href={`#${basePath}/${target.page}`} onClick={() => setQuery('')}>
+                  <span className="tag">{target.label}</span>
+                  <strong>{result.title}</strong>
+                  {result.subtitle && <span className="meta"> {result.subtitle}</span>}
+                  <div className="meta">
+                    {result.snippet.map((segment, index) => (
+                      segment.match ? <mark key={index}>{segment.text}</mark> : <span key={index}>{segment.text}</span>
+                    ))}
+                  </div>
+                </a>
+              </li>
+            );
+          })}
+        </ul>
+      )}
+    </div>
+  );
+}
+
+function Typeahead({ kind, label, placeholder, onSelect }) {
+  const [query, setQuery] = useState(label || '');
+  const [results, setResults] = useState([]);
+  const [open, setOpen] = useState(false);
+
+  useEffect(() => {
+    setQuery(label || '');
+  }, [label]);
+
+  useEffect(() => {
+    const text = query.trim();
+    if (!open || !text) {
+      setResults([]);
+      return undefined;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ q: text, kind });
+        const res = await fetch(`${API_BASE}/autocomplete/?${params}`, { credentials: 'include' });
+        const json = res.ok ? await res.json() : { results: [] };
+        if (!cancelled) setResults(json.results || []);
+      } catch (err) {
+        if (!cancelled) setResults([]);
+      }
+    }, AUTOCOMPLETE_DEBOUNCE_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [query, kind, open]);
+
+  function handleChange(event) {
+    setQuery(event.target.value);
+    setOpen(true);
+    onSelect(null);
+  }
+
+  function handlePick(result) {
+    setQuery(result.title);
+    setOpen(false);
+    onSelect(result);
+  }
+
+  return (
+    <div className="search">
+      <input type="text" placeholder={placeholder} value={query} onChange={handleChange} />
+      {open && results.length > 0 && (
+        <ul className="search-results">
+          {results.map((result) => (
+            <li key={result.id}>
+              <button type="button" className="ghost-btn" onClick={() => handlePick(result)}>
+                <strong>{kind === 'memorial' ? `#${result.id} · ${result.title}` : result.title}</strong>
+                {result.subtitle && <span className="meta"> {result.subtitle}</span>}
+              </button>
+            </li>
+          ))}
+        </ul>
+      )}
+    </div>
+  );
+}
+
 function Layout({ role, navItems, currentPath, onRoleChange, children }) {
   const [isSidebarOpen, setIsSidebarOpen] = useState(false);
 
@@ -1619,9 +2088,7 @@ function Layout({ role, navItems, currentPath, onRoleChange, children }) {
           >
             <span className="bar"></span>
           </button>
-          <div className="search">
-            <input type="text" placeholder="Search memorials, customers, cemeteries, GPS..." />
-          </div>
+          <GlobalSearch basePath={(ROLE_CONFIGS[role] || ROLE_CONFIGS.admin).basePath} />
 
           <div className="topbar-actions">
             <select